@@ -1,14 +1,17 @@
+import time
+
+# Medición del arranque: se toma antes de importar cualquier otra cosa
+run_start = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from xgboost import XGBClassifier
-from sklearn.metrics import roc_auc_score, classification_report, roc_curve
+import json
+import os
+import sys
 import warnings
+from contextlib import contextmanager
+
+# Las librerías pesadas (pandas, matplotlib, seaborn, scikit-learn, xgboost) se
+# importan dentro de cada página, solo la primera vez que se necesitan.
 
 warnings.filterwarnings('ignore')
 
@@ -50,66 +53,120 @@ page = st.sidebar.radio(
     ["📊 Inicio", "📈 Análisis Exploratorio", "🤖 Comparación de Modelos", "🎯 Predictor en Tiempo Real"]
 )
 
-# Cargar datos
+# Métricas globales precalculadas por process_data.py (misma ruta que eda_cube.summary_path)
+summary_path = os.path.join("eda_cube", "summary.json")
+
+# Tiempos de carga de esta ejecución, para el panel de diagnóstico
+timings = {}
+
+@contextmanager
+def timed(label):
+    start = time.perf_counter()
+    yield
+    timings[label] = (time.perf_counter() - start) * 1000
+
 @st.cache_data
-def load_data():
-    """Cargar el dataset consolidado."""
-    df = pd.read_csv("academic_performance_master.csv")
-    df['Exito_Academico'] = df['Estado_Asignatura'].apply(lambda x: 1 if x == 'APROBADO' else 0)
-    return df
+def load_summary():
+    """Métricas globales del dataset sin leer filas ni importar pandas."""
+    with open(summary_path, "r") as f:
+        return json.load(f)
+
+def cube_data_version():
+    """Versión del cubo de agregados (tamaño y fecha de sus archivos)."""
+    from eda_cube import cube_dir
+    stamps = [os.stat(os.path.join(cube_dir, name)) for name in ("cube.parquet", "joint.parquet")]
+    return "-".join(f"{s.st_size}.{s.st_mtime_ns}" for s in stamps)
 
 @st.cache_data
-def prepare_data(df):
-    """Preparar datos para el modelado."""
-    df_model = df.copy()
-    df_model = pd.get_dummies(df_model, columns=['Tipo_Ingreso', 'Carrera', 'Periodo'], drop_first=True)
-    model_features = [col for col in df_model.columns if col.startswith(('Asistencia', 'Num_matricula', 'Tipo_Ingreso_', 'Carrera_', 'Periodo_'))]
-    df_final = df_model[model_features + ['Exito_Academico']].dropna()
-    return df_final, model_features
+def load_eda_cube(version):
+    """Cargar el cubo de agregados generado por process_data.py (una vez por versión)."""
+    from eda_cube import load_cube
+    return load_cube()
+
+@st.cache_data
+def load_carrera_names(version):
+    """Nombre de cada Id_Carrera del cubo (tabla de dimensión de process_data.py)."""
+    from dimensions import key_labels
+    return key_labels("Id_Carrera").to_dict()
 
 @st.cache_resource
-def train_models(X_train, y_train):
-    """Entrenar los modelos."""
-    models = {
-        "Logistic Regression": LogisticRegression(max_iter=1000, solver='liblinear', random_state=42),
-        "Random Forest": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
-        "XGBoost": XGBClassifier(eval_metric='logloss', random_state=42, n_jobs=-1, verbose=0)
-    }
-    
-    trained_models = {}
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        trained_models[name] = model
-    
-    return trained_models
+def load_chart_cache():
+    """Caché de gráficos renderizados, compartida entre todas las sesiones."""
+    from chart_cache import ChartCache
+    return ChartCache()
+
+def show_chart(data_version, chart, render, **params):
+    """Mostrar un gráfico como PNG; render() solo se llama si no está en la caché."""
+    from chart_cache import chart_key
+    image = load_chart_cache().get(chart_key(data_version, chart, **params), render)
+    st.image(image, use_container_width=True)
 
-# Cargar datos
-df = load_data()
-df_final, model_features = prepare_data(df)
+@st.cache_resource
+def load_registry(version):
+    """Abrir una versión del registro de modelos (sin entrenar nada); se abre una vez por versión."""
+    from model_registry import RegisteredVersion
+    return RegisteredVersion(version)
+
+@st.cache_resource
+def load_fast_predictor(version):
+    """Ruta de inferencia de baja latencia para el mejor modelo de una versión del registro."""
+    from fast_inference import FastPredictor
+    from tree_export import load_export
+    registry = load_registry(version)
+    # Exportación plana del modelo de árboles, si model_comparison.py la generó
+    predictor = FastPredictor(registry.model(), registry.encoder, flat=load_export(registry))
+    predictor.warm_up()
+    return predictor
+
+@st.cache_resource
+def load_explainer(version):
+    """Explicaciones por predicción del mejor modelo de una versión, con caché por entrada."""
+    from explanations import Explainer
+    registry = load_registry(version)
+    return Explainer(registry.model(), registry.encoder, version)
+
+@st.cache_resource
+def load_model_evaluation(version, split="test"):
+    """Curvas y barrido de umbrales de todos los modelos de una versión (se calculan una vez)."""
+    from evaluation import load_evaluation
+    return load_evaluation(load_registry(version), split)
 
-# División de datos
-X = df_final[model_features]
-y = df_final['Exito_Academico']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+def require_registry():
+    """Obtener la versión vigente o detener la página si no hay modelos publicados.
 
-# Entrenar modelos
-trained_models = train_models(X_train, y_train)
+    CURRENT se lee en cada ejecución de la página, así una versión publicada con
+    la aplicación en marcha se usa sin reiniciarla.
+    """
+    from model_registry import current_version
+    try:
+        return load_registry(current_version())
+    except FileNotFoundError as e:
+        st.error(str(e))
+        st.stop()
 
 # Página: Inicio
 if page == "📊 Inicio":
     st.header("Bienvenido al Sistema de Predicción de Rendimiento Académico")
     
+    # Solo se lee un JSON pequeño: la página de inicio no importa pandas ni carga modelos
+    with timed("Resumen precalculado"):
+        try:
+            stats = load_summary()
+        except FileNotFoundError:
+            st.error(f"No existe {summary_path}. Ejecuta primero process_data.py.")
+            st.stop()
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total de Registros", len(df), "Periodos Académicos: 7")
+        st.metric("Total de Registros", stats['registros'], f"Periodos Académicos: {stats['periodos']}")
     
     with col2:
-        tasa_exito = (df['Exito_Academico'].sum() / len(df)) * 100
+        tasa_exito = stats['tasa_exito'] * 100
         st.metric("Tasa de Éxito Promedio", f"{tasa_exito:.1f}%", "Estudiantes Aprobados")
     
     with col3:
-        num_carreras = df['Carrera'].nunique()
+        num_carreras = stats['carreras']
         st.metric("Carreras Registradas", num_carreras, "Programas Académicos")
     
     st.markdown("---")
@@ -141,91 +198,140 @@ if page == "📊 Inicio":
 elif page == "📈 Análisis Exploratorio":
     st.header("📈 Análisis Exploratorio de Datos (EDA)")
     
+    with timed("Librerías de gráficos"):
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LogNorm
+        import seaborn as sns
+        from eda_cube import filter_cube, summary as cube_summary, success_by, nota_histogram, pearson, joint_histogram
+    
+    # Todas las métricas y gráficos se calculan desde el cubo de agregados, sin leer filas
+    with timed("Cubo de agregados"):
+        try:
+            cube_version = cube_data_version()
+        except FileNotFoundError:
+            st.error("No existe el cubo de agregados. Ejecuta primero process_data.py.")
+            st.stop()
+        cube, joint = load_eda_cube(cube_version)
+        carrera_names = load_carrera_names(cube_version)
+    
+    with st.expander("🔎 Filtros", expanded=False):
+        fcol1, fcol2 = st.columns(2)
+        with fcol1:
+            sel_periodos = st.multiselect("Periodo", sorted(cube['Periodo'].unique()))
+            sel_tipos = st.multiselect("Tipo de Ingreso", sorted(cube['Tipo_Ingreso'].unique()))
+        with fcol2:
+            # El cubo se filtra por Id_Carrera; la lista muestra los nombres
+            carrera_ids = sorted((int(k) for k in cube['Id_Carrera'].unique()),
+                                 key=lambda k: str(carrera_names.get(k, k)))
+            sel_carreras = st.multiselect("Carrera", carrera_ids, format_func=lambda k: carrera_names.get(k, str(k)))
+            sel_niveles = st.multiselect("Nivel", sorted(cube['Nivel'].unique()))
+    filters = dict(Periodo=sel_periodos, Id_Carrera=sel_carreras, Tipo_Ingreso=sel_tipos, Nivel=sel_niveles)
+    cube_sel = filter_cube(cube, **filters)
+    
+    if cube_sel['n'].sum() == 0:
+        st.warning("No hay registros para los filtros seleccionados.")
+        st.stop()
+    stats = cube_summary(cube_sel)
+    
     # Tabs para diferentes análisis
     tab1, tab2, tab3, tab4 = st.tabs(["Distribución de Notas", "Éxito por Periodo", "Éxito por Carrera", "Asistencia vs Nota"])
     
     with tab1:
         st.subheader("Distribución de la Nota Final")
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.histplot(df['Nota_final'], bins=20, kde=True, ax=ax)
-        ax.set_title('Distribución de la Nota Final')
-        ax.set_xlabel('Nota Final')
-        ax.set_ylabel('Frecuencia')
-        st.pyplot(fig)
+        counts, edges = nota_histogram(cube_sel)
+        def render():
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', edgecolor='white')
+            ax.set_title('Distribución de la Nota Final')
+            ax.set_xlabel('Nota Final')
+            ax.set_ylabel('Frecuencia')
+            return fig
+        show_chart(cube_version, "nota_hist", render, filters=filters)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Nota Promedio", f"{df['Nota_final'].mean():.2f}")
+            st.metric("Nota Promedio", f"{stats['nota_media']:.2f}")
         with col2:
-            st.metric("Nota Mínima", f"{df['Nota_final'].min():.2f}")
+            st.metric("Nota Mínima", f"{stats['nota_min']:.2f}")
         with col3:
-            st.metric("Nota Máxima", f"{df['Nota_final'].max():.2f}")
+            st.metric("Nota Máxima", f"{stats['nota_max']:.2f}")
     
     with tab2:
         st.subheader("Tasa de Éxito Académico por Periodo")
-        period_success = df.groupby('Periodo')['Exito_Academico'].agg(['mean', 'count']).reset_index()
-        period_success.columns = ['Periodo', 'Tasa_Exito', 'Total_Registros']
+        period_success = success_by(cube_sel, 'Periodo')
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        sns.barplot(x='Periodo', y='Tasa_Exito', data=period_success, ax=ax)
-        ax.set_title('Tasa de Éxito Académico por Periodo')
-        ax.set_xlabel('Periodo Académico')
-        ax.set_ylabel('Tasa de Éxito')
-        ax.set_ylim([0, 1])
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+        def render():
+            fig, ax = plt.subplots(figsize=(12, 6))
+            sns.barplot(x='Periodo', y='Tasa_Exito', data=period_success, ax=ax)
+            ax.set_title('Tasa de Éxito Académico por Periodo')
+            ax.set_xlabel('Periodo Académico')
+            ax.set_ylabel('Tasa de Éxito')
+            ax.set_ylim([0, 1])
+            ax.tick_params(axis='x', rotation=45)
+            return fig
+        show_chart(cube_version, "exito_periodo", render, filters=filters)
         
         st.dataframe(period_success, use_container_width=True)
     
     with tab3:
         st.subheader("Tasa de Éxito por Carrera (Top 10)")
-        career_success = df.groupby('Carrera')['Exito_Academico'].agg(['mean', 'count']).reset_index()
-        career_success = career_success[career_success['count'] > 100].sort_values(by='mean', ascending=False).head(10)
-        career_success.columns = ['Carrera', 'Tasa_Exito', 'Total_Registros']
+        career_success = success_by(cube_sel, 'Carrera')
+        career_success = career_success[career_success['Total_Registros'] > 100].sort_values(by='Tasa_Exito', ascending=False).head(10)
         
-        fig, ax = plt.subplots(figsize=(12, 8))
-        sns.barplot(x='Tasa_Exito', y='Carrera', data=career_success, ax=ax)
-        ax.set_title('Top 10 Carreras por Tasa de Éxito')
-        ax.set_xlabel('Tasa de Éxito')
-        st.pyplot(fig)
+        def render():
+            fig, ax = plt.subplots(figsize=(12, 8))
+            sns.barplot(x='Tasa_Exito', y='Carrera', data=career_success, ax=ax)
+            ax.set_title('Top 10 Carreras por Tasa de Éxito')
+            ax.set_xlabel('Tasa de Éxito')
+            return fig
+        show_chart(cube_version, "exito_carrera", render, filters=filters)
         
         st.dataframe(career_success, use_container_width=True)
     
     with tab4:
         st.subheader("Relación entre Asistencia y Nota Final")
-        # Muestra para mejor visualización
-        sample_df = df.sample(n=min(5000, len(df)), random_state=42)
+        # Densidad a partir del histograma conjunto del cubo (todas las filas, no una muestra)
+        counts, x_edges, y_edges = joint_histogram(joint, **filters)
         
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.scatter(sample_df['Asistencia'], sample_df['Nota_final'], alpha=0.5)
-        ax.set_title('Relación entre Asistencia y Nota Final (Muestra)')
-        ax.set_xlabel('Asistencia (%)')
-        ax.set_ylabel('Nota Final')
-        st.pyplot(fig)
+        def render():
+            fig, ax = plt.subplots(figsize=(10, 6))
+            mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts, 0), cmap='viridis', norm=LogNorm())
+            fig.colorbar(mesh, ax=ax, label='Registros')
+            ax.set_title('Relación entre Asistencia y Nota Final (Densidad)')
+            ax.set_xlabel('Asistencia (%)')
+            ax.set_ylabel('Nota Final')
+            return fig
+        show_chart(cube_version, "asistencia_nota", render, filters=filters)
         
         # Correlación
-        corr = df['Asistencia'].corr(df['Nota_final'])
+        corr = pearson(cube_sel)
         st.info(f"**Correlación de Pearson:** {corr:.4f} (Relación positiva fuerte)")
 
 # Página: Comparación de Modelos
 elif page == "🤖 Comparación de Modelos":
     st.header("🤖 Comparación de Modelos Predictivos")
     
-    # Evaluar modelos
+    with timed("Librerías de gráficos"):
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        from evaluation import at_threshold, cost_curve, best_threshold, default_costs
+    
+    # Métricas y probabilidades calculadas al publicar los modelos en el registro
+    with timed("Registro y evaluación"):
+        registry = require_registry()
+        evaluation = load_model_evaluation(registry.version)
     results = {}
-    for name, model in trained_models.items():
-        y_proba = model.predict_proba(X_test)[:, 1]
-        y_pred = model.predict(X_test)
-        auc_score = roc_auc_score(y_test, y_proba)
-        report = classification_report(y_test, y_pred, output_dict=True)
+    for name in registry.model_names:
+        report = registry.metrics[name]["Report"]
         results[name] = {
-            "AUC": auc_score,
+            "AUC": registry.metrics[name]["AUC"],
             "Accuracy": report['accuracy'],
             "Precision": report['1']['precision'],
             "Recall": report['1']['recall'],
             "F1": report['1']['f1-score'],
-            "y_proba": y_proba
         }
+    st.caption(f"Versión del registro: {registry.version} ({registry.metadata['created_at']})")
     
     # Tabla de comparación
     st.subheader("📊 Tabla de Comparación de Modelos")
@@ -249,44 +355,130 @@ elif page == "🤖 Comparación de Modelos":
     
     # Gráfico de comparación de AUC
     st.subheader("📈 Comparación de AUC-ROC")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    models_list = list(results.keys())
-    auc_scores = [results[m]["AUC"] for m in models_list]
-    colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
-    bars = ax.bar(models_list, auc_scores, color=colors)
-    ax.set_ylabel('AUC-ROC Score')
-    ax.set_title('Comparación de AUC-ROC entre Modelos')
-    ax.set_ylim([0.8, 1.0])
-    
-    # Añadir valores en las barras
-    for bar, score in zip(bars, auc_scores):
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{score:.4f}', ha='center', va='bottom')
-    
-    st.pyplot(fig)
+    def render():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        models_list = list(results.keys())
+        auc_scores = [results[m]["AUC"] for m in models_list]
+        # Un color de la paleta tab10 por modelo del registro (los tres primeros son los de siempre)
+        colors = [plt.cm.tab10(i % 10) for i in range(len(models_list))]
+        bars = ax.bar(models_list, auc_scores, color=colors)
+        ax.set_ylabel('AUC-ROC Score')
+        ax.set_title('Comparación de AUC-ROC entre Modelos')
+        ax.set_ylim([0.8, 1.0])
+    
+        # Añadir valores en las barras
+        for bar, score in zip(bars, auc_scores):
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f'{score:.4f}', ha='center', va='bottom')
+        return fig
+    show_chart(registry.version, "auc_modelos", render)
     
     # Curvas ROC
     st.subheader("📉 Curvas ROC")
-    fig, ax = plt.subplots(figsize=(10, 8))
-    
-    for name, model in trained_models.items():
-        y_proba = results[name]["y_proba"]
-        fpr, tpr, _ = roc_curve(y_test, y_proba)
-        auc = results[name]["AUC"]
-        ax.plot(fpr, tpr, label=f'{name} (AUC = {auc:.4f})')
-    
-    ax.plot([0, 1], [0, 1], 'k--', label='Clasificador Aleatorio')
-    ax.set_xlabel('Tasa de Falsos Positivos')
-    ax.set_ylabel('Tasa de Verdaderos Positivos')
-    ax.set_title('Curvas ROC - Comparación de Modelos')
-    ax.legend(loc='lower right')
-    st.pyplot(fig)
-    
+    def render():
+        fig, ax = plt.subplots(figsize=(10, 8))
+    
+        for name in results:
+            auc = results[name]["AUC"]
+            ax.plot(evaluation[name]["fpr"], evaluation[name]["tpr"], label=f'{name} (AUC = {auc:.4f})')
+    
+        ax.plot([0, 1], [0, 1], 'k--', label='Clasificador Aleatorio')
+        ax.set_xlabel('Tasa de Falsos Positivos')
+        ax.set_ylabel('Tasa de Verdaderos Positivos')
+        ax.set_title('Curvas ROC - Comparación de Modelos')
+        ax.legend(loc='lower right')
+        return fig
+    show_chart(registry.version, "roc", render)
+    
+    # Umbral de decisión
+    st.subheader("🎚️ Ajuste del Umbral de Decisión")
+    st.write("""
+    Un estudiante se marca **en riesgo** cuando su probabilidad de aprobar queda por debajo del umbral.
+    Subir el umbral detecta más estudiantes que no aprueban (recall de la clase 0) a costa de más falsas alarmas.
+    """)
+    tcol1, tcol2, tcol3 = st.columns(3)
+    with tcol1:
+        sel_model = st.selectbox("Modelo", list(results.keys()),
+                                 index=list(results.keys()).index(registry.best_model_name))
+    with tcol2:
+        cost_missed = st.number_input("Costo de no detectar a un estudiante en riesgo", 0.0, 100.0,
+                                      default_costs["missed"], 0.5)
+    with tcol3:
+        cost_false_alarm = st.number_input("Costo de una falsa alarma", 0.0, 100.0,
+                                           default_costs["false_alarm"], 0.5)
+    model_eval = evaluation[sel_model]
+    optimal, optimal_cost = best_threshold(model_eval, cost_missed, cost_false_alarm)
+    threshold = st.slider("Umbral (probabilidad de aprobar)", 0.0, 1.0, 0.5, 0.01)
+    st.caption(f"Umbral de menor costo para {sel_model}: {optimal:.3f} (costo {optimal_cost:,.0f})")
+
+    metrics = at_threshold(model_eval, threshold)
+    mcol1, mcol2, mcol3, mcol4 = st.columns(4)
+    with mcol1:
+        st.metric("Recall clase 0 (No aprobado)", f"{metrics['recall_0']:.3f}")
+    with mcol2:
+        st.metric("Precisión clase 0", f"{metrics['precision_0']:.3f}")
+    with mcol3:
+        st.metric("Recall clase 1 (Aprobado)", f"{metrics['recall']:.3f}")
+    with mcol4:
+        st.metric("Accuracy", f"{metrics['accuracy']:.3f}")
+    st.dataframe(pd.DataFrame(
+        [[metrics['tn'], metrics['fp']], [metrics['fn'], metrics['tp']]],
+        index=["Real: No aprobado", "Real: Aprobado"],
+        columns=["Pred.: No aprobado", "Pred.: Aprobado"],
+    ), use_container_width=True)
+
+    sweep = model_eval["sweep"]
+    def render():
+        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+        axes[0].plot(sweep["thresholds"], model_eval["recall_0"], label="Recall clase 0")
+        axes[0].plot(sweep["thresholds"], model_eval["precision_0"], label="Precisión clase 0")
+        axes[0].plot(sweep["thresholds"], model_eval["recall"], label="Recall clase 1")
+        axes[0].axvline(threshold, color='k', linestyle='--')
+        axes[0].set_xlabel('Umbral')
+        axes[0].set_title('Métricas por Umbral')
+        axes[0].legend(loc='best')
+        cost = cost_curve(model_eval, cost_missed, cost_false_alarm)
+        axes[1].plot(sweep["thresholds"], cost)
+        axes[1].axvline(threshold, color='k', linestyle='--')
+        axes[1].axvline(optimal, color='g', linestyle=':')
+        axes[1].set_xlabel('Umbral')
+        axes[1].set_title('Costo Total por Umbral')
+        calibration = model_eval["calibration"]
+        axes[2].plot([0, 1], [0, 1], 'k--')
+        axes[2].plot(calibration["predicted"], calibration["observed"], marker='o')
+        axes[2].set_xlabel('Probabilidad predicha')
+        axes[2].set_ylabel('Tasa observada de aprobación')
+        axes[2].set_title('Curva de Calibración')
+        return fig
+    show_chart(registry.version, "umbral", render, model=sel_model, threshold=threshold,
+               missed=cost_missed, false_alarm=cost_false_alarm)
+
+    # Curvas precisión-recall
+    st.subheader("📉 Curvas Precisión-Recall")
+    def render():
+        fig, ax = plt.subplots(figsize=(10, 8))
+        for name in results:
+            ax.plot(evaluation[name]["recall"], evaluation[name]["precision"],
+                    label=f'{name} (AP = {evaluation[name]["average_precision"]:.4f})')
+        ax.set_xlabel('Recall')
+        ax.set_ylabel('Precisión')
+        ax.set_title('Curvas Precisión-Recall - Comparación de Modelos')
+        ax.legend(loc='lower left')
+        return fig
+    show_chart(registry.version, "precision_recall", render)
+
     # Selección del mejor modelo
     st.markdown("---")
-    best_model_name = max(results, key=lambda x: results[x]["AUC"])
-    st.success(f"✅ **Mejor Modelo Seleccionado:** {best_model_name} (AUC: {results[best_model_name]['AUC']:.4f})")
+    # El modelo elegido al publicar (el que sirve el predictor), con la métrica usada para elegirlo
+    best_model_name = registry.best_model_name
+    strategy = registry.metadata.get("cv", {}).get("selection_strategy")
+    cv_metrics = registry.metrics[best_model_name].get("CV", {}).get(strategy) if strategy else None
+    if cv_metrics:
+        criterion = f"AUC de validación cruzada ({strategy}): {cv_metrics['AUC_mean']:.4f}"
+    else:
+        criterion = f"AUC en prueba: {results[best_model_name]['AUC']:.4f}"
+    st.success(f"✅ **Mejor Modelo Seleccionado:** {best_model_name} ({criterion})")
 
 # Página: Predictor en Tiempo Real
 elif page == "🎯 Predictor en Tiempo Real":
@@ -294,8 +486,16 @@ elif page == "🎯 Predictor en Tiempo Real":
     
     st.write("Ingresa los datos del estudiante para realizar una predicción de éxito académico.")
     
-    # Usar el mejor modelo (XGBoost)
-    best_model = trained_models["XGBoost"]
+    with timed("Librerías de gráficos"):
+        import matplotlib.pyplot as plt
+        from fast_inference import latency_target_ms
+    
+    # Usar el mejor modelo publicado en el registro
+    with timed("Modelo y predictor"):
+        registry = require_registry()
+        fast_predictor = load_fast_predictor(registry.version)
+    vocabulary = registry.encoder.vocabulary_
+    st.caption(f"Modelo: {registry.best_model_name} (versión {registry.version})")
     
     # Inputs del usuario
     col1, col2 = st.columns(2)
@@ -305,35 +505,19 @@ elif page == "🎯 Predictor en Tiempo Real":
         num_matricula = st.number_input("Número de Matrícula", 0, 10, 1)
     
     with col2:
-        tipo_ingreso = st.selectbox("Tipo de Ingreso", df['Tipo_Ingreso'].unique())
-        carrera = st.selectbox("Carrera", df['Carrera'].unique())
+        # Las opciones salen del vocabulario del codificador, sin leer el dataset
+        tipo_ingreso = st.selectbox("Tipo de Ingreso", vocabulary['Tipo_Ingreso'])
+        carrera = st.selectbox("Carrera", vocabulary['Carrera'])
     
-    periodo = st.selectbox("Periodo Académico", df['Periodo'].unique())
+    periodo = st.selectbox("Periodo Académico", vocabulary['Periodo'])
     
     # Preparar datos para predicción
     if st.button("🔮 Realizar Predicción", use_container_width=True):
-        # Crear un DataFrame con los datos del estudiante
-        input_data = pd.DataFrame({
-            'Asistencia': [asistencia],
-            'Num_matricula': [num_matricula],
-            'Tipo_Ingreso': [tipo_ingreso],
-            'Carrera': [carrera],
-            'Periodo': [periodo]
-        })
-        
-        # Codificar variables categóricas
-        input_data = pd.get_dummies(input_data, columns=['Tipo_Ingreso', 'Carrera', 'Periodo'], drop_first=True)
-        
-        # Alinear con las características del modelo
-        for col in model_features:
-            if col not in input_data.columns:
-                input_data[col] = 0
-        
-        input_data = input_data[model_features]
-        
-        # Realizar predicción
-        prediction_proba = best_model.predict_proba(input_data)[0]
-        prediction = best_model.predict(input_data)[0]
+        # Un solo llamado al modelo (con caché de entradas recientes)
+        prob_aprobacion, prediction = fast_predictor.predict(
+            (asistencia, num_matricula), (tipo_ingreso, carrera, periodo)
+        )
+        prediction_proba = [1 - prob_aprobacion, prob_aprobacion]
         
         # Mostrar resultados
         st.markdown("---")
@@ -354,21 +538,64 @@ elif page == "🎯 Predictor en Tiempo Real":
             st.metric("Probabilidad de No Aprobación", f"{prediction_proba[0]*100:.1f}%")
         
         # Gráfico de probabilidades
-        fig, ax = plt.subplots(figsize=(8, 5))
-        categories = ['No Aprobado', 'Aprobado']
-        probabilities = prediction_proba
-        colors = ['#d62728', '#2ca02c']
-        bars = ax.bar(categories, probabilities, color=colors)
-        ax.set_ylabel('Probabilidad')
-        ax.set_title('Distribución de Probabilidades')
-        ax.set_ylim([0, 1])
+        def render():
+            fig, ax = plt.subplots(figsize=(8, 5))
+            categories = ['No Aprobado', 'Aprobado']
+            probabilities = prediction_proba
+            colors = ['#d62728', '#2ca02c']
+            bars = ax.bar(categories, probabilities, color=colors)
+            ax.set_ylabel('Probabilidad')
+            ax.set_title('Distribución de Probabilidades')
+            ax.set_ylim([0, 1])
         
-        for bar, prob in zip(bars, probabilities):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{prob*100:.1f}%', ha='center', va='bottom')
+            for bar, prob in zip(bars, probabilities):
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height,
+                        f'{prob*100:.1f}%', ha='center', va='bottom')
+            return fig
+        show_chart(registry.version, "probabilidades", render, proba=prob_aprobacion)
+        
+        latency = fast_predictor.latency_stats()
+        st.caption(
+            f"⏱️ Latencia de inferencia: p50 {latency['p50']:.2f} ms · p99 {latency['p99']:.2f} ms "
+            f"(objetivo: < {latency_target_ms:.0f} ms) · caché: {latency['cache_hits']} aciertos, "
+            f"{latency['cache_misses']} fallos"
+        )
         
-        st.pyplot(fig)
+        # Factores de esta predicción (aportes por variable del modelo)
+        st.markdown("---")
+        st.subheader("🔍 Factores de la Predicción")
+        
+        explainer = load_explainer(registry.version)
+        aportes, base = explainer.explain((asistencia, num_matricula), (tipo_ingreso, carrera, periodo))
+        valores = {'Asistencia': f"{asistencia}%", 'Num_matricula': num_matricula,
+                   'Tipo_Ingreso': tipo_ingreso, 'Carrera': carrera, 'Periodo': periodo}
+        
+        def render():
+            fig, ax = plt.subplots(figsize=(8, 4))
+            ordered = aportes.iloc[::-1]
+            labels = [f"{name} = {str(valores[name])[:40]}" for name in ordered.index]
+            colors = ['#2ca02c' if v > 0 else '#d62728' for v in ordered]
+            ax.barh(labels, ordered.to_numpy(), color=colors)
+            ax.axvline(0, color='black', linewidth=0.8)
+            ax.set_xlabel(f'Aporte a la probabilidad de aprobar ({explainer.units})')
+            ax.set_title('Aporte de cada variable')
+            return fig
+        show_chart(registry.version, "explicacion", render,
+                   inputs=[asistencia, num_matricula, tipo_ingreso, carrera, periodo])
+        st.caption(
+            f"Valor base del modelo: {base:.3f} ({explainer.units}); cada barra suma o resta a ese valor. "
+            f"Caché de explicaciones: {explainer.cache_hits} aciertos, {explainer.cache_misses} fallos"
+        )
+        
+        en_contra = [name for name, v in aportes.items() if v < 0]
+        a_favor = [name for name, v in aportes.items() if v > 0]
+        if en_contra:
+            st.write("**Factores que reducen la probabilidad de aprobar:** "
+                     + ", ".join(f"{name} ({valores[name]})" for name in en_contra))
+        if a_favor:
+            st.write("**Factores que la aumentan:** "
+                     + ", ".join(f"{name} ({valores[name]})" for name in a_favor))
         
         # Recomendaciones
         st.markdown("---")
@@ -381,13 +608,20 @@ elif page == "🎯 Predictor en Tiempo Real":
             - Continuar con las estrategias de estudio que han sido efectivas.
             """)
         else:
-            st.warning("""
-            ⚠️ El estudiante está en riesgo de no aprobar la asignatura.
-            - **Aumentar la asistencia:** La asistencia es el predictor más importante.
-            - **Solicitar tutorías:** Buscar apoyo académico adicional.
-            - **Revisar métodos de estudio:** Considerar cambios en las estrategias de aprendizaje.
-            - **Comunicarse con el docente:** Informar sobre dificultades y buscar orientación.
-            """)
+            # Las recomendaciones siguen los factores que juegan en contra de este estudiante
+            consejos = {
+                'Asistencia': "- **Aumentar la asistencia:** En este caso la asistencia reduce la probabilidad de aprobar.",
+                'Num_matricula': "- **Revisar la repetición:** Las matrículas anteriores en la asignatura pesan en contra.",
+            }
+            lineas = ["⚠️ El estudiante está en riesgo de no aprobar la asignatura."]
+            lineas += [consejos[name] for name in en_contra
+                       if name in consejos and (name != 'Num_matricula' or num_matricula > 1)]
+            lineas += [
+                "- **Solicitar tutorías:** Buscar apoyo académico adicional.",
+                "- **Revisar métodos de estudio:** Considerar cambios en las estrategias de aprendizaje.",
+                "- **Comunicarse con el docente:** Informar sobre dificultades y buscar orientación.",
+            ]
+            st.warning("\n".join(lineas))
 
 # Footer
 st.markdown("---")
@@ -397,3 +631,19 @@ st.markdown("""
     <p>Desarrollado con Python, Scikit-learn, XGBoost y Streamlit</p>
     </div>
 """, unsafe_allow_html=True)
+
+# Panel de diagnóstico del arranque
+heavy_modules = ["pandas", "pyarrow", "matplotlib", "seaborn", "sklearn", "xgboost"]
+if "first_run_ms" not in st.session_state:
+    st.session_state["first_run_ms"] = (time.perf_counter() - run_start) * 1000
+with st.sidebar.expander("🛠️ Diagnóstico de arranque", expanded=False):
+    st.write(f"Primera ejecución de la sesión: {st.session_state['first_run_ms']:.0f} ms")
+    st.write(f"Esta ejecución: {(time.perf_counter() - run_start) * 1000:.0f} ms")
+    for label, ms in timings.items():
+        st.write(f"- {label}: {ms:.0f} ms")
+    loaded = [name for name in heavy_modules if name in sys.modules]
+    st.write(f"Librerías cargadas: {', '.join(loaded) or 'ninguna'}")
+    if "chart_cache" in sys.modules:
+        charts = load_chart_cache().stats()
+        st.write(f"Caché de gráficos: {charts['images']} imágenes, {charts['bytes'] / 1024:.0f} KB de "
+                 f"{charts['max_bytes'] / 1024 ** 2:.0f} MB · {charts['hits']} aciertos, {charts['misses']} fallos")
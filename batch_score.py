@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from data_store import iter_master_batches, to_typed_frame
+from ingestion import parse_workbook
+from model_registry import RegisteredVersion
+
+# Columnas que identifican cada matrícula en la salida
+id_columns = ["Periodo", "Paralelo", "Identificacion_Estudiante", "Estudiante", "Carrera", "Nivel", "Asignatura"]
+
+# Umbral de decisión (el mismo que usa predict() de los modelos)
+threshold = 0.5
+
+# Estado de cada proceso trabajador: el modelo se carga una sola vez por proceso
+_worker_state = {}
+
+
+def positive_proba(model, X):
+    """Probabilidad de aprobar (clase 1) en una sola pasada por el modelo."""
+    return model.predict_proba(X)[:, 1]
+
+
+def score_frame(model, encoder, df):
+    """Puntuar un bloque de matrículas de forma vectorizada.
+
+    Las filas sin datos numéricos (por ejemplo, sin asistencia) quedan sin puntaje.
+    """
+    proba = np.full(len(df), np.nan, dtype=np.float32)
+    valid = encoder.valid_mask(df)
+    if valid.any():
+        proba[valid] = positive_proba(model, encoder.transform(df.loc[valid]))
+
+    scored = df[[col for col in id_columns if col in df.columns]].copy()
+    for col in scored.columns:
+        if isinstance(scored[col].dtype, pd.CategoricalDtype):
+            scored[col] = scored[col].astype(str)
+    scored["Prob_Aprobacion"] = proba
+    scored["Riesgo"] = 1 - proba
+    scored["Prediccion"] = np.where(np.isnan(proba), None,
+                                    np.where(proba >= threshold, "APROBADO", "NO APROBADO"))
+    return scored
+
+
+def _init_worker(version, model_name):
+    registry = RegisteredVersion(version)
+    model = registry.model(model_name)
+    # Un hilo por proceso: el paralelismo lo aporta el pool
+    if hasattr(model, "n_jobs"):
+        model.set_params(n_jobs=1)
+    _worker_state["model"] = model
+    _worker_state["encoder"] = registry.encoder
+
+
+def _score_chunk(df):
+    return score_frame(_worker_state["model"], _worker_state["encoder"], df)
+
+
+def iter_input(input_path, columns, chunk_size, periodos=None):
+    """Bloques de entrada: el almacén columnar o un archivo .xls nuevo."""
+    if input_path is None:
+        yield from iter_master_batches(columns=columns, periodos=periodos, batch_size=chunk_size)
+        return
+
+    # Un .xls del MAESTRO DE NOTAS cabe en memoria (máximo 65.536 filas por hoja)
+    df = to_typed_frame(parse_workbook(input_path, require_grade=False), require_grade=False)
+    if periodos is not None:
+        df = df[df['Periodo'].isin(periodos)]
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def output_schema(columns):
+    """Esquema de la salida fijado de antemano: un bloque con Prediccion toda vacía no la deja como null."""
+    types = {"Prob_Aprobacion": pa.float32(), "Riesgo": pa.float32()}
+    return pa.schema([(col, types.get(col, pa.string())) for col in columns])
+
+
+class ScoreWriter:
+    """Escritura incremental de resultados en CSV o Parquet."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = output_path.endswith(".parquet")
+        self._writer = None
+        self._schema = None
+        self._header = True
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    def write(self, scored):
+        if self.parquet:
+            if self._writer is None:
+                self._schema = output_schema(scored.columns)
+                self._writer = pq.ParquetWriter(self.output_path, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(scored, schema=self._schema, preserve_index=False))
+        else:
+            scored.to_csv(self.output_path, mode="a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run(input_path=None, output_path="batch_scores.csv", chunk_size=50000, workers=None,
+        periodos=None, model_name=None, version=None):
+    """Puntuar todas las matrículas y devolver el total de filas y la velocidad."""
+    registry = RegisteredVersion(version)
+    model_name = model_name or registry.best_model_name
+    columns = id_columns + registry.encoder.numeric + registry.encoder.categorical
+    columns = list(dict.fromkeys(columns))
+    workers = workers or os.cpu_count() or 1
+
+    writer = ScoreWriter(output_path)
+    total_rows = 0
+    start = time.perf_counter()
+    chunks = iter_input(input_path, columns, chunk_size, periodos)
+    try:
+        if workers == 1:
+            _init_worker(registry.version, model_name)
+            for df in chunks:
+                scored = _score_chunk(df)
+                writer.write(scored)
+                total_rows += len(scored)
+        else:
+            # Como máximo 2 bloques en vuelo por proceso: la memoria no depende del tamaño del dataset
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(registry.version, model_name)) as executor:
+                in_flight = deque()
+                for df in chunks:
+                    in_flight.append(executor.submit(_score_chunk, df))
+                    if len(in_flight) >= 2 * workers:
+                        scored = in_flight.popleft().result()
+                        writer.write(scored)
+                        total_rows += len(scored)
+                while in_flight:
+                    scored = in_flight.popleft().result()
+                    writer.write(scored)
+                    total_rows += len(scored)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": total_rows,
+        "seconds": elapsed,
+        "rows_per_second": total_rows / elapsed if elapsed > 0 else float("inf"),
+        "model": model_name,
+        "version": registry.version,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puntuar en lote el riesgo académico de una cohorte completa.")
+    parser.add_argument("--input", default=None,
+                        help="Archivo .xls del MAESTRO DE NOTAS (por defecto, el almacén academic_store).")
+    parser.add_argument("--output", default="batch_scores.csv",
+                        help="Archivo de salida (.csv o .parquet).")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Filas por bloque.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos a utilizar (por defecto, todos los núcleos).")
+    parser.add_argument("--periodo", action="append", default=None, help="Limitar a uno o más periodos.")
+    parser.add_argument("--model", default=None, help="Modelo del registro (por defecto, el mejor).")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    args = parser.parse_args()
+
+    stats = run(args.input, args.output, args.chunk_size, args.workers, args.periodo, args.model, args.version)
+    print(f"Modelo: {stats['model']} (versión {stats['version']})")
+    print(f"Filas puntuadas: {stats['rows']} en {stats['seconds']:.2f} s "
+          f"({stats['rows_per_second']:,.0f} filas/s)")
+    print(f"Resultados guardados en {args.output}")
@@ -0,0 +1,329 @@
+import pandas as pd
+import numpy as np
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import shutil
+import subprocess
+import time
+from datetime import datetime
+from ingestion import new_column_names, source_columns, peak_rss_mb
+
+# Suite de rendimiento: cada etapa se mide en un proceso nuevo para que el pico
+# de memoria de una no contamine a las demás.
+bench_dir = "benchmark_data"
+results_dir = "benchmark_results"
+default_sizes = [50_000, 500_000, 5_000_000]
+# Filas máximas por archivo .xls (límite del formato: 65536 filas por hoja)
+xls_rows_per_file = 60_000
+# Más allá de este tamaño no se generan .xls sintéticos (escribirlos tarda más que la medición)
+xls_max_rows = 500_000
+# Modelos muy costosos solo se miden hasta cierto tamaño
+model_max_rows = {"Random Forest": 500_000}
+# Aumento relativo (tiempo o memoria) a partir del cual se marca una regresión
+default_tolerance = 0.20
+
+
+def synthetic_frame(n, seed=42):
+    """DataFrame con la forma del MAESTRO DE NOTAS consolidado, sin datos personales.
+
+    Identificadores, nombres y asignaturas son códigos generados; la nota depende
+    de la asistencia para que los modelos tengan una señal que aprender.
+    """
+    rng = np.random.default_rng(seed)
+    periodos = [f"{year}-{term}P" for year in range(2018, 2026) for term in (1, 2)]
+    carreras = [f"CARRERA {i:02d}" for i in range(1, 21)]
+    niveles = ["PRIMERO", "SEGUNDO", "TERCERO", "CUARTO", "QUINTO"]
+    n_students = max(n // 12, 1)
+
+    student = rng.integers(0, n_students, n)
+    asistencia = np.clip(rng.normal(85, 15, n), 0, 100).round(2)
+    nota = np.clip(2 + 0.075 * asistencia + rng.normal(0, 1.2, n), 0, 10).round(2)
+    estado = np.where(nota >= 7, "APROBADO", np.where(rng.random(n) < 0.1, "RETIRADO", "REPROBADO"))
+    teacher = rng.integers(0, 300, n)
+
+    def pick(values, p=None):
+        return pd.Categorical.from_codes(rng.choice(len(values), n, p=p), categories=values)
+
+    return pd.DataFrame({
+        "Periodo": pick(periodos),
+        "Paralelo": pick(["A", "B", "C", "D"]),
+        "Identificacion_Estudiante": pd.Categorical(np.char.add("EST", student.astype(str))),
+        "Estudiante": pd.Categorical(np.char.add("ESTUDIANTE ", student.astype(str))),
+        "Carrera": pick(carreras),
+        "Nivel": pick(niveles),
+        "Asignatura": pick([f"ASIG{i:03d}" for i in range(120)]),
+        "Num_matricula": rng.choice([1, 2, 3], n, p=[0.85, 0.12, 0.03]).astype(str),
+        "Asistencia": asistencia.astype(str),
+        "Nota_final": nota.astype(str),
+        "Estado_Asignatura": pd.Categorical(estado),
+        "Estado_Matricula": pick(["APROBADO", "ANULADO"], p=[0.97, 0.03]),
+        "Tipo_Ingreso": pick(["NORMAL", "HOMOLOGACION", "CAMBIO DE CARRERA"], p=[0.9, 0.06, 0.04]),
+        "Cedula_docente": pd.Categorical(np.char.add("DOC", teacher.astype(str))),
+        "Nombre_docente": pd.Categorical(np.char.add("DOCENTE ", teacher.astype(str))),
+    })[new_column_names]
+
+
+def synthetic_path(n):
+    return os.path.join(bench_dir, f"synthetic_{n}.parquet")
+
+
+def ensure_synthetic(n):
+    """Generar los datos de un tamaño; con un perfil aprendido se usa synthetic_data.py."""
+    from synthetic_data import profile_path, load_profile, SyntheticGenerator, write_parquet
+
+    path = synthetic_path(n)
+    if not os.path.exists(path):
+        os.makedirs(bench_dir, exist_ok=True)
+        if os.path.exists(profile_path):
+            write_parquet(SyntheticGenerator(load_profile()).chunks(n), path)
+        else:
+            synthetic_frame(n).to_parquet(path, index=False)
+    return path
+
+
+def load_text_frame(n):
+    """Datos sintéticos como los entrega la ingesta (columnas de texto)."""
+    df = pd.read_parquet(synthetic_path(n))
+    return df.astype({col: object for col in df.columns})
+
+
+def write_synthetic_xls(n):
+    """Escribir los datos sintéticos como .xls con el diseño del reporte; requiere xlwt."""
+    import xlwt
+
+    rows = min(n, xls_max_rows)
+    out_dir = os.path.join(bench_dir, f"xls_{rows}")
+    if os.path.isdir(out_dir):
+        return sorted(glob.glob(os.path.join(out_dir, "*.xls")))
+    os.makedirs(out_dir)
+    df = load_text_frame(n).iloc[:rows]
+    for part, start in enumerate(range(0, rows, xls_rows_per_file)):
+        book = xlwt.Workbook()
+        sheet = book.add_sheet("Reporte")
+        sheet.write(2, 1, "REPORTE MAESTRO DE NOTAS")
+        for col, name in zip(source_columns, new_column_names):
+            sheet.write(3, col, name)
+        chunk = df.iloc[start:start + xls_rows_per_file].to_numpy()
+        for i, row in enumerate(chunk, start=4):
+            for col, value in zip(source_columns, row):
+                sheet.write(i, col, value)
+        book.save(os.path.join(out_dir, f"MAESTRO DE NOTAS-{part:04d}.xls"))
+    return sorted(glob.glob(os.path.join(out_dir, "*.xls")))
+
+
+# Medición dentro del proceso hijo
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def _timed(stage, rows, func):
+    input_rss = _current_rss_mb()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    return {
+        "stage": stage, "rows": int(rows), "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else None,
+        "input_rss_mb": input_rss, "peak_rss_mb": peak_rss_mb(),
+    }, result
+
+
+def bench_xls_parse(n, stage="xls_parse"):
+    from ingestion import parse_workbook, parse_workbook_pandas, data_dir, list_exports
+    parse = parse_workbook_pandas if stage == "xls_parse_pandas" else parse_workbook
+    try:
+        files = write_synthetic_xls(n)
+        source = "sintético"
+    except ImportError:
+        # Sin xlwt no se pueden escribir .xls: se miden las exportaciones reales
+        files = list_exports(data_dir)
+        source = "exportaciones reales (xlwt no instalado)"
+    metrics, frames = _timed(stage, 0, lambda: [parse(f) for f in files])
+    rows = sum(len(frame) for frame in frames)
+    metrics.update(rows=rows, rows_per_second=rows / metrics["seconds"], source=source, files=len(files))
+    return [metrics]
+
+
+def bench_xls_parse_pandas(n):
+    """Lector anterior (pandas.read_excel) para comparar con el lector nativo."""
+    return bench_xls_parse(n, stage="xls_parse_pandas")
+
+
+def bench_consolidation(n):
+    from data_store import write_store, load_master
+    df = load_text_frame(n)
+    path = os.path.join(bench_dir, f"store_{n}")
+
+    def consolidate():
+        write_store(df, path)
+        return load_master(path=path)
+
+    metrics, _ = _timed("consolidation", n, consolidate)
+    shutil.rmtree(path)
+    return [metrics]
+
+
+def bench_encoding(n):
+    from data_store import to_typed_frame
+    from features import add_target, build_design_matrix
+    df = add_target(to_typed_frame(load_text_frame(n)))
+    metrics, (X, _, _) = _timed("encoding", n, lambda: build_design_matrix(df))
+    metrics["nnz"] = int(X.nnz)
+    return [metrics]
+
+
+def bench_model(n, name):
+    from sklearn.model_selection import train_test_split
+    from data_store import to_typed_frame
+    from features import add_target, build_design_matrix
+    from modeling import make_model
+    from fast_inference import FastPredictor
+    from tree_export import export_model, is_tree_model
+
+    df = add_target(to_typed_frame(load_text_frame(n)))
+    X, y, encoder = build_design_matrix(df)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    model = make_model(name, n_jobs=-1)
+    fit, _ = _timed(f"fit/{name}", X_train.shape[0], lambda: model.fit(X_train, y_train))
+    predict, _ = _timed(f"predict_proba/{name}", X_test.shape[0], lambda: model.predict_proba(X_test))
+
+    # Latencia de un solo estudiante con la ruta rápida del predictor
+    latency = FastPredictor(model, encoder).warm_up(n=500)
+    single = {"stage": f"single_row/{name}", "rows": 1, "seconds": latency["p50"] / 1000,
+              "p50_ms": latency["p50"], "p99_ms": latency["p99"], "peak_rss_mb": peak_rss_mb()}
+    results = [fit, predict, single]
+
+    # Los modelos de árboles también se miden con su exportación plana (tree_export.py)
+    if is_tree_model(model):
+        flat = export_model(model)
+        predict_flat, _ = _timed(f"predict_proba_flat/{name}", X_test.shape[0], lambda: flat.predict_proba(X_test))
+        predict_flat["model_mb"] = flat.nbytes / 1024 ** 2
+        predict["model_mb"] = len(pickle.dumps(model)) / 1024 ** 2
+        latency = FastPredictor(model, encoder, flat=flat).warm_up(n=500)
+        single_flat = {"stage": f"single_row_flat/{name}", "rows": 1, "seconds": latency["p50"] / 1000,
+                       "p50_ms": latency["p50"], "p99_ms": latency["p99"], "peak_rss_mb": peak_rss_mb()}
+        results += [predict_flat, single_flat]
+    return results
+
+
+def _child(queue, func_name, args):
+    try:
+        queue.put(("ok", globals()[func_name](*args)))
+    except Exception as e:
+        queue.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(func_name, *args):
+    """Ejecutar una medición en un proceso nuevo (spawn) y devolver sus métricas."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, func_name, args))
+    process.start()
+    status, payload = queue.get()
+    process.join()
+    if status == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+def run_suite(sizes, models, stages=("xls_parse", "consolidation", "encoding", "models")):
+    results = []
+    for n in sizes:
+        print(f"\n== {n:,} filas ==")
+        ensure_synthetic(n)
+        jobs = [(stage, f"bench_{stage}", (n,)) for stage in stages if stage != "models"]
+        if "models" in stages:
+            for name in models:
+                if n > model_max_rows.get(name, float("inf")):
+                    results.append({"size": n, "stage": f"fit/{name}", "status": "omitido (límite de filas)"})
+                    continue
+                jobs.append((name, "bench_model", (n, name)))
+        for label, func_name, args in jobs:
+            try:
+                for metrics in run_isolated(func_name, *args):
+                    results.append(dict(size=n, status="ok", **metrics))
+                    print(f"  {metrics['stage']}: {metrics['seconds']:.3f} s, "
+                          f"pico {metrics['peak_rss_mb']:.0f} MB")
+            except RuntimeError as e:
+                results.append({"size": n, "stage": label, "status": "error", "error": str(e)})
+                print(f"  {label}: error {e}")
+    return results
+
+
+def environment():
+    import sklearn
+    import xgboost
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "pandas": pd.__version__, "numpy": np.__version__, "sklearn": sklearn.__version__,
+        "xgboost": xgboost.__version__, "commit": commit,
+    }
+
+
+def compare(results, baseline, tolerance=default_tolerance):
+    """Marcar regresiones de tiempo o memoria frente a una ejecución de referencia."""
+    reference = {(r["size"], r["stage"]): r for r in baseline["results"] if r.get("status") == "ok"}
+    flags = []
+    for row in results:
+        base = reference.get((row["size"], row["stage"]))
+        if row.get("status") != "ok" or base is None:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if base.get(metric) and row.get(metric) is not None:
+                ratio = row[metric] / base[metric]
+                row[f"{metric}_ratio"] = ratio
+                if ratio > 1 + tolerance:
+                    flags.append({"size": row["size"], "stage": row["stage"], "metric": metric,
+                                  "baseline": base[metric], "current": row[metric], "ratio": ratio})
+    return flags
+
+
+if __name__ == "__main__":
+    from modeling import candidate_models
+
+    parser = argparse.ArgumentParser(description="Suite de rendimiento con datos sintéticos.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes)
+    parser.add_argument("--models", nargs="+", default=list(candidate_models), choices=list(candidate_models))
+    parser.add_argument("--stages", nargs="+", default=["xls_parse", "consolidation", "encoding", "models"],
+                        choices=["xls_parse", "xls_parse_pandas", "consolidation", "encoding", "models"])
+    parser.add_argument("--baseline", default=os.path.join(results_dir, "baseline.json"),
+                        help="Resultados de referencia para detectar regresiones.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guardar esta ejecución como nueva referencia.")
+    parser.add_argument("--tolerance", type=float, default=default_tolerance)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.models, args.stages)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": results,
+    }
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            report["regressions"] = compare(results, json.load(f), args.tolerance)
+        report["baseline"] = args.baseline
+
+    os.makedirs(results_dir, exist_ok=True)
+    out_path = os.path.join(results_dir, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        shutil.copyfile(out_path, args.baseline)
+
+    print(f"\nResultados guardados en {out_path}")
+    for flag in report.get("regressions", []):
+        print(f"REGRESIÓN {flag['size']:,} filas {flag['stage']} ({flag['metric']}): "
+              f"{flag['baseline']:.3f} -> {flag['current']:.3f} (x{flag['ratio']:.2f})")
+    if report.get("regressions"):
+        raise SystemExit(1)
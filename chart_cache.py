@@ -0,0 +1,97 @@
+import io
+import json
+import threading
+from collections import OrderedDict
+
+# Caché de gráficos ya renderizados (PNG), compartida por todas las sesiones de la
+# aplicación. La clave combina la versión de los datos, el tipo de gráfico y los
+# parámetros (filtros, modelo, umbral...), así que un mismo gráfico se dibuja una
+# sola vez y después se sirve la imagen codificada.
+default_max_bytes = 64 * 1024 * 1024
+default_dpi = 100
+
+
+def chart_key(data_version, chart, **params):
+    """Clave estable de un gráfico: los parámetros se serializan ordenados."""
+    return f"{data_version}|{chart}|{json.dumps(params, sort_keys=True, default=str, ensure_ascii=False)}"
+
+
+class ChartCache:
+    """LRU de imágenes PNG acotada por el tamaño total en bytes."""
+
+    def __init__(self, max_bytes=default_max_bytes, dpi=default_dpi):
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._rendering = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _render(self, render):
+        import matplotlib.pyplot as plt
+
+        fig = render()
+        buffer = io.BytesIO()
+        try:
+            fig.savefig(buffer, format="png", dpi=self.dpi, bbox_inches="tight")
+        finally:
+            plt.close(fig)
+        return buffer.getvalue()
+
+    def get(self, key, render):
+        """Imagen PNG del gráfico; render() devuelve la figura de matplotlib y solo se llama si falta."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self.hits += 1
+                self._images.move_to_end(key)
+                return image
+            # Si otra sesión ya lo está dibujando se espera a ese resultado en lugar de repetirlo
+            pending = self._rendering.get(key)
+            if pending is None:
+                pending = self._rendering[key] = threading.Event()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+
+        if not owner:
+            pending.wait()
+            with self._lock:
+                image = self._images.get(key)
+                if image is not None:
+                    self.hits += 1
+                    return image
+            return self._render(render)
+
+        try:
+            image = self._render(render)
+            with self._lock:
+                self._store(key, image)
+        finally:
+            with self._lock:
+                self._rendering.pop(key).set()
+        return image
+
+    def _store(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        self._images[key] = image
+        self._bytes += len(image)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"images": len(self._images), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
@@ -0,0 +1,132 @@
+import numpy as np
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.metrics import roc_auc_score, accuracy_score
+from sklearn.model_selection import StratifiedKFold, StratifiedGroupKFold, train_test_split
+from modeling import make_model, fit_input, supports_early_stopping, xgb_max_estimators
+from ingestion import peak_rss_mb, reset_peak_rss
+
+# Matriz de diseño compartida por cada proceso trabajador (se envía una sola vez por proceso)
+_shared = {}
+
+
+def init_worker(X, y):
+    _shared["X"] = X
+    _shared["y"] = y
+
+
+def shared_data():
+    """X e y del proceso actual (fijados por init_worker)."""
+    return _shared["X"], _shared["y"]
+
+
+def fit_with_early_stopping(model, X, y, train_idx, early_stopping_rounds, seed):
+    """Ajustar XGBoost reservando un 10% estratificado del entrenamiento para la parada temprana."""
+    fit_idx, stop_idx = train_test_split(train_idx, test_size=0.1, random_state=seed,
+                                         stratify=y[train_idx])
+    model.set_params(n_estimators=xgb_max_estimators, early_stopping_rounds=early_stopping_rounds)
+    model.fit(X[fit_idx], y[fit_idx], eval_set=[(X[stop_idx], y[stop_idx])], verbose=False)
+    return model.best_iteration
+
+
+def run_fold(task):
+    """Entrenar y evaluar un modelo en un pliegue (se ejecuta en un proceso trabajador)."""
+    X, y = shared_data()
+    name, strategy, fold, train_idx, val_idx, params, threads, early_stopping_rounds = task
+    # Un trabajador ejecuta varios pliegues: el pico se mide desde el inicio de este
+    reset_peak_rss()
+    model = make_model(name, params, n_jobs=threads)
+
+    start = time.perf_counter()
+    best_iteration = None
+    if early_stopping_rounds and supports_early_stopping(name):
+        best_iteration = fit_with_early_stopping(model, X, y, train_idx, early_stopping_rounds, seed=fold)
+    else:
+        model.fit(fit_input(name, X[train_idx]), y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_proba = model.predict_proba(X[val_idx])[:, 1]
+    predict_seconds = time.perf_counter() - start
+
+    return {
+        "model": name,
+        "strategy": strategy,
+        "fold": fold,
+        "n_train": int(len(train_idx)),
+        "n_val": int(len(val_idx)),
+        "AUC": float(roc_auc_score(y[val_idx], y_proba)),
+        "Accuracy": float(accuracy_score(y[val_idx], y_proba >= 0.5)),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "best_iteration": best_iteration,
+        "worker_pid": os.getpid(),
+    }
+
+
+def make_folds(y, groups=None, strategy="stratified", n_splits=5, random_state=42):
+    """Índices (entrenamiento, validación) de cada pliegue.
+
+    strategy="grouped" mantiene a cada estudiante en un solo pliegue, de modo que
+    el modelo se valida con estudiantes que no vio al entrenar.
+    """
+    if strategy == "grouped":
+        splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        return list(splitter.split(np.zeros(len(y)), y, groups))
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+
+def cross_validate(X, y, model_names, groups=None, strategies=("stratified", "grouped"), n_splits=5,
+                   cores=None, params=None, early_stopping_rounds=25, random_state=42):
+    """Validación cruzada de todos los modelos en paralelo sobre una misma matriz X.
+
+    Cada (modelo, estrategia, pliegue) es una tarea del pool; cores limita el
+    total de núcleos usados (un hilo por tarea). Devuelve las métricas por
+    pliegue y un resumen por modelo y estrategia.
+    """
+    cores = cores or os.cpu_count() or 1
+    params = params or {}
+    tasks = []
+    for strategy in strategies:
+        folds = make_folds(y, groups, strategy, n_splits, random_state)
+        for fold, (train_idx, val_idx) in enumerate(folds):
+            for name in model_names:
+                tasks.append((name, strategy, fold, train_idx, val_idx, params.get(name),
+                              1, early_stopping_rounds))
+
+    # Primero las tareas más costosas para equilibrar la carga entre procesos
+    cost = {"Random Forest": 0, "XGBoost": 1}
+    tasks.sort(key=lambda task: cost.get(task[0], 2))
+
+    start = time.perf_counter()
+    workers = min(cores, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(X, y)) as executor:
+            fold_results = list(executor.map(run_fold, tasks))
+    else:
+        init_worker(X, y)
+        fold_results = [run_fold(task) for task in tasks]
+    wall_seconds = time.perf_counter() - start
+
+    summary = {}
+    for name in model_names:
+        summary[name] = {}
+        for strategy in strategies:
+            rows = [r for r in fold_results if r["model"] == name and r["strategy"] == strategy]
+            rows.sort(key=lambda r: r["fold"])
+            aucs = np.array([r["AUC"] for r in rows])
+            iterations = [r["best_iteration"] for r in rows if r["best_iteration"] is not None]
+            summary[name][strategy] = {
+                "AUC_mean": float(aucs.mean()),
+                "AUC_std": float(aucs.std()),
+                "fit_seconds_total": float(sum(r["fit_seconds"] for r in rows)),
+                "peak_rss_mb_max": float(max(r["peak_rss_mb"] for r in rows)),
+                "best_iteration_median": int(np.median(iterations)) if iterations else None,
+                "folds": rows,
+            }
+    return summary, {"workers": workers, "cores": cores, "n_splits": n_splits,
+                     "strategies": list(strategies), "wall_seconds": wall_seconds,
+                     "early_stopping_rounds": early_stopping_rounds}
@@ -0,0 +1,186 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pds
+import pyarrow.parquet as pq
+import hashlib
+import os
+import shutil
+from dimensions import dimension_columns, dimension_specs, decode_keys
+
+# Almacén columnar del dataset maestro: un directorio Parquet particionado por Periodo
+store_dir = "academic_store"
+
+# Columnas de texto que se guardan como categóricas (diccionario de valores)
+categorical_columns = [
+    "Periodo", "Paralelo", "Identificacion_Estudiante", "Estudiante", "Carrera",
+    "Nivel", "Asignatura", "Estado_Asignatura", "Estado_Matricula", "Tipo_Ingreso",
+    "Cedula_docente", "Nombre_docente"
+]
+
+# Columnas numéricas con tipos compactos
+numeric_dtypes = {
+    "Num_matricula": "int8",
+    "Asistencia": "float32",
+    "Nota_final": "float32",
+}
+
+
+def to_typed_frame(df, require_grade=True):
+    """Convertir el DataFrame consolidado (texto) a los tipos del almacén.
+
+    Con require_grade=False se conservan las filas sin Nota_final.
+    """
+    df = df.copy()
+    df['Asistencia'] = pd.to_numeric(df['Asistencia'], errors='coerce')
+    df['Nota_final'] = pd.to_numeric(df['Nota_final'], errors='coerce')
+    df['Num_matricula'] = pd.to_numeric(df['Num_matricula'], errors='coerce')
+
+    # El número de matrícula siempre viene informado; si no es numérico la fila no es válida
+    df = df.dropna(subset=['Num_matricula', 'Nota_final'] if require_grade else ['Num_matricula'])
+
+    for col, dtype in numeric_dtypes.items():
+        df[col] = df[col].astype(dtype)
+    # En la tabla de hechos las columnas de las dimensiones ya son claves enteras
+    for col in categorical_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df.reset_index(drop=True)
+
+
+def write_store(df, path=store_dir):
+    """Escribir el dataset tipado en Parquet, una partición por Periodo.
+
+    Se escribe en un directorio temporal y luego se reemplaza el anterior para
+    que los lectores nunca vean un almacén a medio escribir.
+    """
+    typed = to_typed_frame(df)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+
+    write_partitions(typed, tmp_path)
+
+    # El almacén anterior se aparta con un rename y se borra después del reemplazo:
+    # el directorio solo falta entre dos renombres, no mientras se borra el anterior
+    old_path = path + ".old"
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+    return typed
+
+
+def write_partitions(typed, path, file_name="part-0.parquet"):
+    """Escribir un DataFrame tipado en el diseño del almacén (un directorio por Periodo).
+
+    Cada archivo guarda solo las categorías presentes en su partición, así los
+    diccionarios no crecen con el total de estudiantes o docentes del dataset.
+    """
+    for periodo, part in typed.groupby("Periodo", observed=True, sort=True):
+        part = part.drop(columns="Periodo")
+        for col in part.columns:
+            if isinstance(part[col].dtype, pd.CategoricalDtype):
+                part[col] = part[col].cat.remove_unused_categories()
+        partition_dir = os.path.join(path, f"Periodo={periodo}")
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False),
+                       os.path.join(partition_dir, file_name))
+
+
+def store_columns(path=store_dir):
+    """Columnas del almacén (incluida la de partición) leyendo solo el esquema."""
+    return pds.dataset(path, format="parquet", partitioning="hive").schema.names
+
+
+def list_periods(path=store_dir):
+    """Listar los periodos disponibles sin leer ningún dato."""
+    prefix = "Periodo="
+    return sorted(name[len(prefix):] for name in os.listdir(path) if name.startswith(prefix))
+
+
+def _key_projection(columns, path):
+    """Columnas a leer del almacén y columnas de texto que se reconstruyen desde las dimensiones.
+
+    Una columna de texto que el almacén no guarda (por ejemplo Carrera) se lee
+    como su clave entera (Id_Carrera) y se decodifica después de la lectura.
+    """
+    if columns is None:
+        return None, []
+    stored = set(store_columns(path))
+    read, decoded = [], []
+    for col in columns:
+        if col not in stored and col in dimension_columns:
+            key = dimension_specs[dimension_columns[col]][0]
+            if key in stored:
+                decoded.append(col)
+                col = key
+        read.append(col)
+    return list(dict.fromkeys(read)), decoded
+
+
+def load_master(columns=None, periodos=None, path=store_dir):
+    """Cargar el dataset maestro desde el almacén columnar.
+
+    columns: lista de columnas a leer (proyección); None lee todas las
+    guardadas (las dimensiones, como claves enteras). Las columnas de texto de
+    las dimensiones se pueden pedir por nombre y se reconstruyen desde sus claves.
+    periodos: lista de periodos a incluir; None incluye todos. Solo se abren
+    las particiones de esos periodos.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No existe el almacén {path}. Ejecuta primero process_data.py."
+        )
+
+    read, decoded = _key_projection(columns, path)
+    filters = [("Periodo", "in", list(periodos))] if periodos is not None else None
+    table = pq.read_table(path, columns=read, filters=filters)
+    df = table.to_pandas()
+    if decoded:
+        df = decode_keys(df, decoded)[columns]
+
+    # Las categorías de las particiones no leídas no deben aparecer (por ejemplo, en get_dummies)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def iter_master_batches(columns=None, periodos=None, batch_size=50000, path=store_dir):
+    """Recorrer el almacén por bloques de a lo sumo batch_size filas.
+
+    Permite procesar el dataset completo con memoria acotada: solo un bloque
+    está en memoria a la vez.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No existe el almacén {path}. Ejecuta primero process_data.py."
+        )
+    read, decoded = _key_projection(columns, path)
+    # Las dimensiones se leen una sola vez para todos los bloques
+    tables = {}
+    dataset = pds.dataset(path, format="parquet", partitioning="hive")
+    row_filter = pds.field("Periodo").isin(list(periodos)) if periodos is not None else None
+    for batch in dataset.to_batches(columns=read, filter=row_filter, batch_size=batch_size):
+        if batch.num_rows:
+            df = batch.to_pandas()
+            yield decode_keys(df, decoded, tables)[columns] if decoded else df
+
+
+def data_fingerprint(path=store_dir):
+    """Huella del contenido del almacén (hash de todos sus archivos Parquet)."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            file_digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    file_digest.update(block)
+            digest.update(file_digest.digest())
+    return digest.hexdigest()
@@ -0,0 +1,141 @@
+import pandas as pd
+import numpy as np
+import os
+
+# Tablas de dimensiones con claves enteras estables entre ejecuciones.
+# Una vez asignada, la clave de un estudiante, carrera, asignatura o docente no
+# cambia aunque se agreguen o quiten exportaciones; los valores nuevos reciben
+# claves a continuación de la mayor ya usada.
+dimensions_dir = "dimensions"
+
+# nombre -> (columna de la clave, columna natural, atributos descriptivos)
+dimension_specs = {
+    "estudiante": ("Id_Estudiante", "Identificacion_Estudiante", ["Estudiante"]),
+    "carrera": ("Id_Carrera", "Carrera", []),
+    "asignatura": ("Id_Asignatura", "Asignatura", []),
+    # La cédula del docente falta en parte de las filas; el nombre siempre viene informado
+    "docente": ("Id_Docente", "Nombre_docente", ["Cedula_docente"]),
+}
+key_columns = [key for key, _, _ in dimension_specs.values()]
+# Columnas de texto que viven solo en las dimensiones (natural y atributos) -> nombre de la dimensión
+dimension_columns = {col: name for name, (_, natural, attributes) in dimension_specs.items()
+                     for col in [natural] + attributes}
+
+# Valor de la clave cuando la columna natural está vacía
+missing_key = -1
+
+
+def _dimension_path(name, path=dimensions_dir):
+    return os.path.join(path, f"{name}.parquet")
+
+
+def load_dimension(name, path=dimensions_dir):
+    """Tabla de una dimensión (clave, valor natural y atributos); vacía si no existe."""
+    key, natural, attributes = dimension_specs[name]
+    file_path = _dimension_path(name, path)
+    if not os.path.exists(file_path):
+        return pd.DataFrame({key: pd.Series(dtype="int32"), natural: pd.Series(dtype=object),
+                             **{col: pd.Series(dtype=object) for col in attributes}})
+    return pd.read_parquet(file_path)
+
+
+def load_dimensions(path=dimensions_dir):
+    """Todas las tablas de dimensiones, por nombre."""
+    return {name: load_dimension(name, path) for name in dimension_specs}
+
+
+def key_labels(key, path=dimensions_dir):
+    """Valor natural de cada clave (Serie indexada por la clave entera)."""
+    name = next(name for name, spec in dimension_specs.items() if spec[0] == key)
+    _, natural, _ = dimension_specs[name]
+    table = load_dimension(name, path)
+    return pd.Series(table[natural].to_numpy(), index=table[key].to_numpy(), name=natural)
+
+
+def _distinct(df, natural, attributes):
+    """Valores distintos de la columna natural con el último valor visto de cada atributo."""
+    columns = [natural] + [col for col in attributes if col in df.columns]
+    values = pd.DataFrame({col: df[col].astype(object).to_numpy() for col in columns})
+    values = values.dropna(subset=[natural])
+    values[natural] = values[natural].astype(str)
+    return values.drop_duplicates(natural, keep="last")
+
+
+def update_dimensions(df, path=dimensions_dir):
+    """Agregar a las dimensiones los valores nuevos de df y guardarlas.
+
+    Las claves existentes se conservan; los valores nuevos se numeran en orden
+    alfabético para que el resultado no dependa del orden de las filas.
+    """
+    os.makedirs(path, exist_ok=True)
+    tables = {}
+    for name, (key, natural, attributes) in dimension_specs.items():
+        table = load_dimension(name, path)
+        seen = _distinct(df, natural, attributes)
+        new_values = np.sort(np.setdiff1d(seen[natural].to_numpy(dtype=object),
+                                          table[natural].to_numpy(dtype=object)))
+        start = int(table[key].max()) + 1 if len(table) else 0
+        new_rows = pd.DataFrame({key: np.arange(start, start + len(new_values), dtype=np.int32),
+                                 natural: new_values})
+        table = pd.concat([table, new_rows], ignore_index=True)
+
+        # Atributos descriptivos: se actualizan con el último valor informado
+        for col in attributes:
+            if col in seen.columns:
+                latest = seen.set_index(natural)[col].dropna()
+                current = table[natural].map(latest)
+                table[col] = current.where(current.notna(), table[col])
+        table[key] = table[key].astype(np.int32)
+
+        tmp_path = _dimension_path(name, path) + ".tmp"
+        table.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, _dimension_path(name, path))
+        tables[name] = table
+    return tables
+
+
+def add_keys(df, tables, names=None):
+    """Agregar a df las columnas de clave entera (int32) de cada dimensión (o solo de names).
+
+    El mapeo se hace sobre las categorías y luego se indexa con los códigos,
+    sin comparar un texto por fila.
+    """
+    for name in names or dimension_specs:
+        key, natural, _ = dimension_specs[name]
+        mapping = pd.Series(tables[name][key].to_numpy(), index=tables[name][natural].to_numpy())
+        values = df[natural]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype("category")
+        category_keys = mapping.reindex(values.cat.categories.astype(str)).fillna(missing_key)
+        # El código -1 (faltante) toma el último elemento, que es missing_key
+        category_keys = np.append(category_keys.to_numpy(dtype=np.int32), np.int32(missing_key))
+        df[key] = category_keys[values.cat.codes.to_numpy()]
+    return df
+
+
+def to_fact_frame(df, tables):
+    """Reemplazar las columnas de texto de las dimensiones por sus claves enteras."""
+    df = add_keys(df, tables)
+    return df.drop(columns=[col for col in dimension_columns if col in df.columns])
+
+
+def decode_keys(df, columns, tables=None, path=dimensions_dir):
+    """Agregar a df las columnas de texto pedidas a partir de las claves enteras.
+
+    Cada columna se arma como categórica indexando con las claves un arreglo de
+    códigos de la dimensión, sin comparar textos por fila.
+    """
+    tables = tables if tables is not None else {}
+    for col in columns:
+        name = dimension_columns[col]
+        key = dimension_specs[name][0]
+        if name not in tables:
+            tables[name] = load_dimension(name, path)
+        table = tables[name]
+        codes, categories = pd.factorize(table[col])
+        size = int(table[key].max()) + 1 if len(table) else 0
+        # La última posición queda en -1: las claves faltantes (missing_key) indexan ahí
+        lookup = np.full(size + 1, -1, dtype=np.int32)
+        lookup[table[key].to_numpy()] = codes
+        df[col] = pd.Categorical.from_codes(lookup[df[key].to_numpy()], categories=categories)
+    return df
@@ -0,0 +1,320 @@
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import os
+
+# Monitor de deriva y calidad de datos por archivo exportado.
+# Cada archivo se resume una sola vez (perfil guardado por hash de contenido):
+# frecuencias de categorías, histogramas de Asistencia y Nota_final, nulos y
+# conteos de la lectura (matrículas descartadas, textos convertidos a NaN).
+# Los perfiles son conteos aditivos: el perfil de los datos de entrenamiento es
+# la suma de los perfiles de sus archivos. Cada archivo se compara con ese
+# perfil (PSI y KS) y el resultado se guarda por (archivo, versión del modelo).
+drift_dir = "drift_monitor"
+profiles_dir = os.path.join(drift_dir, "profiles")
+results_path = os.path.join(drift_dir, "results.json")
+
+category_columns = ["Carrera", "Tipo_Ingreso", "Periodo", "Num_matricula"]
+# Intervalos finos (1 punto de asistencia, 0.1 de nota) para que el KS sobre el histograma sea cercano al exacto
+histogram_edges = {
+    "Asistencia": np.linspace(0, 100, 101),
+    "Nota_final": np.linspace(0, 10, 101),
+}
+null_columns = ["Asistencia", "Nota_final", "Num_matricula", "Tipo_Ingreso", "Carrera", "Periodo",
+                "Identificacion_Estudiante", "Asignatura", "Paralelo", "Cedula_docente"]
+
+# El PSI de las variables numéricas se calcula sobre intervalos 10 veces más anchos
+# (10 puntos de asistencia, 1 punto de nota): con intervalos finos casi vacíos se infla
+psi_bin_group = 10
+
+# Variables comparadas con PSI (Periodo cambia en cada exportación: solo se revisa si es nuevo)
+psi_columns = ["Carrera", "Tipo_Ingreso", "Num_matricula", "Asistencia", "Nota_final"]
+ks_columns = ["Asistencia", "Nota_final"]
+
+# Umbrales habituales: PSI 0.1-0.2 cambio moderado, > 0.2 cambio importante
+psi_warning = 0.1
+psi_alert = 0.2
+ks_alert = 0.1
+# Aumento de la tasa de nulos (puntos porcentuales) frente al entrenamiento
+null_rate_tolerance = 0.05
+# Fracción de matrículas descartadas o valores convertidos que se considera anómala
+quality_tolerance = 0.02
+psi_epsilon = 1e-4
+
+
+def _category_key(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _histogram(values, edges):
+    """Conteos por intervalo con desborde: [< mínimo, intervalos..., > máximo]."""
+    values = values[~np.isnan(values)]
+    index = np.searchsorted(edges, values, side="right")
+    index[values == edges[-1]] = len(edges) - 1
+    return np.bincount(index, minlength=len(edges) + 1)
+
+
+def profile_frame(df, quality=None):
+    """Perfil aditivo de un archivo (DataFrame de texto tal como lo deja la ingesta)."""
+    profile = {"rows": int(len(df)), "nulls": {}, "categories": {}, "histograms": {}, "quality": quality}
+    for col in null_columns:
+        profile["nulls"][col] = int(df[col].isna().sum())
+    for col in category_columns:
+        counts = df[col].value_counts(dropna=True, sort=False)
+        profile["categories"][col] = {}
+        for value, count in counts.items():
+            if count:
+                key = _category_key(value)
+                profile["categories"][col][key] = profile["categories"][col].get(key, 0) + int(count)
+    for col, edges in histogram_edges.items():
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        profile["histograms"][col] = _histogram(values, edges).tolist()
+    return profile
+
+
+def merge_profiles(profiles):
+    """Suma de perfiles (los conteos de calidad solo si todos los archivos los tienen)."""
+    merged = {"rows": 0, "nulls": {}, "categories": {col: {} for col in category_columns},
+              "histograms": {col: np.zeros(len(edges) + 1, dtype=np.int64) for col, edges in histogram_edges.items()},
+              "quality": {"dropped_no_grade": 0, "dropped_text_grade": 0, "coerced": {}}}
+    for profile in profiles:
+        merged["rows"] += profile["rows"]
+        for col, n in profile["nulls"].items():
+            merged["nulls"][col] = merged["nulls"].get(col, 0) + n
+        for col, counts in profile["categories"].items():
+            for value, n in counts.items():
+                merged["categories"][col][value] = merged["categories"][col].get(value, 0) + n
+        for col, counts in profile["histograms"].items():
+            merged["histograms"][col] += np.asarray(counts)
+        quality = profile.get("quality")
+        if quality is None or merged["quality"] is None:
+            merged["quality"] = None
+            continue
+        merged["quality"]["dropped_no_grade"] += quality["dropped_no_grade"]
+        merged["quality"]["dropped_text_grade"] += quality["dropped_text_grade"]
+        for col, n in quality["coerced"].items():
+            merged["quality"]["coerced"][col] = merged["quality"]["coerced"].get(col, 0) + n
+    merged["histograms"] = {col: counts.tolist() for col, counts in merged["histograms"].items()}
+    return merged
+
+
+def _write_json(data, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_profiles(manifest, load_part):
+    """Perfil de cada archivo del manifiesto; solo se calculan los que faltan.
+
+    Los archivos ingeridos antes de que existieran los conteos de calidad se
+    vuelven a leer una vez para obtenerlos.
+    """
+    from ingestion import parse_workbook
+
+    os.makedirs(profiles_dir, exist_ok=True)
+    profiles = {}
+    for path, entry in manifest.items():
+        profile_path = os.path.join(profiles_dir, f"{entry['sha256']}.json")
+        profile = _read_json(profile_path)
+        if profile is None:
+            quality = entry.get("quality")
+            if quality is None and os.path.exists(path):
+                quality = {}
+                df = parse_workbook(path, quality=quality)
+            else:
+                df = load_part(entry)
+            profile = profile_frame(df, quality)
+            _write_json(profile, profile_path)
+        profiles[path] = profile
+    return profiles
+
+
+def reference_path(version):
+    return os.path.join(drift_dir, f"reference_{version}.json")
+
+
+def save_reference(registry, manifest, load_part):
+    """Perfil de los datos de entrenamiento de una versión: suma de los perfiles de sus archivos.
+
+    Se llama al publicar; para versiones anteriores se crea la primera vez que
+    se necesita y se marca como inexacto si el almacén cambió desde entonces.
+    """
+    from data_store import data_fingerprint
+
+    profiles = update_profiles(manifest, load_part)
+    reference = merge_profiles(profiles.values())
+    reference["version"] = registry.version
+    reference["files"] = [entry["sha256"] for entry in manifest.values()]
+    reference["exact"] = data_fingerprint() == registry.metadata.get("data_fingerprint")
+    _write_json(reference, reference_path(registry.version))
+    return reference
+
+
+def load_reference(registry, manifest, load_part):
+    reference = _read_json(reference_path(registry.version))
+    if reference is None:
+        reference = save_reference(registry, manifest, load_part)
+        if not reference["exact"]:
+            print(f"Aviso: los datos cambiaron desde la publicación de {registry.version}; "
+                  f"el perfil de entrenamiento se aproxima con los archivos actuales.")
+    return reference
+
+
+def _coarse(counts):
+    """Histograma fino -> intervalos de psi_bin_group, conservando los de desborde."""
+    counts = np.asarray(counts)
+    inner = counts[1:-1].reshape(-1, psi_bin_group).sum(axis=1)
+    return np.r_[counts[0], inner, counts[-1]]
+
+
+def _share(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    return counts / total if total else counts
+
+
+def _distribution(counts, keys):
+    """Proporciones de un dict de conteos en el orden de keys."""
+    return _share([counts.get(key, 0) for key in keys])
+
+
+def psi(expected, actual):
+    """Índice de estabilidad poblacional entre dos distribuciones (con suavizado de ceros)."""
+    expected = np.maximum(expected, psi_epsilon)
+    actual = np.maximum(actual, psi_epsilon)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected, actual):
+    """Estadístico KS: máxima distancia entre las distribuciones acumuladas del histograma."""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def compare(profile, reference, vocabulary):
+    """Métricas de deriva y calidad de un archivo frente al perfil de entrenamiento."""
+    result = {"rows": profile["rows"], "psi": {}, "ks": {}, "unseen": {}, "null_rate": {},
+              "null_rate_reference": {}, "out_of_range": {}, "quality": {}, "alerts": []}
+    alerts = result["alerts"]
+
+    for col in psi_columns:
+        if not profile["rows"]:
+            continue
+        if col in histogram_edges:
+            expected = _share(_coarse(reference["histograms"][col]))
+            actual = _share(_coarse(profile["histograms"][col]))
+            if col in ks_columns:
+                result["ks"][col] = ks(_share(reference["histograms"][col]), _share(profile["histograms"][col]))
+        else:
+            keys = sorted(set(reference["categories"][col]) | set(profile["categories"][col]))
+            expected = _distribution(reference["categories"][col], keys)
+            actual = _distribution(profile["categories"][col], keys)
+        value = result["psi"][col] = psi(expected, actual)
+        if value > psi_alert:
+            alerts.append(f"{col}: cambio importante de distribución (PSI {value:.2f})")
+        elif value > psi_warning:
+            alerts.append(f"{col}: cambio moderado de distribución (PSI {value:.2f})")
+    for col, value in result["ks"].items():
+        if value > ks_alert and result["psi"][col] <= psi_warning:
+            alerts.append(f"{col}: distribución acumulada distinta (KS {value:.2f})")
+
+    # Categorías que el modelo no conoce: se codifican como la categoría de referencia
+    for col, known in vocabulary.items():
+        known = set(known)
+        unseen = {value: n for value, n in profile["categories"].get(col, {}).items() if value not in known}
+        if unseen:
+            result["unseen"][col] = unseen
+            alerts.append(f"{col}: {len(unseen)} valor(es) no vistos en el entrenamiento "
+                          f"({sum(unseen.values())} matrículas)")
+
+    for col in histogram_edges:
+        counts = profile["histograms"][col]
+        result["out_of_range"][col] = int(counts[0] + counts[-1])
+        if result["out_of_range"][col]:
+            alerts.append(f"{col}: {result['out_of_range'][col]} valor(es) fuera de rango")
+
+    for col in null_columns:
+        rate = profile["nulls"][col] / profile["rows"] if profile["rows"] else 0.0
+        reference_rate = reference["nulls"][col] / reference["rows"] if reference["rows"] else 0.0
+        result["null_rate"][col] = rate
+        result["null_rate_reference"][col] = reference_rate
+        if rate > reference_rate + null_rate_tolerance:
+            alerts.append(f"{col}: {rate:.1%} de nulos (entrenamiento: {reference_rate:.1%})")
+
+    quality = profile.get("quality")
+    if quality is not None:
+        enrolled = profile["rows"] + quality["dropped_no_grade"] + quality["dropped_text_grade"]
+        result["quality"] = dict(quality, dropped_rate=(quality["dropped_no_grade"] + quality["dropped_text_grade"])
+                                 / enrolled if enrolled else 0.0)
+        if quality["dropped_text_grade"]:
+            alerts.append(f"Nota_final: {quality['dropped_text_grade']} matrícula(s) descartadas por nota no numérica")
+        if result["quality"]["dropped_rate"] > quality_tolerance:
+            alerts.append(f"{result['quality']['dropped_rate']:.1%} de las matrículas se descartaron por no tener nota numérica")
+        for col, n in quality["coerced"].items():
+            if n:
+                alerts.append(f"{col}: {n} texto(s) no numéricos convertidos a vacío")
+    return result
+
+
+def check_exports(manifest, load_part, version=None, recheck=False):
+    """Comparar cada archivo del manifiesto con los datos de entrenamiento de una versión.
+
+    Los resultados se guardan por (hash del archivo, versión): en ejecuciones
+    posteriores solo se calculan los archivos nuevos o modificados.
+    """
+    from model_registry import RegisteredVersion
+
+    registry = RegisteredVersion(version)
+    vocabulary = registry.encoder.vocabulary_
+    stored = {} if recheck else _read_json(results_path, {})
+    profiles = update_profiles(manifest, load_part)
+    reference = None
+
+    results = []
+    for path, entry in manifest.items():
+        key = f"{entry['sha256']}:{registry.version}"
+        result = stored.get(key)
+        if result is None:
+            if reference is None:
+                reference = load_reference(registry, manifest, load_part)
+            result = compare(profiles[path], reference, vocabulary)
+            result["in_training"] = entry["sha256"] in reference["files"]
+            stored[key] = result
+        results.append(dict(result, file=path, version=registry.version))
+    os.makedirs(drift_dir, exist_ok=True)
+    _write_json(stored, results_path)
+    return results
+
+
+if __name__ == "__main__":
+    from ingestion import load_manifest, load_part
+
+    parser = argparse.ArgumentParser(description="Deriva y calidad de cada archivo frente a los datos de entrenamiento.")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    parser.add_argument("--all", action="store_true", help="Mostrar también los archivos sin alertas.")
+    parser.add_argument("--recheck", action="store_true", help="Recalcular las comparaciones guardadas.")
+    args = parser.parse_args()
+
+    results = check_exports(load_manifest(), load_part, version=args.version, recheck=args.recheck)
+    with_alerts = [r for r in results if r["alerts"]]
+    print(f"{len(results)} archivos revisados frente a la versión {results[0]['version'] if results else '-'}; "
+          f"{len(with_alerts)} con alertas")
+    for result in results if args.all else with_alerts:
+        psi_max = max(result["psi"].items(), key=lambda item: item[1], default=("-", 0.0))
+        origin = "entrenamiento" if result["in_training"] else "nuevo"
+        print(f"\n{os.path.basename(result['file'])} ({result['rows']} filas, {origin}); "
+              f"PSI máximo {psi_max[1]:.3f} ({psi_max[0]}); "
+              + ", ".join(f"KS {col} {value:.3f}" for col, value in result["ks"].items()))
+        for alert in result["alerts"]:
+            print(f"  - {alert}")
@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+from data_store import to_typed_frame
+from ingestion import parse_workbook
+from model_registry import RegisteredVersion
+from batch_score import positive_proba
+
+# Alerta temprana: puntuar las matrículas activas a mitad de semestre con la
+# exportación parcial del MAESTRO DE NOTAS (asistencia a la fecha, sin nota final).
+# Cada exportación se compara con la instantánea anterior y solo se vuelven a
+# puntuar las matrículas cuyas variables de entrada cambiaron.
+warning_dir = "early_warning"
+snapshot_path = os.path.join(warning_dir, "snapshot.parquet")
+ranking_path = os.path.join(warning_dir, "ranking.csv")
+
+# Una matrícula se identifica por estas columnas (más su orden de aparición,
+# porque la exportación puede repetir la misma combinación)
+key_columns = ["Periodo", "Paralelo", "Identificacion_Estudiante", "Asignatura"]
+info_columns = ["Estudiante", "Carrera", "Nivel"]
+
+# Riesgo (1 - probabilidad de aprobar) a partir del cual una matrícula se marca en alerta
+risk_threshold = 0.5
+
+
+def load_export(file_path):
+    """Leer una exportación parcial (.xls del MAESTRO DE NOTAS, .parquet o .csv)."""
+    if file_path.endswith(".xls"):
+        df = parse_workbook(file_path, require_grade=False)
+    elif file_path.endswith(".parquet"):
+        df = pd.read_parquet(file_path)
+    else:
+        df = pd.read_csv(file_path, dtype=str)
+    return to_typed_frame(df, require_grade=False)
+
+
+def enrollment_frame(df, encoder):
+    """Matrículas con su clave, las columnas de entrada del modelo y la huella de esas entradas."""
+    inputs = list(dict.fromkeys(encoder.numeric + encoder.categorical))
+    columns = list(dict.fromkeys(key_columns + info_columns + inputs))
+    frame = pd.DataFrame({col: df[col].astype(str) if col not in encoder.numeric else df[col]
+                          for col in columns})
+    frame["Ocurrencia"] = frame.groupby(key_columns, sort=False).cumcount()
+    frame["Huella"] = pd.util.hash_pandas_object(frame[inputs], index=False).to_numpy()
+    return frame
+
+
+def load_snapshot(path=snapshot_path):
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def diff_snapshot(current, previous, version):
+    """Separar las matrículas en nuevas o modificadas (a puntuar) y sin cambios (se reutiliza el puntaje).
+
+    Devuelve las posiciones a puntuar, los puntajes reutilizados y cuántas
+    matrículas de la instantánea anterior ya no aparecen. Si la instantánea se
+    puntuó con otra versión del modelo se vuelve a puntuar todo.
+    """
+    keys = key_columns + ["Ocurrencia"]
+    if previous is None or (previous["Version"] != version).any():
+        removed = 0 if previous is None else len(previous)
+        return current.index.to_numpy(), pd.Series(np.nan, index=current.index), removed
+    merged = current[keys + ["Huella"]].merge(
+        previous[keys + ["Huella", "Prob_Aprobacion"]], on=keys, how="left", suffixes=("", "_anterior"))
+    merged.index = current.index
+    unchanged = merged["Huella"] == merged["Huella_anterior"]
+    reused = merged["Prob_Aprobacion"].where(unchanged)
+    removed = len(previous) - int(merged["Huella_anterior"].notna().sum())
+    return current.index[~unchanged.to_numpy()].to_numpy(), reused, removed
+
+
+def rank_students(scored, threshold=risk_threshold):
+    """Lista de estudiantes en riesgo por Carrera y Paralelo, de mayor a menor riesgo.
+
+    El riesgo de un estudiante en un paralelo es el de su asignatura más comprometida.
+    """
+    scored = scored.dropna(subset=["Riesgo"])
+    students = scored.groupby(["Carrera", "Paralelo", "Identificacion_Estudiante"], sort=False, observed=True).agg(
+        Estudiante=("Estudiante", "first"),
+        Nivel=("Nivel", "first"),
+        Riesgo_max=("Riesgo", "max"),
+        Riesgo_medio=("Riesgo", "mean"),
+        Asignaturas=("Riesgo", "size"),
+        Asignaturas_en_riesgo=("Riesgo", lambda risk: int((risk >= threshold).sum())),
+        Asistencia_media=("Asistencia", "mean"),
+    ).reset_index()
+    students = students.sort_values(["Carrera", "Paralelo", "Riesgo_max", "Riesgo_medio"],
+                                    ascending=[True, True, False, False])
+    students["Posicion"] = students.groupby(["Carrera", "Paralelo"], sort=False).cumcount() + 1
+    return students[students["Asignaturas_en_riesgo"] > 0].reset_index(drop=True)
+
+
+def run(export_paths, model_name=None, version=None, full=False, threshold=risk_threshold):
+    """Puntuar una exportación parcial y actualizar la instantánea y la lista de alertas."""
+    start = time.perf_counter()
+    registry = RegisteredVersion(version)
+    model_name = model_name or registry.best_model_name
+    encoder = registry.encoder
+    stamp = f"{registry.version}/{model_name}"
+
+    df = pd.concat([load_export(path) for path in export_paths], ignore_index=True)
+    current = enrollment_frame(df, encoder)
+    previous = None if full else load_snapshot()
+    to_score, proba, removed = diff_snapshot(current, previous, stamp)
+
+    # Sin asistencia registrada todavía no hay puntaje (igual que en batch_score.py)
+    valid = np.zeros(len(current), dtype=bool)
+    valid[to_score] = True
+    valid &= encoder.valid_mask(current)
+    if valid.any():
+        model = registry.model(model_name)
+        proba[valid] = positive_proba(model, encoder.transform(current.loc[valid]))
+
+    current["Prob_Aprobacion"] = proba.astype(np.float32)
+    current["Riesgo"] = 1 - current["Prob_Aprobacion"]
+    current["Version"] = stamp
+    os.makedirs(warning_dir, exist_ok=True)
+    current.to_parquet(f"{snapshot_path}.tmp", index=False)
+    os.replace(f"{snapshot_path}.tmp", snapshot_path)
+
+    ranking = rank_students(current, threshold)
+    ranking.to_csv(ranking_path, index=False)
+    return {
+        "rows": len(current),
+        "rescored": int(len(to_score)),
+        "scored": int(valid.sum()),
+        "removed": removed,
+        "students_at_risk": len(ranking),
+        "seconds": time.perf_counter() - start,
+        "model": model_name,
+        "version": registry.version,
+        "ranking": ranking,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alerta temprana con exportaciones parciales del MAESTRO DE NOTAS.")
+    parser.add_argument("exports", nargs="+", help="Archivos de la exportación parcial (.xls, .parquet o .csv).")
+    parser.add_argument("--model", default=None, help="Modelo del registro (por defecto, el mejor).")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    parser.add_argument("--threshold", type=float, default=risk_threshold, help="Riesgo mínimo para la alerta.")
+    parser.add_argument("--full", action="store_true", help="Ignorar la instantánea anterior y puntuar todo.")
+    parser.add_argument("--top", type=int, default=5, help="Estudiantes a mostrar por Carrera y Paralelo.")
+    args = parser.parse_args()
+
+    stats = run(args.exports, args.model, args.version, args.full, args.threshold)
+    print(f"Modelo: {stats['model']} (versión {stats['version']})")
+    print(f"Matrículas activas: {stats['rows']}; nuevas o modificadas: {stats['rescored']} "
+          f"(puntuadas {stats['scored']}); retiradas de la exportación: {stats['removed']}")
+    print(f"Estudiantes en alerta: {stats['students_at_risk']} en {stats['seconds']:.2f} s")
+    top = stats["ranking"][stats["ranking"]["Posicion"] <= args.top]
+    columns = ["Carrera", "Paralelo", "Posicion", "Riesgo_max", "Asignaturas_en_riesgo", "Asistencia_media"]
+    print(top[columns].to_markdown(index=False, floatfmt=".2f"))
+    print(f"Lista completa guardada en {ranking_path}")
@@ -0,0 +1,231 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+from data_store import to_typed_frame
+from dimensions import dimensions_dir, load_dimensions, add_keys, key_labels
+
+# Cubo de agregados para el análisis exploratorio (Periodo x Carrera x Tipo_Ingreso x Nivel)
+cube_dir = "eda_cube"
+parts_dir = os.path.join(cube_dir, "parts")
+# Métricas globales en JSON para la página de inicio de la aplicación
+summary_path = os.path.join(cube_dir, "summary.json")
+
+# La carrera se agrupa por su clave entera; el nombre se toma de dimensions.py al mostrarla
+dimensions = ["Periodo", "Id_Carrera", "Tipo_Ingreso", "Nivel"]
+key_dimensions = ["Id_Carrera"]
+labelled_dimensions = {"Carrera": "Id_Carrera"}
+
+# Histograma de Nota_final: 20 intervalos de 0.5 entre 0 y 10
+nota_edges = np.linspace(0, 10, 21)
+# Histograma conjunto Asistencia x Nota_final (para el gráfico de dispersión)
+asistencia_edges = np.linspace(0, 100, 21)
+
+nota_hist_columns = [f"nota_h{i:02d}" for i in range(len(nota_edges) - 1)]
+
+# Medidas aditivas: la suma de cubos parciales es el cubo total
+sum_columns = [
+    "n", "n_pass", "nota_sum", "nota_sumsq",
+    "pair_n", "pair_x", "pair_y", "pair_xx", "pair_yy", "pair_xy",
+] + nota_hist_columns
+
+
+def _bin(values, edges):
+    """Índice de intervalo; el valor máximo cae en el último intervalo."""
+    return np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+
+
+def build_partial_cube(df):
+    """Agregar un bloque de filas (por ejemplo, un archivo exportado) en el cubo.
+
+    df debe traer la clave Id_Carrera (dimensions.add_keys). Devuelve el cubo
+    de medidas y el histograma conjunto Asistencia x Nota_final.
+    """
+    nota = df['Nota_final'].to_numpy(dtype=float)
+    asistencia = df['Asistencia'].to_numpy(dtype=float)
+    pair = ~np.isnan(asistencia) & ~np.isnan(nota)
+    x = np.where(pair, asistencia, 0.0)
+    y = np.where(pair, nota, 0.0)
+
+    measures = pd.DataFrame({col: df[col].to_numpy() if col in key_dimensions else df[col].astype(str).to_numpy()
+                             for col in dimensions})
+    measures["n"] = 1
+    measures["n_pass"] = (df['Estado_Asignatura'] == 'APROBADO').to_numpy().astype(int)
+    measures["nota_sum"] = nota
+    measures["nota_sumsq"] = nota ** 2
+    measures["nota_min"] = nota
+    measures["nota_max"] = nota
+    measures["pair_n"] = pair.astype(int)
+    measures["pair_x"] = x
+    measures["pair_y"] = y
+    measures["pair_xx"] = x ** 2
+    measures["pair_yy"] = y ** 2
+    measures["pair_xy"] = x * y
+    nota_bins = _bin(nota, nota_edges)
+    for i, col in enumerate(nota_hist_columns):
+        measures[col] = (nota_bins == i).astype(int)
+
+    grouped = measures.groupby(dimensions, sort=False)
+    cube = grouped[sum_columns].sum()
+    cube["nota_min"] = grouped["nota_min"].min()
+    cube["nota_max"] = grouped["nota_max"].max()
+
+    joint = measures.loc[pair, dimensions].copy()
+    joint["asistencia_bin"] = _bin(asistencia[pair], asistencia_edges)
+    joint["nota_bin"] = nota_bins[pair]
+    joint = joint.groupby(dimensions + ["asistencia_bin", "nota_bin"], sort=False).size().rename("count")
+    return cube.reset_index(), joint.reset_index()
+
+
+def merge_cubes(cubes, joints):
+    """Combinar cubos parciales sumando sus medidas."""
+    cube = pd.concat(cubes, ignore_index=True)
+    grouped = cube.groupby(dimensions)
+    merged = grouped[sum_columns].sum()
+    merged["nota_min"] = grouped["nota_min"].min()
+    merged["nota_max"] = grouped["nota_max"].max()
+
+    joint = pd.concat(joints, ignore_index=True)
+    joint = joint.groupby(dimensions + ["asistencia_bin", "nota_bin"])["count"].sum()
+    return merged.reset_index(), joint.reset_index()
+
+
+def dimension_hash(tables):
+    """Huella de la asignación Id_Carrera -> Carrera con la que se agrupan los cubos parciales."""
+    table = tables["carrera"][["Id_Carrera", "Carrera"]].sort_values("Id_Carrera")
+    return hashlib.sha256(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def _part_paths(digest, dims_digest):
+    # Un cubo parcial vale para un archivo y una asignación de claves: si dimensions/ se
+    # reconstruye con otras claves, los cubos anteriores no se reutilizan
+    return (os.path.join(parts_dir, f"{digest}.{dims_digest}.cube.parquet"),
+            os.path.join(parts_dir, f"{digest}.{dims_digest}.joint.parquet"))
+
+
+def update_cube(manifest, load_part, tables=None):
+    """Actualizar el cubo a partir del manifiesto de ingesta.
+
+    Solo se agregan los archivos cuyo cubo parcial no existe todavía;
+    load_part(entry) devuelve el DataFrame (texto) de un archivo del manifiesto.
+    tables son las dimensiones con las que se asignan las claves (por defecto, las guardadas).
+    """
+    os.makedirs(parts_dir, exist_ok=True)
+    tables = tables if tables is not None else load_dimensions()
+    dims_digest = dimension_hash(tables)
+    cubes, joints, live = [], [], set()
+    for entry in manifest.values():
+        cube_path, joint_path = _part_paths(entry["sha256"], dims_digest)
+        live.update(os.path.basename(p) for p in (cube_path, joint_path))
+        if os.path.exists(cube_path) and os.path.exists(joint_path):
+            cube, joint = pd.read_parquet(cube_path), pd.read_parquet(joint_path)
+        else:
+            df = add_keys(to_typed_frame(load_part(entry)), tables, names=["carrera"])
+            cube, joint = build_partial_cube(df)
+            cube.to_parquet(cube_path, index=False)
+            joint.to_parquet(joint_path, index=False)
+        cubes.append(cube)
+        joints.append(joint)
+
+    # Cubos parciales de archivos que ya no están en el manifiesto
+    for name in os.listdir(parts_dir):
+        if name not in live:
+            os.remove(os.path.join(parts_dir, name))
+
+    if not cubes:
+        return None, None
+    cube, joint = merge_cubes(cubes, joints)
+    cube.to_parquet(os.path.join(cube_dir, "cube.parquet"), index=False)
+    joint.to_parquet(os.path.join(cube_dir, "joint.parquet"), index=False)
+    write_summary(cube)
+    return cube, joint
+
+
+def write_summary(cube, path=summary_path):
+    """Guardar las métricas globales del cubo en JSON (se leen sin pandas)."""
+    stats = {key: value.item() if hasattr(value, "item") else value for key, value in summary(cube).items()}
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(stats, f, indent=4)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_cube(path=cube_dir):
+    """Cargar el cubo completo (medidas e histograma conjunto)."""
+    cube_path = os.path.join(path, "cube.parquet")
+    if not os.path.exists(cube_path):
+        raise FileNotFoundError(
+            f"No existe el cubo {cube_path}. Ejecuta primero process_data.py."
+        )
+    return pd.read_parquet(cube_path), pd.read_parquet(os.path.join(path, "joint.parquet"))
+
+
+def filter_cube(cube, **filters):
+    """Filtrar celdas del cubo; cada filtro es una lista de valores permitidos (None = todos)."""
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, values in filters.items():
+        if values:
+            mask &= cube[dim].isin(values).to_numpy()
+    return cube[mask]
+
+
+def summary(cube):
+    """Métricas globales de un cubo (o de un subconjunto ya filtrado)."""
+    n = cube["n"].sum()
+    nota_mean = cube["nota_sum"].sum() / n if n else np.nan
+    return {
+        "registros": int(n),
+        "aprobados": int(cube["n_pass"].sum()),
+        "tasa_exito": cube["n_pass"].sum() / n if n else np.nan,
+        "nota_media": nota_mean,
+        "nota_std": np.sqrt(max(cube["nota_sumsq"].sum() / n - nota_mean ** 2, 0)) if n else np.nan,
+        "nota_min": cube["nota_min"].min(),
+        "nota_max": cube["nota_max"].max(),
+        "periodos": cube.loc[cube["n"] > 0, "Periodo"].nunique(),
+        "carreras": cube.loc[cube["n"] > 0, "Id_Carrera"].nunique(),
+    }
+
+
+def success_by(cube, dim, path=dimensions_dir):
+    """Tasa de éxito y total de registros por una dimensión.
+
+    Para Carrera se agrupa por Id_Carrera y solo las filas del resultado se
+    traducen al nombre de la carrera.
+    """
+    key = labelled_dimensions.get(dim, dim)
+    grouped = cube.groupby(key)[["n_pass", "n"]].sum()
+    labels = grouped.index
+    if key != dim:
+        labels = key_labels(key, path).reindex(labels).to_numpy()
+    result = pd.DataFrame({
+        dim: labels.astype(str),
+        "Tasa_Exito": grouped["n_pass"].to_numpy() / grouped["n"].to_numpy(),
+        "Total_Registros": grouped["n"].to_numpy(),
+    })
+    return result.reset_index(drop=True)
+
+
+def nota_histogram(cube):
+    """Frecuencias del histograma de Nota_final y los bordes de los intervalos."""
+    return cube[nota_hist_columns].sum().to_numpy(), nota_edges
+
+
+def pearson(cube):
+    """Correlación de Pearson Asistencia-Nota_final a partir de las sumas del cubo."""
+    n = cube["pair_n"].sum()
+    if n < 2:
+        return np.nan
+    sx, sy = cube["pair_x"].sum(), cube["pair_y"].sum()
+    cov = cube["pair_xy"].sum() - sx * sy / n
+    var_x = cube["pair_xx"].sum() - sx ** 2 / n
+    var_y = cube["pair_yy"].sum() - sy ** 2 / n
+    return cov / np.sqrt(var_x * var_y)
+
+
+def joint_histogram(joint, **filters):
+    """Matriz (nota x asistencia) de conteos para las celdas filtradas."""
+    joint = filter_cube(joint, **filters)
+    counts = np.zeros((len(nota_edges) - 1, len(asistencia_edges) - 1))
+    np.add.at(counts, (joint["nota_bin"].to_numpy(), joint["asistencia_bin"].to_numpy()),
+              joint["count"].to_numpy())
+    return counts, asistencia_edges, nota_edges
@@ -0,0 +1,144 @@
+import numpy as np
+import joblib
+import os
+
+# Motor de evaluación: a partir de las probabilidades de un modelo (calculadas una
+# sola vez) se obtienen la curva ROC, la curva precisión-recall, la calibración y
+# el barrido completo de umbrales con un único ordenamiento en NumPy.
+# La clase positiva es 1 = Aprobado; un estudiante se marca en riesgo cuando su
+# probabilidad de aprobar queda por debajo del umbral.
+
+# Número de intervalos de la curva de calibración
+calibration_bins = 10
+
+# Costos por defecto: no detectar a un estudiante que reprueba pesa más que una falsa alarma
+default_costs = {"missed": 5.0, "false_alarm": 1.0}
+
+
+def threshold_sweep(y_true, y_proba):
+    """Conteos de la matriz de confusión para cada umbral distinto, en una sola pasada.
+
+    Se ordenan las probabilidades de mayor a menor; con sumas acumuladas se
+    obtienen los verdaderos y falsos positivos al predecir APROBADO para todas
+    las probabilidades >= umbral. Los umbrales quedan en orden decreciente.
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    order = np.argsort(y_proba, kind="mergesort")[::-1]
+    proba_sorted = y_proba[order]
+    y_sorted = y_true[order]
+
+    # Último índice de cada bloque de probabilidades iguales
+    distinct = np.flatnonzero(np.diff(proba_sorted)) if len(proba_sorted) > 1 else np.array([], dtype=int)
+    ends = np.r_[distinct, len(proba_sorted) - 1]
+    tp = np.cumsum(y_sorted)[ends]
+    fp = ends + 1 - tp
+    positives, negatives = int(y_true.sum()), int(len(y_true) - y_true.sum())
+    return {
+        "thresholds": proba_sorted[ends],
+        "tp": tp, "fp": fp,
+        "fn": positives - tp, "tn": negatives - fp,
+        "positives": positives, "negatives": negatives,
+    }
+
+
+def _divide(num, den):
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+
+
+def curves(sweep):
+    """ROC, precisión-recall y métricas por umbral derivadas del barrido."""
+    tp, fp, fn, tn = sweep["tp"], sweep["fp"], sweep["fn"], sweep["tn"]
+    # La ROC empieza en (0, 0): umbral por encima de la probabilidad máxima
+    fpr = np.r_[0.0, _divide(fp, sweep["negatives"])]
+    tpr = np.r_[0.0, _divide(tp, sweep["positives"])]
+    precision = _divide(tp, tp + fp)
+    recall = _divide(tp, sweep["positives"])
+    return {
+        "fpr": fpr,
+        "tpr": tpr,
+        "auc": float(np.trapz(tpr, fpr)),
+        "precision": precision,
+        "recall": recall,
+        # Precisión media (igual que average_precision_score de scikit-learn)
+        "average_precision": float(np.sum(np.diff(np.r_[0.0, recall]) * precision)),
+        "f1": _divide(2 * tp, 2 * tp + fp + fn),
+        # Métricas de la clase 0 (No aprobado): la que interesa para la alerta temprana
+        "precision_0": _divide(tn, tn + fn),
+        "recall_0": _divide(tn, tn + fp),
+        "accuracy": _divide(tp + tn, tp + fp + fn + tn),
+    }
+
+
+def calibration(y_true, y_proba, bins=calibration_bins):
+    """Probabilidad media predicha y tasa observada de aprobación por intervalo."""
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    index = np.minimum((y_proba * bins).astype(int), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    predicted = _divide(np.bincount(index, weights=y_proba, minlength=bins), counts)
+    observed = _divide(np.bincount(index, weights=np.asarray(y_true, dtype=np.float64), minlength=bins), counts)
+    keep = counts > 0
+    return {"predicted": predicted[keep], "observed": observed[keep], "count": counts[keep]}
+
+
+def evaluate(y_true, y_proba):
+    """Barrido de umbrales, curvas y calibración de un modelo."""
+    sweep = threshold_sweep(y_true, y_proba)
+    result = {"sweep": sweep}
+    result.update(curves(sweep))
+    result["calibration"] = calibration(y_true, y_proba)
+    return result
+
+
+def at_threshold(result, threshold):
+    """Métricas de un modelo al predecir APROBADO cuando la probabilidad es >= umbral."""
+    sweep = result["sweep"]
+    # Umbrales decrecientes: se toma el último con valor >= threshold
+    i = np.searchsorted(-sweep["thresholds"], -threshold, side="right") - 1
+    if i < 0:
+        tp, fp = 0, 0
+    else:
+        tp, fp = int(sweep["tp"][i]), int(sweep["fp"][i])
+    fn, tn = sweep["positives"] - tp, sweep["negatives"] - fp
+    return {
+        "threshold": threshold,
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "accuracy": (tp + tn) / max(tp + fp + fn + tn, 1),
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "precision_0": tn / (tn + fn) if tn + fn else 0.0,
+        "recall_0": tn / (tn + fp) if tn + fp else 0.0,
+    }
+
+
+def cost_curve(result, missed=default_costs["missed"], false_alarm=default_costs["false_alarm"]):
+    """Costo de cada umbral: estudiantes en riesgo no detectados (FP) y falsas alarmas (FN)."""
+    sweep = result["sweep"]
+    return missed * sweep["fp"] + false_alarm * sweep["fn"]
+
+
+def best_threshold(result, missed=default_costs["missed"], false_alarm=default_costs["false_alarm"]):
+    """Umbral de menor costo total."""
+    cost = cost_curve(result, missed, false_alarm)
+    i = int(np.argmin(cost))
+    return float(result["sweep"]["thresholds"][i]), float(cost[i])
+
+
+def load_evaluation(registry, split="test"):
+    """Evaluación de todos los modelos de una versión del registro para una partición.
+
+    Las versiones no cambian una vez publicadas, así que el resultado se guarda
+    en la carpeta de la versión y se reutiliza en las siguientes llamadas.
+    """
+    cache_path = os.path.join(registry.version_dir, f"evaluation_{split}.joblib")
+    if os.path.exists(cache_path):
+        return joblib.load(cache_path)
+    if split != "test":
+        raise ValueError(f"La versión {registry.version} solo guarda probabilidades de la partición de prueba.")
+    predictions = registry.test_predictions()
+    evaluation = {name: evaluate(predictions["y_test"], proba) for name, proba in predictions["probas"].items()}
+    joblib.dump(evaluation, f"{cache_path}.tmp")
+    os.replace(f"{cache_path}.tmp", cache_path)
+    return evaluation
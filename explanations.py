@@ -0,0 +1,218 @@
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import argparse
+import threading
+import time
+from collections import OrderedDict
+
+# Explicación de cada predicción: aporte de cada variable a la probabilidad de aprobar.
+# - XGBoost: contribuciones exactas por recorrido de árboles (pred_contribs), en log-odds.
+# - Random Forest: descomposición de Saabas (cambio del valor del nodo en cada
+#   división del camino), vectorizada con decision_path, en probabilidad.
+# - Regresión logística: coeficiente por valor de la variable, en log-odds (en un
+#   Pipeline, sobre los valores ya transformados por los pasos previos, p. ej. escalados).
+# Las columnas one-hot de una variable categórica se suman en una sola variable.
+
+units = {"xgboost": "log-odds", "forest": "probabilidad", "linear": "log-odds"}
+
+
+def final_estimator(model, X=None):
+    """Último paso de un Pipeline (p. ej. escalado + SGD) y X pasada por los pasos anteriores.
+
+    Los modelos que no son Pipeline se devuelven tal cual.
+    """
+    if hasattr(model, "steps"):
+        if X is not None:
+            X = model[:-1].transform(X)
+        model = model.steps[-1][1]
+    return model, X
+
+
+def model_kind(model):
+    model, _ = final_estimator(model)
+    if hasattr(model, "get_booster"):
+        return "xgboost"
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        return "forest"
+    if hasattr(model, "coef_"):
+        return "linear"
+    raise TypeError(f"No hay explicaciones para modelos de tipo {type(model).__name__}.")
+
+
+def _forest_path_matrix(model, n_features):
+    """Matriz (nodos de todo el bosque x variables) con el aporte de llegar a cada nodo.
+
+    El aporte de un nodo es su probabilidad de aprobar menos la de su padre y se
+    asigna a la variable con la que el padre dividió. Se promedia entre árboles.
+    """
+    rows, cols, data, bias = [], [], [], 0.0
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        proba = value[:, 1] / value.sum(axis=1)
+        parents = np.full(tree.node_count, -1)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        parents[tree.children_left[internal]] = internal
+        parents[tree.children_right[internal]] = internal
+        children = np.flatnonzero(parents >= 0)
+        rows.append(offset + children)
+        cols.append(tree.feature[parents[children]])
+        data.append(proba[children] - proba[parents[children]])
+        bias += proba[0]
+        offset += tree.node_count
+    n_trees = len(model.estimators_)
+    matrix = sp.csr_matrix((np.concatenate(data) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+                           shape=(offset, n_features))
+    return matrix, bias / n_trees
+
+
+def contributions(model, X, path_matrix=None, approximate=False):
+    """Aportes por columna de X y valor base: bias + suma de aportes = predicción del modelo.
+
+    Devuelve (aportes n x columnas, valor base n). Para XGBoost y la regresión
+    logística la suma está en log-odds; para Random Forest, en probabilidad.
+    Con approximate=True XGBoost usa la descomposición de Saabas (mucho más
+    rápida que los valores SHAP exactos, igual que la del bosque).
+    """
+    model, X = final_estimator(model, X)
+    kind = model_kind(model)
+    if kind == "xgboost":
+        import xgboost as xgb
+        from modeling import xgb_used_rounds
+        # La CSR se pasa tal cual: las entradas ausentes son faltantes, como en el entrenamiento.
+        # Solo las rondas que usa predict_proba (parada temprana), para que la suma coincida
+        values = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True, approx_contribs=approximate,
+                                             iteration_range=(0, xgb_used_rounds(model)))
+        return values[:, :-1], values[:, -1]
+    if kind == "forest":
+        matrix, bias = path_matrix if path_matrix is not None else _forest_path_matrix(model, X.shape[1])
+        indicator, _ = model.decision_path(X)
+        return np.asarray((indicator @ matrix).todense()), np.full(X.shape[0], bias)
+    coef = model.coef_[0]
+    return np.asarray(X.multiply(coef).todense()) if sp.issparse(X) else X * coef, \
+        np.full(X.shape[0], model.intercept_[0])
+
+
+def group_columns(encoder):
+    """Variable de origen de cada columna del codificador (las one-hot se agrupan)."""
+    groups = list(encoder.numeric)
+    for col in encoder.categorical:
+        groups += [col] * (len(encoder.vocabulary_[col]) - 1)
+    return groups
+
+
+def grouped_contributions(values, encoder):
+    """Sumar los aportes de las columnas one-hot de cada variable categórica."""
+    variables = list(encoder.numeric) + list(encoder.categorical)
+    index = {name: i for i, name in enumerate(variables)}
+    mapping = sp.csr_matrix((np.ones(values.shape[1]), ([index[g] for g in group_columns(encoder)],
+                                                         np.arange(values.shape[1]))),
+                            shape=(len(variables), values.shape[1]))
+    return pd.DataFrame(np.asarray(values @ mapping.T), columns=variables)
+
+
+def explain_frame(model, encoder, df, chunk_size=50000, approximate=False):
+    """Aportes por variable para un lote de matrículas (filas sin datos numéricos quedan en NaN).
+
+    Muchas matrículas comparten exactamente las mismas entradas del modelo, así
+    que cada combinación distinta se explica una sola vez y se reparte a sus filas.
+    """
+    variables = list(encoder.numeric) + list(encoder.categorical)
+    result = pd.DataFrame(np.nan, index=df.index, columns=variables + ["Base"])
+    valid = np.flatnonzero(encoder.valid_mask(df))
+    inputs = df.iloc[valid][variables]
+    hashes = pd.util.hash_pandas_object(inputs.astype(str), index=False).to_numpy()
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+
+    path_matrix = (_forest_path_matrix(final_estimator(model)[0], len(encoder.feature_names_))
+                   if model_kind(model) == "forest" else None)
+    unique_values = np.empty((len(first), len(variables) + 1))
+    for start in range(0, len(first), chunk_size):
+        rows = first[start:start + chunk_size]
+        values, bias = contributions(model, encoder.transform(inputs.iloc[rows]), path_matrix, approximate)
+        grouped = grouped_contributions(values, encoder)
+        unique_values[start:start + len(rows), :-1] = grouped.to_numpy()
+        unique_values[start:start + len(rows), -1] = bias
+    result.iloc[valid] = unique_values[inverse]
+    return result
+
+
+class Explainer:
+    """Explicaciones individuales con caché por (versión del modelo, entrada).
+
+    El objeto se comparte entre sesiones de la aplicación; la matriz de caminos
+    del bosque se calcula una sola vez.
+    """
+
+    def __init__(self, model, encoder, version, cache_size=1024):
+        self.model = model
+        self.encoder = encoder
+        self.version = version
+        self.kind = model_kind(model)
+        self.units = units[self.kind]
+        self._path_matrix = (_forest_path_matrix(final_estimator(model)[0], len(encoder.feature_names_))
+                             if self.kind == "forest" else None)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def explain(self, numeric_values, categorical_values):
+        """Aportes por variable (Series ordenada por magnitud) y valor base de una entrada."""
+        key = (self.version, tuple(float(v) for v in numeric_values), tuple(str(v) for v in categorical_values))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return cached
+            self.cache_misses += 1
+        row = pd.DataFrame([list(key[1]) + list(key[2])], columns=self.encoder.numeric + self.encoder.categorical)
+        values, bias = contributions(self.model, self.encoder.transform(row), self._path_matrix)
+        grouped = grouped_contributions(values, self.encoder).iloc[0]
+        result = (grouped.reindex(grouped.abs().sort_values(ascending=False).index), float(bias[0]))
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+
+if __name__ == "__main__":
+    from data_store import load_master
+    from model_registry import RegisteredVersion
+
+    parser = argparse.ArgumentParser(description="Explicar en lote las predicciones de una cohorte.")
+    parser.add_argument("--model", default=None, help="Modelo del registro (por defecto, el mejor).")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    parser.add_argument("--periodo", action="append", default=None, help="Limitar a uno o más periodos.")
+    parser.add_argument("--output", default="explanations.parquet", help="Archivo de salida (.parquet o .csv).")
+    parser.add_argument("--approximate", action="store_true",
+                        help="XGBoost: descomposición de Saabas en lugar de valores SHAP exactos.")
+    args = parser.parse_args()
+
+    registry = RegisteredVersion(args.version)
+    model_name = args.model or registry.best_model_name
+    model, encoder = registry.model(model_name), registry.encoder
+    id_columns = ["Periodo", "Paralelo", "Identificacion_Estudiante", "Asignatura"]
+    columns = list(dict.fromkeys(id_columns + encoder.numeric + encoder.categorical))
+    df = load_master(columns=columns, periodos=args.periodo)
+
+    start = time.perf_counter()
+    explained = explain_frame(model, encoder, df, approximate=args.approximate)
+    elapsed = time.perf_counter() - start
+    # Periodo es a la vez identificador y variable del modelo: los aportes llevan prefijo
+    output = pd.concat([df[id_columns].astype(str), explained.add_prefix("Aporte_")], axis=1)
+    if args.output.endswith(".csv"):
+        output.to_csv(args.output, index=False)
+    else:
+        output.to_parquet(args.output, index=False)
+    print(f"Modelo: {model_name} (versión {registry.version}); aportes en {units[model_kind(model)]}")
+    print(f"{len(df)} matrículas explicadas en {elapsed:.2f} s ({len(df) / elapsed:,.0f} filas/s, "
+          f"{explained.dropna().drop_duplicates().shape[0]} explicaciones distintas)")
+    print("Aporte medio absoluto por variable:")
+    print(explained.drop(columns="Base").abs().mean().sort_values(ascending=False).to_string(float_format="%.4f"))
+    print(f"Resultados guardados en {args.output}")
@@ -0,0 +1,123 @@
+import numpy as np
+import scipy.sparse as sp
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Objetivo de latencia para una predicción individual (se muestra en la aplicación)
+latency_target_ms = 10.0
+
+
+class FastPredictor:
+    """Ruta de baja latencia para puntuar un solo estudiante.
+
+    - Índice precalculado de (variable, categoría) a posición de columna.
+    - Buffers preasignados para la fila CSR (sin crear DataFrames).
+    - Un único llamado al modelo por solicitud: la predicción se deriva de la
+      probabilidad con el mismo umbral que usa predict().
+    - Caché LRU de las entradas recientes.
+    - Si se entrega la exportación plana del modelo (tree_export.py), se recorre
+      con NumPy en lugar de llamar al estimador.
+    """
+
+    def __init__(self, model, encoder, cache_size=1024, threshold=0.5, window=1000, flat=None):
+        self.model = model
+        self.flat = flat
+        self.encoder = encoder
+        self.threshold = threshold
+        self.n_features = len(encoder.feature_names_)
+        self.n_numeric = len(encoder.numeric)
+
+        # (variable, valor) -> posición; la categoría de referencia y las no vistas no tienen columna
+        self.positions = {}
+        position = self.n_numeric
+        for col in encoder.categorical:
+            vocabulary = encoder.vocabulary_[col]
+            self.positions[col] = {value: position + i - 1 for i, value in enumerate(vocabulary) if i > 0}
+            position += len(vocabulary) - 1
+
+        width = self.n_numeric + len(encoder.categorical)
+        self._data = np.ones(width, dtype=np.float32)
+        self._indices = np.arange(width, dtype=np.int32)
+        self._lock = threading.Lock()
+
+        # XGBoost: inplace_predict evita construir un DMatrix en cada llamada
+        self._booster = model.get_booster() if hasattr(model, "get_booster") else None
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def _row(self, numeric_values, categorical_values):
+        nnz = self.n_numeric
+        self._data[:nnz] = numeric_values
+        for col, value in zip(self.encoder.categorical, categorical_values):
+            position = self.positions[col].get(str(value))
+            if position is not None:
+                self._data[nnz] = 1.0
+                self._indices[nnz] = position
+                nnz += 1
+        return sp.csr_matrix(
+            (self._data[:nnz], self._indices[:nnz], np.array([0, nnz])),
+            shape=(1, self.n_features),
+        )
+
+    def _predict_uncached(self, numeric_values, categorical_values):
+        row = self._row(numeric_values, categorical_values)
+        if self.flat is not None:
+            return float(self.flat.predict_proba(row)[0])
+        if self._booster is not None:
+            return float(self._booster.inplace_predict(row)[0])
+        return float(self.model.predict_proba(row)[0, 1])
+
+    def predict_proba(self, numeric_values, categorical_values):
+        """Probabilidad de aprobar para un estudiante.
+
+        numeric_values y categorical_values siguen el orden de encoder.numeric y
+        encoder.categorical.
+        """
+        start = time.perf_counter()
+        key = (tuple(float(v) for v in numeric_values), tuple(str(v) for v in categorical_values))
+        # El objeto se comparte entre sesiones de Streamlit: buffers y caché van bajo el mismo lock
+        with self._lock:
+            proba = self._cache.get(key)
+            if proba is None:
+                self.cache_misses += 1
+                proba = self._predict_uncached(key[0], key[1])
+                self._cache[key] = proba
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        return proba
+
+    def predict(self, numeric_values, categorical_values):
+        """Probabilidad de aprobar y predicción (1=Aprobado) con un solo llamado al modelo."""
+        proba = self.predict_proba(numeric_values, categorical_values)
+        return proba, int(proba >= self.threshold)
+
+    def latency_stats(self):
+        """Percentiles p50/p99 de las últimas predicciones, en milisegundos."""
+        if not self.latencies_ms:
+            return None
+        p50, p99 = np.percentile(np.fromiter(self.latencies_ms, dtype=float), [50, 99])
+        return {"p50": p50, "p99": p99, "count": len(self.latencies_ms),
+                "cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
+
+    def warm_up(self, n=200, seed=42):
+        """Medir la latencia con entradas aleatorias del vocabulario (sin usar la caché)."""
+        rng = np.random.default_rng(seed)
+        for _ in range(n):
+            numeric_values = tuple(float(v) for v in rng.integers(0, 101, self.n_numeric))
+            categorical_values = tuple(
+                rng.choice(self.encoder.vocabulary_[col]) for col in self.encoder.categorical
+            )
+            with self._lock:
+                start = time.perf_counter()
+                self._predict_uncached(numeric_values, categorical_values)
+                self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        return self.latency_stats()
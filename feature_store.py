@@ -0,0 +1,228 @@
+import pandas as pd
+import numpy as np
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from data_store import store_dir, list_periods, load_master
+
+# Almacén de variables históricas por estudiante y asignatura.
+# Para cada periodo se guardan los incrementos (agregados de ese periodo) y el
+# estado previo de las claves que aparecen en él, de modo que una fila del
+# periodo p solo ve información de periodos anteriores a p.
+feature_dir = "feature_store"
+manifest_path = os.path.join(feature_dir, "manifest.json")
+
+# Las tablas se indexan con las claves enteras estables de dimensions.py
+tables = {
+    "student": ["Id_Estudiante"],
+    "subject": ["Id_Asignatura"],
+    "student_subject": ["Id_Estudiante", "Id_Asignatura"],
+}
+source_columns = ["Id_Estudiante", "Id_Asignatura", "Num_matricula", "Nota_final", "Estado_Asignatura"]
+
+# Variables que se agregan a cada fila (todas calculadas con periodos anteriores)
+history_features = [
+    "prior_courses", "prior_gpa", "prior_fail_count", "prior_fail_rate", "prior_repeats",
+    "prior_attempts_subject", "prior_fails_subject", "subject_fail_rate", "subject_prior_n",
+]
+# Suavizado de la tasa de reprobación de una asignatura hacia la tasa global
+subject_smoothing = 20
+
+
+def partition_hash(periodo, path=store_dir):
+    """Huella de la partición de un periodo en el almacén."""
+    digest = hashlib.sha256()
+    partition = os.path.join(path, f"Periodo={periodo}")
+    for name in sorted(os.listdir(partition)):
+        with open(os.path.join(partition, name), "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def period_increments(df):
+    """Agregados de un solo periodo por estudiante, asignatura y estudiante-asignatura."""
+    df = pd.DataFrame({
+        "Id_Estudiante": df["Id_Estudiante"].to_numpy(),
+        "Id_Asignatura": df["Id_Asignatura"].to_numpy(),
+        "courses": 1,
+        "graded": df["Nota_final"].notna().to_numpy().astype(int),
+        "grade_sum": df["Nota_final"].fillna(0).to_numpy(dtype=float),
+        "fails": (df["Estado_Asignatura"] != "APROBADO").to_numpy().astype(int),
+        "repeats": (df["Num_matricula"] > 1).to_numpy().astype(int),
+    })
+    measures = {
+        "student": ["courses", "graded", "grade_sum", "fails", "repeats"],
+        "subject": ["courses", "graded", "grade_sum", "fails"],
+        "student_subject": ["courses", "fails"],
+    }
+    return {name: df.groupby(keys, sort=False)[measures[name]].sum() for name, keys in tables.items()}
+
+
+def _table_path(kind, name, periodo):
+    return os.path.join(feature_dir, kind, name, f"{periodo}.parquet")
+
+
+def _read(kind, name, periodo):
+    df = pd.read_parquet(_table_path(kind, name, periodo))
+    return df.set_index(tables[name])
+
+
+def _write(df, kind, name, periodo):
+    os.makedirs(os.path.join(feature_dir, kind, name), exist_ok=True)
+    df.reset_index().to_parquet(_table_path(kind, name, periodo), index=False)
+
+
+def load_manifest():
+    if not os.path.exists(manifest_path):
+        return {"periods": {}}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def update_feature_store(path=store_dir, full=False):
+    """Actualizar el almacén de variables con los periodos nuevos o modificados.
+
+    Solo se leen del almacén los periodos que cambiaron. El estado acumulado se
+    reutiliza cuando solo se agregan periodos posteriores; si cambia un periodo
+    intermedio se reconstruye desde ahí sumando los incrementos ya guardados.
+    """
+    if full and os.path.exists(feature_dir):
+        shutil.rmtree(feature_dir)
+    manifest = load_manifest()
+    old = manifest["periods"]
+    periods = list_periods(path)
+    hashes = {p: partition_hash(p, path) for p in periods}
+
+    changed = [p for p in periods if old.get(p) != hashes[p]]
+    removed = [p for p in old if p not in hashes]
+    if not changed and not removed:
+        return {"changed": [], "removed": [], "replayed": []}
+
+    for periodo in changed:
+        df = load_master(columns=source_columns, periodos=[periodo], path=path)
+        for name, increment in period_increments(df).items():
+            _write(increment, "increments", name, periodo)
+    for periodo in removed:
+        for name in tables:
+            for kind in ("increments", "prior"):
+                if os.path.exists(_table_path(kind, name, periodo)):
+                    os.remove(_table_path(kind, name, periodo))
+
+    # Primer periodo cuyo estado previo puede haber cambiado
+    first = min([periods.index(p) for p in changed] +
+                [len([q for q in periods if q < p]) for p in removed])
+    prefix = periods[:first]
+    appended = prefix == sorted(old) and all(os.path.exists(os.path.join(feature_dir, "state", f"{n}.parquet"))
+                                              for n in tables)
+    state = {}
+    for name in tables:
+        if appended and prefix:
+            state[name] = pd.read_parquet(os.path.join(feature_dir, "state", f"{name}.parquet")).set_index(tables[name])
+        elif prefix:
+            state[name] = pd.concat([_read("increments", name, p) for p in prefix]).groupby(level=tables[name]).sum()
+        else:
+            state[name] = None
+
+    for periodo in periods[first:]:
+        for name in tables:
+            increment = _read("increments", name, periodo)
+            current = state[name]
+            if current is None:
+                prior = pd.DataFrame(0, index=increment.index, columns=increment.columns)
+                state[name] = increment
+            else:
+                prior = current.reindex(increment.index, fill_value=0)
+                state[name] = current.add(increment, fill_value=0)
+            _write(prior, "prior", name, periodo)
+
+    os.makedirs(os.path.join(feature_dir, "state"), exist_ok=True)
+    for name in tables:
+        state[name].reset_index().to_parquet(os.path.join(feature_dir, "state", f"{name}.parquet"), index=False)
+    manifest["periods"] = hashes
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return {"changed": changed, "removed": removed, "replayed": periods[first:]}
+
+
+def point_in_time_features(df):
+    """Agregar a cada fila las variables históricas calculadas con periodos anteriores al suyo."""
+    result = pd.DataFrame(index=df.index, columns=history_features, dtype=float)
+    periodo_values = df["Periodo"].astype(str)
+    for periodo in periodo_values.unique():
+        rows = df.index[periodo_values == periodo]
+        if not os.path.exists(_table_path("prior", "student", periodo)):
+            raise KeyError(f"El periodo {periodo} no está en {feature_dir}; ejecuta update_feature_store().")
+        keys = pd.DataFrame({
+            "Id_Estudiante": df.loc[rows, "Id_Estudiante"].to_numpy(),
+            "Id_Asignatura": df.loc[rows, "Id_Asignatura"].to_numpy(),
+        })
+        student = _read("prior", "student", periodo).reindex(
+            pd.Index(keys["Id_Estudiante"])).fillna(0).to_numpy()
+        subject_prior = _read("prior", "subject", periodo)
+        # Tasa global de reprobación (periodos anteriores) de las asignaturas ofertadas en el periodo
+        total = subject_prior["courses"].sum()
+        global_rate = subject_prior["fails"].sum() / total if total else 0.0
+        subject = subject_prior.reindex(pd.Index(keys["Id_Asignatura"])).fillna(0)
+        pair = _read("prior", "student_subject", periodo).reindex(
+            pd.MultiIndex.from_frame(keys)).fillna(0)
+
+        courses, graded, grade_sum, fails, repeats = student.T
+        subject_n, subject_fails = subject["courses"].to_numpy(), subject["fails"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.column_stack([
+                courses,
+                np.where(graded > 0, grade_sum / graded, np.nan),
+                fails,
+                np.where(courses > 0, fails / courses, np.nan),
+                repeats,
+                pair["courses"].to_numpy(),
+                pair["fails"].to_numpy(),
+                (subject_fails + subject_smoothing * global_rate) / (subject_n + subject_smoothing),
+                subject_n,
+            ])
+        result.loc[rows] = values
+    return df.join(result)
+
+
+def evaluate_history_features(n_splits=5, cores=None):
+    """AUC de XGBoost (validación agrupada por estudiante) con y sin las variables históricas."""
+    from features import FeatureEncoder, add_target, build_design_matrix, numeric_features
+    from cv_engine import cross_validate
+
+    df = load_master(columns=['Asistencia', 'Num_matricula', 'Tipo_Ingreso', 'Carrera', 'Periodo',
+                              'Estado_Asignatura', 'Id_Estudiante', 'Id_Asignatura'])
+    df = point_in_time_features(add_target(df))
+    # Sin historia previa la media y la tasa no existen; -1 las distingue para los árboles
+    df[["prior_gpa", "prior_fail_rate"]] = df[["prior_gpa", "prior_fail_rate"]].fillna(-1)
+    scores = {}
+    for label, numeric in [("base", numeric_features), ("historia", numeric_features + history_features)]:
+        X, y, encoder = build_design_matrix(df, FeatureEncoder(numeric=numeric))
+        groups = df.loc[encoder.valid_mask(df), 'Id_Estudiante'].to_numpy()
+        summary, _ = cross_validate(X, y, ["XGBoost"], groups=groups, strategies=("grouped",),
+                                    n_splits=n_splits, cores=cores)
+        scores[label] = summary["XGBoost"]["grouped"]
+    return scores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualizar el almacén de variables históricas.")
+    parser.add_argument("--full", action="store_true", help="Reconstruir todos los periodos.")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Comparar XGBoost con y sin las variables históricas (validación por estudiante).")
+    parser.add_argument("--cores", type=int, default=None)
+    args = parser.parse_args()
+
+    report = update_feature_store(full=args.full)
+    if report["changed"] or report["removed"]:
+        print(f"Periodos actualizados: {', '.join(report['changed']) or '-'}; "
+              f"eliminados: {', '.join(report['removed']) or '-'}; "
+              f"estado previo recalculado para: {', '.join(report['replayed'])}")
+    else:
+        print(f"{feature_dir} ya está actualizado.")
+
+    if args.evaluate:
+        for label, stats in evaluate_history_features(cores=args.cores).items():
+            print(f"XGBoost [{label}] - AUC: {stats['AUC_mean']:.4f} ± {stats['AUC_std']:.4f}")
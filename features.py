@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+import json
+from sklearn.base import BaseEstimator, TransformerMixin
+
+# Variables predictoras del modelo
+numeric_features = ['Asistencia', 'Num_matricula']
+categorical_features = ['Tipo_Ingreso', 'Carrera', 'Periodo']
+
+
+def add_target(df):
+    """Crear la variable objetivo Exito_Academico (1=Aprobado, 0=Otro)."""
+    df['Exito_Academico'] = (df['Estado_Asignatura'] == 'APROBADO').astype(int)
+    return df
+
+
+class FeatureEncoder:
+    """Codificador one-hot que se ajusta una vez y se reutiliza en entrenamiento y predicción.
+
+    Reproduce pd.get_dummies(..., drop_first=True): por cada variable categórica
+    la primera categoría (en orden alfabético) es la referencia y no genera
+    columna. Las categorías que no se vieron en el ajuste se codifican igual que
+    la referencia (todas las columnas de esa variable en cero), de modo que el
+    resultado es determinista. La salida es una matriz dispersa CSR.
+    """
+
+    def __init__(self, numeric=None, categorical=None):
+        self.numeric = list(numeric or numeric_features)
+        self.categorical = list(categorical or categorical_features)
+        self.vocabulary_ = None
+        self.feature_names_ = None
+
+    def fit(self, df):
+        """Aprender el vocabulario de cada variable categórica."""
+        self.vocabulary_ = {
+            col: sorted(df[col].dropna().astype(str).unique().tolist())
+            for col in self.categorical
+        }
+        self._set_feature_names()
+        return self
+
+    def partial_fit(self, df):
+        """Ampliar el vocabulario con un bloque de filas (ajuste por bloques).
+
+        Tras recorrer todos los bloques el resultado es el mismo que fit() con
+        el dataset completo.
+        """
+        vocabulary = self.vocabulary_ or {col: [] for col in self.categorical}
+        self.vocabulary_ = {
+            col: sorted(set(vocabulary[col]) | set(df[col].dropna().astype(str).unique().tolist()))
+            for col in self.categorical
+        }
+        self._set_feature_names()
+        return self
+
+    def _set_feature_names(self):
+        self.feature_names_ = list(self.numeric)
+        for col in self.categorical:
+            self.feature_names_ += [f"{col}_{value}" for value in self.vocabulary_[col][1:]]
+
+    def _offsets(self):
+        offsets, position = {}, len(self.numeric)
+        for col in self.categorical:
+            offsets[col] = position
+            position += len(self.vocabulary_[col]) - 1
+        return offsets
+
+    def valid_mask(self, df):
+        """Filas con todas las variables numéricas informadas."""
+        return df[self.numeric].notna().all(axis=1).to_numpy()
+
+    def transform(self, df):
+        """Codificar un DataFrame como matriz CSR de forma vectorizada."""
+        if self.vocabulary_ is None:
+            raise ValueError("El codificador no está ajustado; llama primero a fit().")
+
+        n_rows = len(df)
+        n_numeric = len(self.numeric)
+        width = n_numeric + len(self.categorical)
+        data = np.ones((n_rows, width), dtype=np.float32)
+        indices = np.zeros((n_rows, width), dtype=np.int32)
+        present = np.ones((n_rows, width), dtype=bool)
+
+        # Las variables numéricas siempre se guardan explícitamente (incluso si valen cero)
+        for j, col in enumerate(self.numeric):
+            data[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+            indices[:, j] = j
+
+        offsets = self._offsets()
+        for k, col in enumerate(self.categorical):
+            j = n_numeric + k
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype) or values.dtype.categories.dtype != object:
+                values = values.astype(str)
+            codes = pd.Categorical(values, categories=self.vocabulary_[col]).codes
+            # Código 0 = categoría de referencia; -1 = no vista en el ajuste
+            present[:, j] = codes > 0
+            indices[:, j] = offsets[col] + codes - 1
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        return sp.csr_matrix(
+            (data[present], indices[present], indptr),
+            shape=(n_rows, len(self.feature_names_)),
+        )
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def to_dict(self):
+        return {
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "vocabulary": self.vocabulary_,
+            "feature_names": self.feature_names_,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        encoder = cls(state["numeric"], state["categorical"])
+        encoder.vocabulary_ = state["vocabulary"]
+        encoder.feature_names_ = state["feature_names"]
+        return encoder
+
+    def save(self, path):
+        """Guardar el vocabulario en JSON junto al modelo."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_design_matrix(df, encoder=None):
+    """Construir X (CSR) e y, descartando filas sin datos numéricos.
+
+    Si no se pasa un codificador se ajusta uno nuevo con las filas válidas.
+    Devuelve X, y y el codificador utilizado.
+    """
+    encoder = encoder or FeatureEncoder()
+    df = df.loc[encoder.valid_mask(df)]
+    if encoder.vocabulary_ is None:
+        encoder.fit(df)
+    X = encoder.transform(df)
+    y = df['Exito_Academico'].to_numpy()
+    return X, y, encoder
+
+
+class NumericScaler(BaseEstimator, TransformerMixin):
+    """Estandarización de las columnas numéricas de la CSR (necesaria para SGD por bloques).
+
+    Las numéricas ocupan las primeras columnas y siempre se guardan explícitamente,
+    así que basta con escalar esos valores sin densificar la matriz.
+    """
+
+    def __init__(self, n_numeric):
+        self.n_numeric = n_numeric
+
+    def fit(self, X=None, y=None):
+        # Las estadísticas se acumulan con partial_fit; fit() solo permite usarlo en un Pipeline
+        return self
+
+    def partial_fit(self, df, columns):
+        if not hasattr(self, "count_"):
+            self.count_ = 0
+            self.sum_ = np.zeros(self.n_numeric)
+            self.sumsq_ = np.zeros(self.n_numeric)
+        values = df[columns].to_numpy(dtype=float)
+        self.count_ += len(values)
+        self.sum_ += values.sum(axis=0)
+        self.sumsq_ += (values ** 2).sum(axis=0)
+        return self
+
+    @property
+    def mean_(self):
+        return self.sum_ / self.count_
+
+    @property
+    def scale_(self):
+        return np.sqrt(np.maximum(self.sumsq_ / self.count_ - self.mean_ ** 2, 1e-12))
+
+    def transform(self, X):
+        X = X.copy()
+        numeric = X.indices < self.n_numeric
+        columns = X.indices[numeric]
+        X.data[numeric] = (X.data[numeric] - self.mean_[columns]) / self.scale_[columns]
+        return X
@@ -0,0 +1,339 @@
+import pandas as pd
+import numpy as np
+import xlrd
+import hashlib
+import json
+import os
+import resource
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Directorio donde se encuentran los archivos exportados del MAESTRO DE NOTAS
+data_dir = "academic_data"
+
+# Manifiesto con la huella (ruta, tamaño, mtime, hash) de cada archivo ya procesado
+manifest_path = "ingestion_manifest.json"
+
+# Cada archivo procesado se guarda aquí para no volver a leerlo si no cambia
+cache_dir = ".ingestion_cache"
+
+new_column_names = [
+    "Periodo", "Paralelo", "Identificacion_Estudiante", "Estudiante", "Carrera",
+    "Nivel", "Asignatura", "Num_matricula", "Asistencia", "Nota_final",
+    "Estado_Asignatura", "Estado_Matricula", "Tipo_Ingreso", "Cedula_docente",
+    "Nombre_docente"
+]
+
+# Columnas del archivo .xls (0-based) que corresponden a new_column_names.
+# Las columnas 0, 9 y 13 del reporte están vacías.
+source_columns = [1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 14, 15, 16, 17]
+
+# Fila (0-based) del encabezado del reporte. La lectura empieza en ella (igual que
+# iloc[3:] del lector con pandas) y el encabezado se descarta porque su Nota_final
+# no es numérica; r > header_row evita contarlo como fila descartada
+header_row = 3
+
+# Columnas que el lector nativo convierte directamente a número
+numeric_source_columns = ["Num_matricula", "Asistencia", "Nota_final"]
+
+# Textos que pandas.read_excel interpreta como faltantes (se replican en el lector nativo)
+na_strings = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def list_exports(directory=data_dir):
+    """Listar los archivos .xls exportados, ordenados por nombre."""
+    files = [f for f in os.listdir(directory) if f.endswith('.xls')]
+    files.sort()
+    return [os.path.join(directory, f) for f in files]
+
+
+def file_hash(file_path, block_size=1 << 20):
+    """Calcular el hash SHA-256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _number(value):
+    """Valor numérico de una celda (NaN si no es un número), como pd.to_numeric(errors='coerce')."""
+    if isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _is_text(value):
+    """Celda con texto que no es un marcador de faltante."""
+    return isinstance(value, str) and value.strip() not in na_strings
+
+
+def parse_workbook(file_path, require_grade=True, quality=None):
+    """Leer un archivo MAESTRO DE NOTAS directamente desde la hoja de xlrd.
+
+    Se recorren solo las 15 columnas útiles fila por fila: las numéricas van a
+    arreglos float64 y los textos repetidos (Carrera, Nombre_docente...) se
+    guardan una sola vez como categorías. Las filas de encabezado y de pie de
+    página se descartan al vuelo, sin construir el DataFrame completo de la hoja.
+
+    Con require_grade=False se conservan también las matrículas sin nota final
+    (por ejemplo, exportaciones de un periodo en curso que se quieren puntuar).
+
+    Si se entrega un dict quality, se llena con los conteos de calidad de la
+    lectura: matrículas descartadas por no tener nota o tenerla en texto, y
+    textos no numéricos convertidos a NaN en cada columna numérica.
+    """
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        last_column = max(source_columns) + 1
+        positions = dict(zip(new_column_names, source_columns))
+        # Una fila de datos tiene nota final (o, sin exigirla, número de matrícula)
+        key_position = positions['Nota_final' if require_grade else 'Num_matricula']
+        numeric = {name: array('d') for name in numeric_source_columns}
+        text_names = [name for name in new_column_names if name not in numeric]
+        codes = {name: array('i') for name in text_names}
+        vocabularies = {name: {} for name in text_names}
+
+        counts = {"dropped_no_grade": 0, "dropped_text_grade": 0,
+                  "coerced": {name: 0 for name in numeric_source_columns}}
+        for r in range(header_row, sheet.nrows):
+            row = sheet.row_values(r, 0, last_column)
+            if _number(row[key_position]) != _number(row[key_position]):
+                if quality is not None and r > header_row:
+                    # Solo cuentan las filas de matrícula (con número de matrícula), no el pie del reporte
+                    if _is_text(row[key_position]):
+                        counts["dropped_text_grade"] += 1
+                    elif _number(row[positions['Num_matricula']]) == _number(row[positions['Num_matricula']]):
+                        counts["dropped_no_grade"] += 1
+                continue
+            for name, values in numeric.items():
+                value = _number(row[positions[name]])
+                if quality is not None and value != value and _is_text(row[positions[name]]):
+                    counts["coerced"][name] += 1
+                values.append(value)
+            for name in text_names:
+                value = row[positions[name]]
+                if isinstance(value, float) and value.is_integer():
+                    # Igual que pandas: los números enteros de Excel se leen como int
+                    value = int(value)
+                vocabulary = vocabularies[name]
+                code = vocabulary.get(value)
+                if code is None:
+                    code = -1 if isinstance(value, str) and value in na_strings else len(vocabulary)
+                    if code >= 0:
+                        vocabulary[value] = code
+                codes[name].append(code)
+    finally:
+        book.release_resources()
+    if quality is not None:
+        quality.update(counts)
+
+    columns = {}
+    for name in new_column_names:
+        if name in numeric:
+            columns[name] = np.frombuffer(numeric[name], dtype=np.float64)
+        else:
+            columns[name] = pd.Categorical.from_codes(
+                np.frombuffer(codes[name], dtype=np.int32), categories=list(vocabularies[name]))
+    return pd.DataFrame(columns)
+
+
+def parse_workbook_pandas(file_path, require_grade=True):
+    """Lector anterior con pandas.read_excel (se conserva como referencia para benchmark.py)."""
+    # El encabezado real está en la fila 3 y debajo hay filas de metadatos,
+    # por eso se lee sin encabezado y los nombres se asignan manualmente.
+    df_raw = pd.read_excel(file_path, header=None, engine='xlrd')
+
+    df_clean = df_raw.iloc[3:, source_columns].copy()
+    df_clean.columns = new_column_names
+
+    # Limpieza de datos: convertir Nota_final a numérico, forzando errores a NaN
+    df_clean['Nota_final'] = pd.to_numeric(df_clean['Nota_final'], errors='coerce')
+
+    if require_grade:
+        # Eliminar filas donde la Nota_final es NaN (filas de encabezado, pie de página o retiros sin nota)
+        df_clean.dropna(subset=['Nota_final'], inplace=True)
+    else:
+        # Sin exigir nota, una fila de datos es la que tiene número de matrícula
+        df_clean = df_clean[pd.to_numeric(df_clean['Num_matricula'], errors='coerce').notna()]
+    return df_clean
+
+
+def _cache_path(digest):
+    return os.path.join(cache_dir, f"{digest}.pkl")
+
+
+def load_part(entry):
+    """Cargar desde la caché el DataFrame de un archivo del manifiesto."""
+    return pd.read_pickle(_cache_path(entry["sha256"]))
+
+
+def reset_peak_rss():
+    """Reiniciar el pico de memoria del proceso (VmHWM); un trabajador procesa varios archivos."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso actual en MB.
+
+    VmHWM es propio del proceso y se puede reiniciar (reset_peak_rss); ru_maxrss
+    queda como respaldo donde /proc no está disponible.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _parse_and_cache(file_path, digest):
+    """Tarea del pool de procesos: procesar un archivo y guardarlo en la caché.
+
+    Devuelve también filas por segundo, el pico de memoria del proceso al leerlo
+    y los conteos de calidad de la lectura.
+    """
+    try:
+        reset_peak_rss()
+        start = time.perf_counter()
+        quality = {}
+        df_clean = parse_workbook(file_path, quality=quality)
+        seconds = time.perf_counter() - start
+        df_clean.to_pickle(_cache_path(digest))
+        stats = {
+            "seconds": seconds,
+            "rows_per_second": len(df_clean) / seconds if seconds > 0 else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "quality": quality,
+        }
+        return file_path, len(df_clean), None, stats
+    except Exception as e:
+        return file_path, 0, str(e), {}
+
+
+def load_manifest(path=manifest_path):
+    """Cargar el manifiesto de ingesta (vacío si todavía no existe)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=manifest_path):
+    """Guardar el manifiesto de ingesta de forma atómica."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def plan_ingestion(files, manifest):
+    """Separar los archivos en sin cambios y pendientes de procesar.
+
+    Si el tamaño y el mtime coinciden con el manifiesto no se vuelve a leer el
+    archivo; en caso contrario se calcula el hash y solo se procesa si el
+    contenido realmente cambió.
+    """
+    unchanged, pending = {}, {}
+    for file_path in files:
+        stat = os.stat(file_path)
+        entry = manifest.get(file_path)
+        cached = entry is not None and os.path.exists(_cache_path(entry["sha256"]))
+        if cached and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            unchanged[file_path] = entry
+            continue
+
+        digest = file_hash(file_path)
+        new_entry = {
+            "path": file_path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": digest,
+        }
+        if cached and entry["sha256"] == digest:
+            # Solo cambió el mtime (por ejemplo, el archivo se copió de nuevo)
+            new_entry["rows"] = entry["rows"]
+            if "quality" in entry:
+                new_entry["quality"] = entry["quality"]
+            unchanged[file_path] = new_entry
+        else:
+            pending[file_path] = new_entry
+    return unchanged, pending
+
+
+def prune_cache(manifest):
+    """Eliminar de la caché los archivos que ya no figuran en el manifiesto."""
+    live = {os.path.basename(_cache_path(entry["sha256"])) for entry in manifest.values()}
+    for name in os.listdir(cache_dir):
+        if name.endswith(".pkl") and name not in live:
+            os.remove(os.path.join(cache_dir, name))
+
+
+def ingest(directory=data_dir, max_workers=None, full=False):
+    """Procesar en paralelo solo los archivos nuevos o modificados.
+
+    Devuelve el DataFrame consolidado (en el orden de los archivos), el detalle
+    por archivo y un indicador de si el conjunto de datos cambió respecto a la
+    última ejecución.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    files = list_exports(directory)
+    manifest = {} if full else load_manifest()
+    unchanged, pending = plan_ingestion(files, manifest)
+
+    report = [{"file": path, "rows": entry["rows"], "status": "sin cambios"}
+              for path, entry in unchanged.items()]
+
+    if pending:
+        workers = max_workers or os.cpu_count() or 1
+        workers = min(workers, len(pending))
+        tasks = [(path, entry["sha256"]) for path, entry in pending.items()]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_and_cache, *zip(*tasks)))
+        else:
+            results = [_parse_and_cache(path, digest) for path, digest in tasks]
+
+        for file_path, rows, error, stats in results:
+            if error is not None:
+                report.append({"file": file_path, "rows": 0, "status": "error", "error": error})
+                continue
+            pending[file_path]["rows"] = rows
+            # Los conteos de calidad quedan en el manifiesto para el monitor de deriva
+            pending[file_path]["quality"] = stats["quality"]
+            unchanged[file_path] = pending[file_path]
+            report.append({"file": file_path, "rows": rows, "status": "procesado", **stats})
+
+    # Archivos que desaparecieron del directorio ya no forman parte del maestro
+    removed = [path for path in manifest if path not in unchanged]
+    new_manifest = {path: unchanged[path] for path in files if path in unchanged}
+    changed = (
+        full
+        or bool(removed)
+        or any(r["status"] == "procesado" for r in report)
+        or list(new_manifest) != list(manifest)
+    )
+    save_manifest(new_manifest)
+    prune_cache(new_manifest)
+
+    report.sort(key=lambda r: r["file"])
+    if not new_manifest:
+        return None, report, changed
+
+    parts = [load_part(entry) for entry in new_manifest.values()]
+    df_master = pd.concat(parts, ignore_index=True)
+    return df_master, report, changed
@@ -1,77 +1,170 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from xgboost import XGBClassifier
 from sklearn.metrics import roc_auc_score, classification_report
+import argparse
 import json
 import os
+import time
+from data_store import load_master, data_fingerprint
+from features import add_target, build_design_matrix
+from model_registry import publish, registry_dir, RegisteredVersion
+from modeling import candidate_models, make_model, fit_input, supports_early_stopping, load_tuned_params
+from cv_engine import cross_validate
+from evaluation import evaluate, best_threshold
+from tree_export import export_model, export_file, is_tree_model
+from drift_monitor import save_reference
+from ingestion import load_manifest, load_part
 
-# Cargar el DataFrame consolidado
-data_path = "academic_performance_master.csv"
-df = pd.read_csv(data_path)
+parser = argparse.ArgumentParser(description="Comparación de modelos con validación cruzada en paralelo.")
+parser.add_argument("--cores", type=int, default=None,
+                    help="Núcleos disponibles para la validación cruzada (por defecto, todos).")
+parser.add_argument("--folds", type=int, default=5, help="Número de pliegues.")
+parser.add_argument("--strategies", nargs="+", default=["stratified", "grouped"],
+                    choices=["stratified", "grouped"],
+                    help="stratified: k-fold estratificado; grouped: sin repetir estudiantes entre pliegues.")
+parser.add_argument("--early-stopping-rounds", type=int, default=25,
+                    help="Rondas sin mejora antes de detener XGBoost (0 = sin parada temprana).")
+parser.add_argument("--dense-comparison", action="store_true",
+                    help="Medir también el ajuste con la representación alternativa (densa o CSR); "
+                         "cada modelo se ajusta dos veces.")
+parser.add_argument("--default-params", action="store_true",
+                    help="Ignorar tuned_params.json y usar los hiperparámetros por defecto.")
+args = parser.parse_args()
 
-# 1. Preparación de datos (Repetir pasos de codificación para asegurar consistencia)
-df['Exito_Academico'] = df['Estado_Asignatura'].apply(lambda x: 1 if x == 'APROBADO' else 0)
-df_model = df.copy()
+# Hiperparámetros ganadores de tuning.py, si se ejecutó
+tuned_params = {} if args.default_params else load_tuned_params()
+if tuned_params:
+    print(f"Usando hiperparámetros ajustados para: {', '.join(tuned_params)}")
 
-# Codificación de variables categóricas (One-Hot Encoding)
-df_model = pd.get_dummies(df_model, columns=['Tipo_Ingreso', 'Carrera', 'Periodo'], drop_first=True)
+# Cargar el DataFrame consolidado (solo las columnas del modelo y el identificador del estudiante)
+df = load_master(columns=['Asistencia', 'Num_matricula', 'Tipo_Ingreso', 'Carrera', 'Periodo',
+                          'Estado_Asignatura', 'Identificacion_Estudiante'])
 
-# Seleccionar características y variable objetivo
-model_features = [col for col in df_model.columns if col.startswith(('Asistencia', 'Num_matricula', 'Tipo_Ingreso_', 'Carrera_', 'Periodo_'))]
-df_final = df_model[model_features + ['Exito_Academico']].dropna()
+# 1. Preparación de datos (codificador compartido con eda_and_prep.py y app.py).
+# La matriz dispersa se construye una sola vez y se reutiliza en todos los pliegues.
+df = add_target(df)
+X, y, encoder = build_design_matrix(df)
+valid = encoder.valid_mask(df)
+groups = df.loc[valid, 'Identificacion_Estudiante'].cat.codes.to_numpy()
+model_names = list(candidate_models)
 
-X = df_final[model_features]
-y = df_final['Exito_Academico']
+# Memoria de la matriz de diseño: CSR frente a la tabla de pd.get_dummies que se usaba antes
+legacy_frame = pd.get_dummies(df.loc[valid, encoder.numeric + encoder.categorical],
+                              columns=encoder.categorical, drop_first=True)
+memory = {
+    "csr_mb": (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1024 ** 2,
+    "dense_float32_mb": X.shape[0] * X.shape[1] * 4 / 1024 ** 2,
+    "get_dummies_mb": legacy_frame.memory_usage(deep=True).sum() / 1024 ** 2,
+}
+del legacy_frame
 
-# 2. División de datos
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+# 2. Validación cruzada de todos los modelos en paralelo
+print(f"Validación cruzada ({args.folds} pliegues, {', '.join(args.strategies)})...")
+cv_summary, cv_settings = cross_validate(
+    X, y, model_names, groups=groups, strategies=args.strategies, n_splits=args.folds,
+    cores=args.cores, params=tuned_params, early_stopping_rounds=args.early_stopping_rounds,
+)
+print(f"Validación cruzada completada en {cv_settings['wall_seconds']:.1f} s "
+      f"con {cv_settings['workers']} procesos")
+for name in model_names:
+    for strategy, stats in cv_summary[name].items():
+        print(f"  {name} [{strategy}] - AUC: {stats['AUC_mean']:.4f} ± {stats['AUC_std']:.4f}, "
+              f"ajuste: {stats['fit_seconds_total']:.1f} s, memoria pico: {stats['peak_rss_mb_max']:.0f} MB")
 
-# 3. Definición y entrenamiento de modelos
-models = {
-    "Logistic Regression": LogisticRegression(max_iter=1000, solver='liblinear', random_state=42),
-    "Random Forest": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
-    "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42, n_jobs=-1)
-}
+# El mejor modelo se elige por el AUC medio de la validación cruzada
+# (la agrupada por estudiante, si se ejecutó, por ser la más exigente)
+selection_strategy = "grouped" if "grouped" in args.strategies else args.strategies[0]
+best_model_name = max(model_names, key=lambda name: cv_summary[name][selection_strategy]["AUC_mean"])
+
+# 3. División de datos para el modelo final y las curvas de la aplicación
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
+models = {}
 results = {}
-best_model_name = None
-best_auc = -1
+test_probas = {}
 
-print("Iniciando entrenamiento y evaluación de modelos...")
+print("Entrenando los modelos finales...")
 
-for name, model in models.items():
-    print(f"Entrenando {name}...")
-    model.fit(X_train, y_train)
-    
-    # Predicción
+for name in model_names:
+    params = dict(tuned_params.get(name, {}))
+    # XGBoost usa el número de árboles encontrado por la parada temprana en la validación cruzada
+    if supports_early_stopping(name) and args.early_stopping_rounds:
+        params["n_estimators"] = cv_summary[name][selection_strategy]["best_iteration_median"] + 1
+    model = make_model(name, params, n_jobs=args.cores or -1)
+    X_fit = fit_input(name, X_train)
+    start = time.perf_counter()
+    model.fit(X_fit, y_train)
+    fit_seconds = time.perf_counter() - start
+    models[name] = model
+
+    # El mismo ajuste con la otra representación, solo para medir el tiempo
+    dense_fit = X_fit is not X_train
+    fit_times = {"input": "densa" if dense_fit else "csr", "fit_seconds": fit_seconds}
+    if args.dense_comparison:
+        other = X_train if dense_fit else X_train.toarray()
+        start = time.perf_counter()
+        make_model(name, params, n_jobs=args.cores or -1).fit(other, y_train)
+        other_seconds = time.perf_counter() - start
+        fit_times["fit_seconds_csr"] = other_seconds if dense_fit else fit_seconds
+        fit_times["fit_seconds_dense"] = fit_seconds if dense_fit else other_seconds
+        del other
+
+    # Predicción: un solo paso por el modelo; la clase se deriva de la probabilidad
     y_proba = model.predict_proba(X_test)[:, 1]
-    y_pred = model.predict(X_test)
-    
+    y_pred = (y_proba >= 0.5).astype(int)
+
     # Evaluación
     auc_score = roc_auc_score(y_test, y_proba)
     report = classification_report(y_test, y_pred, output_dict=True)
-    
+
     results[name] = {
         "AUC": auc_score,
-        "Report": report
+        "Report": report,
+        "CV": cv_summary[name],
+        "Ajuste": fit_times,
     }
-    
-    if auc_score > best_auc:
-        best_auc = auc_score
-        best_model_name = name
-        
-    print(f"{name} - AUC: {auc_score:.4f}")
+    test_probas[name] = y_proba
+
+    optimal, _ = best_threshold(evaluate(y_test, y_proba))
+    print(f"{name} - AUC (prueba): {auc_score:.4f}; umbral de menor costo: {optimal:.3f}")
 
 # 4. Guardar resultados de la comparación
 with open("model_comparison_results.json", "w") as f:
     json.dump(results, f, indent=4)
 
-# 5. Guardar el mejor modelo (solo el nombre)
+# 5. Guardar el nombre del mejor modelo
 with open("best_model_name.txt", "w") as f:
     f.write(best_model_name)
 
-print(f"\nComparación de modelos completada. El mejor modelo es: {best_model_name} con AUC: {best_auc:.4f}")
+# 6. Publicar los modelos ajustados, el codificador y las métricas en el registro
+version = publish(
+    models, encoder, results, best_model_name,
+    data_fingerprint=data_fingerprint(),
+    y_test=y_test, test_probas=test_probas,
+    extra={"cv": dict(cv_settings, selection_strategy=selection_strategy), "tuned_params": tuned_params,
+           "design_matrix_memory": memory},
+)
+
+# 7. Exportar los modelos de árboles a arreglos planos (ruta rápida del predictor)
+for name, model in models.items():
+    if is_tree_model(model):
+        export_model(model).save(os.path.join(registry_dir, version, export_file(name)))
+
+# 8. Perfil de los datos de entrenamiento para el monitor de deriva
+save_reference(RegisteredVersion(version), load_manifest(), load_part)
+
+print(f"\nMatriz de diseño ({X.shape[0]} filas x {X.shape[1]} variables): CSR {memory['csr_mb']:.1f} MB, "
+      f"densa float32 {memory['dense_float32_mb']:.1f} MB, get_dummies {memory['get_dummies_mb']:.1f} MB")
+for name in model_names:
+    fit_times = results[name]["Ajuste"]
+    line = f"  {name}: ajuste con {fit_times['input']} en {fit_times['fit_seconds']:.2f} s"
+    if "fit_seconds_dense" in fit_times and "fit_seconds_csr" in fit_times:
+        line += f" (CSR {fit_times['fit_seconds_csr']:.2f} s, densa {fit_times['fit_seconds_dense']:.2f} s)"
+    print(line)
+
+best_cv_auc = cv_summary[best_model_name][selection_strategy]["AUC_mean"]
+print(f"\nComparación de modelos completada. El mejor modelo es: {best_model_name} "
+      f"con AUC de validación cruzada ({selection_strategy}): {best_cv_auc:.4f}")
 print("Resultados guardados en model_comparison_results.json")
 print("Nombre del mejor modelo guardado en best_model_name.txt")
+print(f"Modelos publicados en el registro como versión {version}")
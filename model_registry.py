@@ -0,0 +1,144 @@
+import numpy as np
+import joblib
+import json
+import os
+import re
+from datetime import datetime
+from features import FeatureEncoder
+
+# Registro de modelos: cada publicación crea una carpeta vNNNN y CURRENT apunta a la vigente
+registry_dir = "model_registry"
+current_file = "CURRENT"
+
+
+def model_slug(name):
+    """Nombre de archivo para un modelo ("Random Forest" -> "random_forest")."""
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def list_versions(path=registry_dir):
+    """Versiones publicadas, de la más antigua a la más reciente."""
+    if not os.path.exists(path):
+        return []
+    return sorted(name for name in os.listdir(path) if re.fullmatch(r"v\d{4}", name))
+
+
+def current_version(path=registry_dir):
+    """Versión vigente según CURRENT (None si no hay ninguna publicada)."""
+    pointer = os.path.join(path, current_file)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r") as f:
+        return f.read().strip()
+
+
+def publish(models, encoder, metrics, best_model_name, data_fingerprint,
+            y_test=None, test_probas=None, extra=None, path=registry_dir):
+    """Publicar los modelos ajustados como una nueva versión y marcarla como vigente.
+
+    models: diccionario nombre -> estimador ajustado.
+    metrics: métricas por modelo (las mismas de model_comparison_results.json).
+    y_test, test_probas: etiquetas y probabilidades del conjunto de prueba, para
+    que la aplicación muestre curvas ROC sin volver a predecir.
+    """
+    versions = list_versions(path)
+    number = int(versions[-1][1:]) + 1 if versions else 1
+    version = f"v{number:04d}"
+    version_dir = os.path.join(path, version)
+    os.makedirs(os.path.join(version_dir, "models"))
+
+    model_files = {}
+    for name, model in models.items():
+        file_name = os.path.join("models", f"{model_slug(name)}.joblib")
+        # Sin compresión para que los arreglos numpy se puedan mapear en memoria al cargar
+        joblib.dump(model, os.path.join(version_dir, file_name))
+        model_files[name] = file_name
+
+    encoder.save(os.path.join(version_dir, "encoder.json"))
+
+    if y_test is not None and test_probas is not None:
+        np.savez(
+            os.path.join(version_dir, "test_predictions.npz"),
+            y_test=np.asarray(y_test),
+            **{model_slug(name): np.asarray(proba) for name, proba in test_probas.items()},
+        )
+
+    metadata = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "best_model": best_model_name,
+        "models": model_files,
+        "feature_names": encoder.feature_names_,
+        "metrics": metrics,
+        "data_fingerprint": data_fingerprint,
+    }
+    if extra:
+        metadata.update(extra)
+    with open(os.path.join(version_dir, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=4, ensure_ascii=False)
+
+    # CURRENT se reemplaza de forma atómica al final, cuando la versión está completa
+    tmp_pointer = os.path.join(path, current_file + ".tmp")
+    with open(tmp_pointer, "w") as f:
+        f.write(version)
+    os.replace(tmp_pointer, os.path.join(path, current_file))
+    return version
+
+
+class RegisteredVersion:
+    """Versión publicada del registro. Los modelos se cargan solo cuando se piden."""
+
+    def __init__(self, version=None, path=registry_dir):
+        version = version or current_version(path)
+        if version is None:
+            raise FileNotFoundError(
+                f"No hay modelos publicados en {path}. Ejecuta primero model_comparison.py."
+            )
+        self.version = version
+        self.version_dir = os.path.join(path, version)
+        with open(os.path.join(self.version_dir, "metadata.json"), "r") as f:
+            self.metadata = json.load(f)
+        self._models = {}
+        self._encoder = None
+        self._test_predictions = None
+
+    @property
+    def best_model_name(self):
+        return self.metadata["best_model"]
+
+    @property
+    def model_names(self):
+        return list(self.metadata["models"])
+
+    @property
+    def metrics(self):
+        return self.metadata["metrics"]
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            self._encoder = FeatureEncoder.load(os.path.join(self.version_dir, "encoder.json"))
+        return self._encoder
+
+    def model(self, name=None):
+        """Cargar un modelo (por defecto, el mejor), mapeando sus arreglos en memoria."""
+        name = name or self.best_model_name
+        if name not in self._models:
+            file_path = os.path.join(self.version_dir, self.metadata["models"][name])
+            self._models[name] = joblib.load(file_path, mmap_mode="r")
+        return self._models[name]
+
+    def test_predictions(self):
+        """Etiquetas y probabilidades del conjunto de prueba guardadas al publicar."""
+        if self._test_predictions is None:
+            data = np.load(os.path.join(self.version_dir, "test_predictions.npz"))
+            self._test_predictions = {
+                "y_test": data["y_test"],
+                "probas": {name: data[model_slug(name)] for name in self.model_names},
+            }
+        return self._test_predictions
+
+
+def load_current(path=registry_dir):
+    """Abrir la versión vigente del registro."""
+    return RegisteredVersion(path=path)
@@ -0,0 +1,65 @@
+import json
+import os
+import scipy.sparse as sp
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+# Modelos candidatos y sus hiperparámetros por defecto
+candidate_models = {
+    "Logistic Regression": (LogisticRegression, {"max_iter": 1000, "solver": "liblinear", "random_state": 42}),
+    "Random Forest": (RandomForestClassifier, {"n_estimators": 100, "random_state": 42}),
+    "XGBoost": (XGBClassifier, {"eval_metric": "logloss", "random_state": 42}),
+}
+
+# Máximo de árboles de XGBoost cuando se usa parada temprana
+xgb_max_estimators = 500
+
+# Random Forest de sklearn entrena varias veces más lento con CSR (usa un divisor
+# disperso); si la copia densa del bloque es pequeña se ajusta con ella. XGBoost
+# nunca se densifica: trata las entradas ausentes de la CSR como faltantes.
+dense_fit_models = {"Random Forest"}
+dense_fit_max_bytes = 256 * 1024 ** 2
+
+
+def make_model(name, params=None, n_jobs=1):
+    """Crear un modelo candidato con sus parámetros por defecto (y los que se indiquen)."""
+    model_class, defaults = candidate_models[name]
+    kwargs = dict(defaults)
+    kwargs.update(params or {})
+    if model_class is not LogisticRegression:
+        kwargs["n_jobs"] = n_jobs
+    return model_class(**kwargs)
+
+
+def fit_input(name, X):
+    """Matriz con la que se ajusta un modelo: la CSR, o su copia densa si conviene."""
+    if name in dense_fit_models and sp.issparse(X):
+        if X.shape[0] * X.shape[1] * X.dtype.itemsize <= dense_fit_max_bytes:
+            return X.toarray()
+    return X
+
+
+def supports_early_stopping(name):
+    return candidate_models[name][0] is XGBClassifier
+
+
+def xgb_used_rounds(model):
+    """Rondas de XGBoost que usa predict_proba: hasta best_iteration si hubo parada temprana."""
+    try:
+        return model.best_iteration + 1
+    except AttributeError:
+        return model.get_booster().num_boosted_rounds()
+
+
+# Hiperparámetros ganadores de tuning.py (si existe el archivo, model_comparison.py los usa)
+tuned_params_path = "tuned_params.json"
+
+
+def load_tuned_params(path=tuned_params_path):
+    """Parámetros ajustados por modelo: {nombre: {parámetro: valor}} (vacío si no hay búsqueda)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        tuned = json.load(f)
+    return {name: entry["params"] for name, entry in tuned.items() if name in candidate_models}
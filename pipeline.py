@@ -0,0 +1,297 @@
+import pandas as pd
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Ejecutor del flujo completo: cada script es una etapa con entradas y salidas declaradas.
+# Una etapa se omite si la huella de su código, entradas y argumentos ya está en la caché;
+# si además sus salidas cambiaron, se restauran desde la caché sin volver a ejecutarla.
+cache_dir = ".pipeline_cache"
+objects_dir = os.path.join(cache_dir, "objects")
+stages_dir = os.path.join(cache_dir, "stages")
+logs_dir = os.path.join(cache_dir, "logs")
+hash_memo_path = os.path.join(cache_dir, "file_hashes.json")
+
+stages = {
+    "load_data": {
+        "script": "load_data.py",
+        "inputs": ["academic_data"],
+        "outputs": ["data_structure.txt"],
+        "deps": [],
+    },
+    "process_data": {
+        "script": "process_data.py",
+        "inputs": ["academic_data"],
+        "outputs": ["academic_store", "eda_cube/cube.parquet", "eda_cube/joint.parquet", "eda_cube/summary.json",
+                    "dimensions", "feature_store", "drift_monitor/profiles", "ingestion_manifest.json",
+                    "master_data_summary.txt"],
+        "deps": [],
+    },
+    "eda_and_prep": {
+        "script": "eda_and_prep.py",
+        "inputs": ["academic_store", "dimensions", "eda_cube/cube.parquet", "eda_cube/joint.parquet"],
+        "outputs": ["nota_final_distribution.png", "success_rate_by_period.png", "attendance_vs_grade.png",
+                    "success_rate_by_career.png", "model_features_summary.txt"],
+        "deps": ["process_data"],
+    },
+    "predictive_model": {
+        "script": "predictive_model.py",
+        "inputs": ["academic_store", "dimensions"],
+        "outputs": ["model_performance_report.txt", "roc_curve.png"],
+        "deps": ["process_data"],
+    },
+    "model_comparison": {
+        "script": "model_comparison.py",
+        # Publica además una versión nueva en model_registry; CURRENT es salida de la etapa, así
+        # si otra herramienta lo movió la etapa no queda "al día" y se restaura su versión
+        "inputs": ["academic_store", "dimensions", "tuned_params.json"],
+        "outputs": ["model_comparison_results.json", "best_model_name.txt", "model_registry/CURRENT"],
+        "deps": ["process_data"],
+    },
+    "drift_monitor": {
+        "script": "drift_monitor.py",
+        # Los resultados dependen de la versión vigente del registro, no solo de los archivos
+        "inputs": ["ingestion_manifest.json", "drift_monitor/profiles", "model_registry/CURRENT"],
+        "outputs": ["drift_monitor/results.json"],
+        "deps": ["process_data", "model_comparison"],
+    },
+}
+
+
+class FileHasher:
+    """sha256 de archivos con memoria por (tamaño, fecha de modificación) entre ejecuciones."""
+
+    def __init__(self, path=hash_memo_path):
+        self.path = path
+        self.memo = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.memo = json.load(f)
+
+    def file(self, file_path):
+        stat = os.stat(file_path)
+        key = f"{stat.st_size}:{stat.st_mtime_ns}"
+        entry = self.memo.get(file_path)
+        if entry and entry["key"] == key:
+            return entry["sha256"]
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.memo[file_path] = {"key": key, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def files(self, path):
+        """Archivos bajo una ruta (archivo o directorio) con su hash; vacío si no existe."""
+        if os.path.isfile(path):
+            return {path: self.file(path)}
+        found = {}
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    file_path = os.path.join(root, name)
+                    found[file_path] = self.file(file_path)
+        return found
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.memo, f)
+        os.replace(tmp_path, self.path)
+
+
+def local_modules(script, seen=None):
+    """El script y los módulos del proyecto que importa (directa o indirectamente)."""
+    seen = seen if seen is not None else set()
+    if script in seen or not os.path.exists(script):
+        return seen
+    seen.add(script)
+    with open(script, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            local_modules(f"{name.split('.')[0]}.py", seen)
+    return seen
+
+
+def stage_key(name, hasher, args=()):
+    """Huella de una etapa: código (con sus módulos locales), entradas y argumentos."""
+    stage = stages[name]
+    digest = hashlib.sha256(name.encode())
+    for module in sorted(local_modules(stage["script"])):
+        digest.update(f"code:{module}:{hasher.file(module)}\n".encode())
+    for path in stage["inputs"]:
+        files = hasher.files(path)
+        if not files:
+            digest.update(f"input:{path}:ausente\n".encode())
+        for file_path, file_hash in files.items():
+            digest.update(f"input:{file_path}:{file_hash}\n".encode())
+    digest.update(json.dumps(list(args)).encode())
+    return digest.hexdigest()
+
+
+def snapshot_outputs(name, hasher):
+    outputs = {}
+    for path in stages[name]["outputs"]:
+        outputs.update(hasher.files(path))
+    return outputs
+
+
+def store_outputs(name, key, outputs, seconds):
+    """Guardar las salidas por contenido (objects/<sha256>) y el registro de la etapa."""
+    for file_path, file_hash in outputs.items():
+        object_path = os.path.join(objects_dir, file_hash)
+        if not os.path.exists(object_path):
+            shutil.copyfile(file_path, f"{object_path}.tmp")
+            os.replace(f"{object_path}.tmp", object_path)
+    record = {"stage": name, "key": key, "outputs": outputs, "seconds": seconds}
+    with open(os.path.join(stages_dir, f"{key}.json"), "w") as f:
+        json.dump(record, f, indent=2)
+
+
+def load_record(key):
+    path = os.path.join(stages_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        record = json.load(f)
+    # Un registro sin todos sus objetos no sirve para restaurar
+    if all(os.path.exists(os.path.join(objects_dir, h)) for h in record["outputs"].values()):
+        return record
+    return None
+
+
+def restore_outputs(name, record):
+    """Reemplazar las salidas actuales por las guardadas en la caché."""
+    for path in stages[name]["outputs"]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    for file_path, file_hash in record["outputs"].items():
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        shutil.copyfile(os.path.join(objects_dir, file_hash), file_path)
+
+
+def run_script(name, args):
+    """Ejecutar el script de una etapa en un proceso aparte y guardar su salida en logs/."""
+    start = time.perf_counter()
+    log_path = os.path.join(logs_dir, f"{name}.log")
+    with open(log_path, "w") as log:
+        returncode = subprocess.run(
+            [sys.executable, stages[name]["script"], *args],
+            stdout=log, stderr=subprocess.STDOUT,
+            env=dict(os.environ, MPLBACKEND="Agg"),
+        ).returncode
+    return returncode, time.perf_counter() - start, log_path
+
+
+def with_dependencies(targets):
+    selected = []
+
+    def visit(name):
+        for dep in stages[name]["deps"]:
+            visit(dep)
+        if name not in selected:
+            selected.append(name)
+
+    for name in targets:
+        visit(name)
+    return selected
+
+
+def run_pipeline(targets=None, jobs=2, force=False, stage_args=None, dry_run=False):
+    """Ejecutar las etapas pedidas (y sus dependencias); las independientes corren en paralelo."""
+    for path in (objects_dir, stages_dir, logs_dir):
+        os.makedirs(path, exist_ok=True)
+    stage_args = stage_args or {}
+    selected = with_dependencies(targets or list(stages))
+    hasher = FileHasher()
+    report = {}
+    pending = list(selected)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for name in list(pending):
+                deps = stages[name]["deps"]
+                # Si una dependencia falló o se omitió, sus entradas no están actualizadas
+                if any(report.get(dep, {}).get("estado") in ("error", "omitido") for dep in deps):
+                    report[name] = {"estado": "omitido", "segundos": 0.0}
+                    pending.remove(name)
+                    continue
+                if not all(dep in report for dep in deps) or len(running) >= jobs:
+                    continue
+                pending.remove(name)
+
+                # Las entradas se leen cuando las dependencias ya terminaron
+                args = stage_args.get(name, [])
+                key = stage_key(name, hasher, args)
+                record = None if force else load_record(key)
+                if record is not None:
+                    current = snapshot_outputs(name, hasher)
+                    if current == record["outputs"]:
+                        report[name] = {"estado": "al día", "segundos": 0.0, "clave": key[:12]}
+                    else:
+                        restore_outputs(name, record)
+                        report[name] = {"estado": "restaurado", "segundos": 0.0, "clave": key[:12]}
+                    continue
+                if dry_run:
+                    report[name] = {"estado": "pendiente", "segundos": 0.0, "clave": key[:12]}
+                    continue
+                print(f"Ejecutando {name}...")
+                running[executor.submit(run_script, name, args)] = (name, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                returncode, seconds, log_path = future.result()
+                if returncode != 0:
+                    report[name] = {"estado": "error", "segundos": seconds, "clave": key[:12]}
+                    print(f"La etapa {name} falló; ver {log_path}")
+                    continue
+                store_outputs(name, key, snapshot_outputs(name, hasher), seconds)
+                report[name] = {"estado": "ejecutado", "segundos": seconds, "clave": key[:12]}
+                print(f"{name} terminó en {seconds:.1f} s")
+
+    hasher.save()
+    return [dict(etapa=name, **report[name]) for name in selected]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecutar el flujo completo con caché por etapa.")
+    parser.add_argument("stages", nargs="*",
+                        help=f"Etapas a ejecutar (con sus dependencias); por defecto, todas: {', '.join(stages)}.")
+    parser.add_argument("--jobs", type=int, default=2, help="Etapas que pueden correr a la vez.")
+    parser.add_argument("--force", action="store_true", help="Ejecutar aunque la caché esté al día.")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué etapas se ejecutarían.")
+    parser.add_argument("--stage-args", default="{}",
+                        help='Argumentos por etapa en JSON, p. ej. \'{"model_comparison": ["--cores", "2"]}\'.')
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in stages]
+    if unknown:
+        parser.error(f"Etapas desconocidas: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    report = run_pipeline(args.stages, args.jobs, args.force, json.loads(args.stage_args), args.dry_run)
+    print("\nResumen del flujo:")
+    print(pd.DataFrame(report).to_markdown(index=False, floatfmt=".1f"))
+    print(f"\nTiempo total: {time.perf_counter() - start:.1f} s")
+    with open(os.path.join(cache_dir, "last_run.json"), "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    if any(row["estado"] == "error" for row in report):
+        sys.exit(1)
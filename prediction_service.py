@@ -0,0 +1,278 @@
+import pandas as pd
+import numpy as np
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from batch_score import positive_proba, threshold
+from model_registry import RegisteredVersion
+
+# Campos que debe incluir cada estudiante a puntuar (los mismos del predictor de app.py)
+required_fields = ["Asistencia", "Num_matricula", "Tipo_Ingreso", "Carrera", "Periodo"]
+
+reason_phrases = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class ServiceMetrics:
+    """Contadores de throughput y percentiles de latencia (ventana de las últimas solicitudes)."""
+
+    def __init__(self, window=10000):
+        self.started = time.perf_counter()
+        self.latencies_ms = deque(maxlen=window)
+        self.completed = deque(maxlen=window)
+        self.requests = 0
+        self.instances = 0
+        self.batches = 0
+        self.batched_instances = 0
+        self.errors = 0
+
+    def record_request(self, latency_ms, n_instances):
+        self.requests += 1
+        self.instances += n_instances
+        self.latencies_ms.append(latency_ms)
+        self.completed.append(time.perf_counter())
+
+    def record_batch(self, n_instances):
+        self.batches += 1
+        self.batched_instances += n_instances
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies_ms, dtype=float)
+        percentiles = {}
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            percentiles = {"p50": p50, "p90": p90, "p99": p99, "max": latencies.max()}
+        # Throughput de los últimos 60 segundos
+        now = time.perf_counter()
+        recent = sum(1 for t in self.completed if now - t <= 60)
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "instances": self.instances,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_instances / self.batches if self.batches else 0.0,
+            "requests_per_second": self.requests / uptime if uptime > 0 else 0.0,
+            "requests_per_second_last_60s": recent / min(60.0, uptime) if uptime > 0 else 0.0,
+            "latency_ms": percentiles,
+        }
+
+
+class MicroBatcher:
+    """Agrupa solicitudes concurrentes en un solo llamado a predict_proba.
+
+    Cada solicitud espera como máximo max_wait_ms a que lleguen otras antes de
+    puntuarse; un lote nunca supera max_batch_size estudiantes.
+    """
+
+    def __init__(self, model, encoder, metrics, max_batch_size=256, max_wait_ms=5.0):
+        self.model = model
+        self.encoder = encoder
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+
+    async def predict(self, df):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((df, future))
+        return await future
+
+    def _score(self, frames):
+        df = pd.concat(frames, ignore_index=True)
+        return positive_proba(self.model, self.encoder.transform(df))
+
+    def _score_each(self, frames):
+        """Puntuar cada solicitud por separado; el error de una no afecta a las demás."""
+        results = []
+        for frame in frames:
+            try:
+                results.append(self._score([frame]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            df, future = await self.queue.get()
+            batch = [(df, future)]
+            size = len(df)
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    df, future = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append((df, future))
+                size += len(df)
+
+            try:
+                # El modelo corre en un hilo para no bloquear la aceptación de nuevas solicitudes
+                proba = await loop.run_in_executor(None, self._score, [item[0] for item in batch])
+            except Exception:
+                # Un lote fallido se repite solicitud por solicitud: solo falla la que trae el problema
+                results = await loop.run_in_executor(None, self._score_each, [item[0] for item in batch])
+                for (frame, pending), result in zip(batch, results):
+                    if pending.done():
+                        continue
+                    if isinstance(result, Exception):
+                        pending.set_exception(result)
+                    else:
+                        self.metrics.record_batch(len(frame))
+                        pending.set_result(result)
+                continue
+
+            self.metrics.record_batch(size)
+            offset = 0
+            for frame, pending in batch:
+                if not pending.done():
+                    pending.set_result(proba[offset:offset + len(frame)])
+                offset += len(frame)
+
+
+def parse_instances(payload):
+    """Aceptar un estudiante ({...}) o varios ({"instances": [...]})."""
+    instances = payload.get("instances", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(instances, list) or not instances:
+        raise ValueError("Se esperaba un objeto o una lista no vacía en 'instances'.")
+    for i, instance in enumerate(instances):
+        if not isinstance(instance, dict):
+            raise ValueError(f"Instancia {i}: se esperaba un objeto con los campos {', '.join(required_fields)}.")
+        missing = [field for field in required_fields if instance.get(field) is None]
+        if missing:
+            raise ValueError(f"Instancia {i}: faltan los campos {', '.join(missing)}.")
+    df = pd.DataFrame(instances, columns=required_fields)
+    for col in ["Asistencia", "Num_matricula"]:
+        df[col] = pd.to_numeric(df[col], errors="raise")
+        # json.loads acepta NaN e Infinity; el modelo no
+        not_finite = np.flatnonzero(~np.isfinite(df[col].to_numpy(dtype=float)))
+        if len(not_finite):
+            raise ValueError(f"Instancia {not_finite[0]}: {col} debe ser un número finito.")
+    for col in ["Tipo_Ingreso", "Carrera", "Periodo"]:
+        df[col] = df[col].astype(str)
+    return df
+
+
+class PredictionService:
+    """Servicio HTTP local (sin dependencias externas) para puntuar estudiantes."""
+
+    def __init__(self, registry, max_batch_size=256, max_wait_ms=5.0, max_body_bytes=10 * 1024 * 1024):
+        self.registry = registry
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(registry.model(), registry.encoder, self.metrics,
+                                    max_batch_size, max_wait_ms)
+        self.max_body_bytes = max_body_bytes
+
+    async def handle_predict(self, body):
+        start = time.perf_counter()
+        df = parse_instances(json.loads(body))
+        proba = await self.batcher.predict(df)
+        predictions = [
+            {
+                "Prob_Aprobacion": float(p),
+                "Prediccion": "APROBADO" if p >= threshold else "NO APROBADO",
+            }
+            for p in proba
+        ]
+        self.metrics.record_request((time.perf_counter() - start) * 1000, len(df))
+        return 200, {
+            "model": self.registry.best_model_name,
+            "version": self.registry.version,
+            "predictions": predictions,
+        }
+
+    async def route(self, method, path, body):
+        if path == "/predict":
+            if method != "POST":
+                return 405, {"error": "Use POST."}
+            try:
+                return await self.handle_predict(body)
+            except (ValueError, TypeError, json.JSONDecodeError) as e:
+                self.metrics.errors += 1
+                return 400, {"error": str(e)}
+        if path == "/metrics" and method == "GET":
+            return 200, self.metrics.snapshot()
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "model": self.registry.best_model_name,
+                         "version": self.registry.version}
+        return 404, {"error": f"Ruta no encontrada: {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > self.max_body_bytes:
+                    status, payload = 413, {"error": "Solicitud demasiado grande."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b"{}"
+                    try:
+                        status, payload = await self.route(method, path.split("?", 1)[0], body)
+                    except Exception as e:
+                        self.metrics.errors += 1
+                        status, payload = 500, {"error": str(e)}
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {reason_phrases.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8600):
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Servicio de predicción ({self.registry.best_model_name}, versión "
+              f"{self.registry.version}) escuchando en http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de predicción de rendimiento académico.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=256, help="Máximo de estudiantes por lote.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="Tiempo máximo que una solicitud espera para agruparse con otras.")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    args = parser.parse_args()
+
+    service = PredictionService(RegisteredVersion(args.version), args.max_batch, args.max_wait_ms)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
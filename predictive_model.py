@@ -4,24 +4,16 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, roc_auc_score, roc_curve
 import matplotlib.pyplot as plt
 import numpy as np
+from data_store import load_master
+from features import add_target, build_design_matrix
 
-# Cargar el DataFrame consolidado
-data_path = "academic_performance_master.csv"
-df = pd.read_csv(data_path)
+# Cargar el DataFrame consolidado (solo las columnas del modelo)
+df = load_master(columns=['Asistencia', 'Num_matricula', 'Tipo_Ingreso', 'Carrera', 'Periodo', 'Estado_Asignatura'])
 
-# 1. Preparación de datos (Repetir pasos de codificación para asegurar consistencia)
-df['Exito_Academico'] = df['Estado_Asignatura'].apply(lambda x: 1 if x == 'APROBADO' else 0)
-df_model = df.copy()
-
-# Codificación de variables categóricas (One-Hot Encoding)
-df_model = pd.get_dummies(df_model, columns=['Tipo_Ingreso', 'Carrera', 'Periodo'], drop_first=True)
-
-# Seleccionar características y variable objetivo
-model_features = [col for col in df_model.columns if col.startswith(('Asistencia', 'Num_matricula', 'Tipo_Ingreso_', 'Carrera_', 'Periodo_'))]
-df_final = df_model[model_features + ['Exito_Academico']].dropna()
-
-X = df_final[model_features]
-y = df_final['Exito_Academico']
+# 1. Preparación de datos (codificador compartido con eda_and_prep.py y app.py)
+df = add_target(df)
+X, y, encoder = build_design_matrix(df)
+model_features = encoder.feature_names_
 
 # 2. División de datos
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
@@ -40,7 +32,7 @@ auc_score = roc_auc_score(y_test, y_proba)
 
 # Coeficientes del modelo (para identificar predictores clave)
 coefficients = pd.DataFrame({
-    'Feature': X.columns,
+    'Feature': model_features,
     'Coefficient': model.coef_[0]
 }).sort_values(by='Coefficient', ascending=False)
 
@@ -0,0 +1,179 @@
+import pandas as pd
+import numpy as np
+import xgboost as xgb
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.metrics import roc_auc_score, classification_report
+from data_store import store_dir, iter_master_batches, data_fingerprint
+from features import FeatureEncoder, NumericScaler, add_target
+from ingestion import peak_rss_mb
+from model_registry import publish
+
+# Entrenamiento por bloques: el dataset maestro nunca se carga completo.
+# La división es por estudiante (hash de Identificacion_Estudiante en 10 cubetas):
+# 0-2 prueba, 3 validación (parada temprana de XGBoost), 4-9 entrenamiento.
+model_columns = ['Asistencia', 'Num_matricula', 'Tipo_Ingreso', 'Carrera', 'Periodo',
+                 'Estado_Asignatura', 'Identificacion_Estudiante']
+split_buckets = {"test": (0, 1, 2), "valid": (3,), "train": (4, 5, 6, 7, 8, 9)}
+
+
+def split_of(df):
+    """Cubeta (0-9) de cada fila según el estudiante; estable entre ejecuciones."""
+    hashes = pd.util.hash_pandas_object(df['Identificacion_Estudiante'].astype(str), index=False)
+    return (hashes.to_numpy() % 10).astype(np.int8)
+
+
+def iter_encoded(encoder, split, path=store_dir, batch_size=50000, scaler=None):
+    """Bloques (X CSR, y) de una partición, codificados con el codificador ya ajustado."""
+    for df in iter_master_batches(columns=model_columns, batch_size=batch_size, path=path):
+        df = add_target(df)
+        keep = encoder.valid_mask(df) & np.isin(split_of(df), split_buckets[split])
+        if not keep.any():
+            continue
+        df = df.loc[keep]
+        X = encoder.transform(df)
+        if scaler is not None:
+            X = scaler.transform(X)
+        yield X, df['Exito_Academico'].to_numpy()
+
+
+def fit_encoder(path=store_dir, batch_size=50000):
+    """Primera pasada: vocabulario, estadísticas numéricas y conteo de filas por partición."""
+    encoder = FeatureEncoder()
+    scaler = NumericScaler(len(encoder.numeric))
+    counts = {split: 0 for split in split_buckets}
+    for df in iter_master_batches(columns=model_columns, batch_size=batch_size, path=path):
+        df = df.loc[encoder.valid_mask(df)]
+        encoder.partial_fit(df)
+        buckets = split_of(df)
+        for split, values in split_buckets.items():
+            in_split = np.isin(buckets, values)
+            counts[split] += int(in_split.sum())
+            if split == "train":
+                scaler.partial_fit(df.loc[in_split], encoder.numeric)
+    return encoder, scaler, counts
+
+
+class StoreIter(xgb.DataIter):
+    """Iterador de XGBoost sobre los bloques del almacén (memoria externa)."""
+
+    def __init__(self, encoder, split, path, batch_size, cache_prefix):
+        self.encoder = encoder
+        self.split = split
+        self.path = path
+        self.batch_size = batch_size
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = iter_encoded(self.encoder, self.split, self.path, self.batch_size)
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        input_data(data=batch[0], label=batch[1])
+        return True
+
+    def reset(self):
+        self._batches = None
+
+
+def train_sgd(encoder, scaler, path, batch_size, epochs=5, seed=42):
+    """Regresión logística incremental (SGD con pérdida logística) bloque a bloque."""
+    model = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=seed)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        for X, y in iter_encoded(encoder, "train", path, batch_size, scaler):
+            order = rng.permutation(X.shape[0])
+            model.partial_fit(X[order], y[order], classes=np.array([0, 1]))
+    return model
+
+
+def train_xgboost(encoder, path, batch_size, cache_dir, rounds=500, early_stopping_rounds=25, params=None):
+    """XGBoost con ExtMemQuantileDMatrix: los bloques cuantizados quedan en disco."""
+    train = xgb.ExtMemQuantileDMatrix(
+        StoreIter(encoder, "train", path, batch_size, os.path.join(cache_dir, "train")))
+    valid = xgb.ExtMemQuantileDMatrix(
+        StoreIter(encoder, "valid", path, batch_size, os.path.join(cache_dir, "valid")), ref=train)
+    booster_params = {"objective": "binary:logistic", "eval_metric": "logloss", "tree_method": "hist",
+                      "seed": 42}
+    booster_params.update(params or {})
+    booster = xgb.train(booster_params, train, num_boost_round=rounds, evals=[(valid, "valid")],
+                        early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+    # Se devuelve como XGBClassifier para que el registro, batch_score.py y la app lo usen igual
+    model = xgb.XGBClassifier()
+    model_path = os.path.join(cache_dir, "booster.json")
+    booster.save_model(model_path)
+    model.load_model(model_path)
+    return model
+
+
+def evaluate(models, encoder, scaler, path, batch_size):
+    """Recorrer la partición de prueba una vez y puntuar todos los modelos."""
+    y_test, probas = [], {name: [] for name in models}
+    for X, y in iter_encoded(encoder, "test", path, batch_size):
+        y_test.append(y)
+        for name, model in models.items():
+            X_model = scaler.transform(X) if isinstance(model, SGDClassifier) else X
+            probas[name].append(model.predict_proba(X_model)[:, 1])
+    y_test = np.concatenate(y_test)
+    probas = {name: np.concatenate(values) for name, values in probas.items()}
+    results = {}
+    for name, proba in probas.items():
+        results[name] = {
+            "AUC": roc_auc_score(y_test, proba),
+            "Report": classification_report(y_test, (proba >= 0.5).astype(int), output_dict=True),
+        }
+    return y_test, probas, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrenamiento por bloques con memoria acotada.")
+    parser.add_argument("--store", default=store_dir, help="Almacén Parquet (por ejemplo, uno sintético).")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--epochs", type=int, default=5, help="Pasadas de SGD sobre el entrenamiento.")
+    parser.add_argument("--rounds", type=int, default=500, help="Máximo de árboles de XGBoost.")
+    parser.add_argument("--publish", action="store_true",
+                        help=f"Publicar los modelos en el registro (solo con --store {store_dir}).")
+    args = parser.parse_args()
+    # Un modelo entrenado con otro almacén (por ejemplo, sintético) no debe pasar a ser el vigente
+    if args.publish and os.path.abspath(args.store) != os.path.abspath(store_dir):
+        parser.error(f"--publish solo se permite con el almacén real ({store_dir}).")
+
+    start = time.perf_counter()
+    encoder, scaler, counts = fit_encoder(args.store, args.batch_size)
+    print(f"Codificador ajustado por bloques: {len(encoder.feature_names_)} variables, "
+          f"filas {counts}")
+
+    models = {}
+    step = time.perf_counter()
+    models["SGD Logistic Regression"] = train_sgd(encoder, scaler, args.store, args.batch_size, args.epochs)
+    print(f"SGD entrenado en {time.perf_counter() - step:.1f} s")
+
+    cache_dir = tempfile.mkdtemp(prefix="xgb_extmem_")
+    try:
+        step = time.perf_counter()
+        models["XGBoost"] = train_xgboost(encoder, args.store, args.batch_size, cache_dir, args.rounds)
+        print(f"XGBoost (memoria externa) entrenado en {time.perf_counter() - step:.1f} s, "
+              f"{models['XGBoost'].get_booster().num_boosted_rounds()} árboles")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    y_test, probas, results = evaluate(models, encoder, scaler, args.store, args.batch_size)
+    for name, metrics in results.items():
+        print(f"{name} - AUC (prueba, estudiantes no vistos): {metrics['AUC']:.4f}")
+    print(f"Tiempo total: {time.perf_counter() - start:.1f} s; memoria pico: {peak_rss_mb():.0f} MB")
+
+    if args.publish:
+        # El SGD se publica con el escalado incorporado para que prediga sobre la CSR sin escalar
+        models["SGD Logistic Regression"] = make_pipeline(scaler, models["SGD Logistic Regression"])
+        best_model_name = max(results, key=lambda name: results[name]["AUC"])
+        version = publish(models, encoder, results, best_model_name,
+                          data_fingerprint=data_fingerprint(args.store), y_test=y_test, test_probas=probas,
+                          extra={"training": "streaming", "split_counts": counts})
+        print(f"Modelos publicados en el registro como versión {version}")
@@ -0,0 +1,320 @@
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime
+from ingestion import new_column_names, source_columns
+from data_store import categorical_columns, numeric_dtypes, load_master, write_partitions
+
+# Generador de datos sintéticos con la forma del MAESTRO DE NOTAS.
+# El perfil aprendido guarda solo frecuencias agregadas: no contiene cédulas,
+# nombres de estudiantes ni de docentes, y omite las celdas con pocos registros.
+profile_path = "synthetic_profile.json"
+min_cell = 5
+
+nota_edges = np.linspace(0, 10, 21)
+asistencia_edges = np.linspace(0, 100, 21)
+
+# Distribuciones condicionales: columna <- columnas de las que depende
+conditionals = {
+    "Carrera": ["Periodo"],
+    "Nivel": ["Carrera"],
+    "Asignatura": ["Carrera", "Nivel"],
+    "Paralelo": ["Carrera"],
+    "Tipo_Ingreso": ["Carrera"],
+    "Estado_Matricula": [],
+    "Num_matricula": [],
+}
+# Columnas que lee learn_profile (las de texto de las dimensiones se decodifican desde sus claves)
+profile_columns = list(dict.fromkeys(["Periodo", *conditionals, "Asistencia", "Nota_final", "Estado_Asignatura",
+                                      "Identificacion_Estudiante", "Cedula_docente"]))
+
+
+def _distribution(counts):
+    counts = counts[counts >= min_cell]
+    if counts.empty:
+        return None
+    return {"values": [str(v) for v in counts.index], "p": (counts / counts.sum()).round(8).tolist()}
+
+
+def _bins(values, edges):
+    return np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(edges) - 2)
+
+
+def learn_profile(df):
+    """Aprender marginales y condicionales del dataset consolidado (tipado)."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    df["Num_matricula"] = df["Num_matricula"].astype(str)
+
+    profile = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source_rows": int(len(df)),
+        "min_cell": min_cell,
+        "marginals": {},
+        "conditionals": {},
+    }
+    profile["marginals"]["Periodo"] = _distribution(df["Periodo"].value_counts())
+
+    for col, parents in conditionals.items():
+        profile["marginals"][col] = _distribution(df[col].value_counts())
+        if not parents:
+            continue
+        table = {}
+        for key, group in df.groupby(parents, sort=False)[col]:
+            key = "|".join(key) if isinstance(key, tuple) else key
+            dist = _distribution(group.value_counts())
+            if dist is not None and group.size >= min_cell:
+                table[key] = dist
+        profile["conditionals"][col] = table
+
+    # Asistencia y Nota_final: histograma conjunto por número de matrícula
+    # (el intervalo -1 de asistencia representa un valor faltante)
+    asistencia_bin = np.where(df["Asistencia"].isna(), -1, _bins(df["Asistencia"].fillna(0), asistencia_edges))
+    nota_bin = _bins(df["Nota_final"].to_numpy(), nota_edges)
+    joint = pd.DataFrame({"m": df["Num_matricula"], "a": asistencia_bin, "n": nota_bin})
+    profile["notas"] = {}
+    for matricula, group in joint.groupby("m"):
+        counts = group.groupby(["a", "n"]).size()
+        counts = counts[counts >= min_cell]
+        if counts.sum() < min_cell:
+            continue
+        profile["notas"][matricula] = {
+            "cells": [[int(a), int(n)] for a, n in counts.index],
+            "p": (counts / counts.sum()).round(8).tolist(),
+        }
+
+    # Estado de la asignatura según el intervalo de la nota
+    estado = {}
+    for nota, group in pd.DataFrame({"n": nota_bin, "e": df["Estado_Asignatura"]}).groupby("n")["e"]:
+        dist = _distribution(group.value_counts())
+        if dist is not None:
+            estado[str(int(nota))] = dist
+    profile["conditionals"]["Estado_Asignatura"] = estado
+    profile["marginals"]["Estado_Asignatura"] = _distribution(df["Estado_Asignatura"].value_counts())
+
+    # Cardinalidades de las columnas personales (solo conteos)
+    profile["cardinality"] = {
+        "rows_per_student": float(len(df) / df["Identificacion_Estudiante"].nunique()),
+        "teachers_per_subject": float(df.groupby("Asignatura")["Cedula_docente"].nunique().mean()),
+    }
+    return profile
+
+
+def save_profile(profile, path=profile_path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=1, ensure_ascii=False)
+
+
+def load_profile(path=profile_path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No existe el perfil {path}. Ejecuta primero: python synthetic_data.py learn")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def extend_periods(periods, extra):
+    """Agregar `extra` periodos posteriores siguiendo el patrón AAAA-1P / AAAA-2P."""
+    periods = list(periods)
+    match = re.match(r"(\d{4})-(\d)P", max(periods))
+    if not match:
+        return periods
+    year, term = int(match.group(1)), int(match.group(2))
+    for _ in range(extra):
+        year, term = (year, 2) if term == 1 else (year + 1, 1)
+        periods.append(f"{year}-{term}P")
+    return periods
+
+
+def _probabilities(p):
+    # El perfil guarda probabilidades redondeadas: se renormalizan al muestrear
+    p = np.asarray(p, dtype=float)
+    return p / p.sum()
+
+
+def _choice(rng, dist, n):
+    values = np.asarray(dist["values"], dtype=object)
+    return values[rng.choice(len(values), n, p=_probabilities(dist["p"]))]
+
+
+def _sample_conditional(rng, profile, col, parent_keys):
+    """Muestrear col dado el valor de sus padres; las celdas sin perfil usan la marginal."""
+    out = np.empty(len(parent_keys), dtype=object)
+    keys, inverse = np.unique(parent_keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+    table = profile["conditionals"].get(col, {})
+    for key, rows in zip(keys, np.split(order, bounds)):
+        dist = table.get(str(key)) or profile["marginals"][col]
+        out[rows] = _choice(rng, dist, len(rows))
+    return out
+
+
+class SyntheticGenerator:
+    """Genera bloques de filas a partir de un perfil; cada bloque es reproducible por su índice."""
+
+    def __init__(self, profile, seed=42, extra_periods=0, students=None):
+        self.profile = profile
+        self.seed = seed
+        periods = profile["marginals"]["Periodo"]
+        values = extend_periods(periods["values"], extra_periods)
+        # Los periodos nuevos reciben el peso medio de los aprendidos
+        weights = np.array(periods["p"] + [np.mean(periods["p"])] * (len(values) - len(periods["values"])))
+        self.periods = {"values": values, "p": (weights / weights.sum()).tolist()}
+        self.students = students
+
+    def chunk(self, index, n, total_rows):
+        rng = np.random.default_rng([self.seed, index])
+        profile = self.profile
+        df = pd.DataFrame({"Periodo": _choice(rng, self.periods, n)})
+        for col, parents in conditionals.items():
+            if parents:
+                keys = df[parents[0]].to_numpy(dtype=object)
+                for parent in parents[1:]:
+                    keys = keys + "|" + df[parent].to_numpy(dtype=object)
+                df[col] = _sample_conditional(rng, profile, col, keys.astype(str))
+            else:
+                df[col] = _choice(rng, profile["marginals"][col], n)
+
+        # Asistencia y nota: celda del histograma conjunto y valor uniforme dentro de ella
+        asistencia = np.full(n, np.nan)
+        nota = np.empty(n)
+        for matricula in np.unique(df["Num_matricula"]):
+            rows = np.flatnonzero(df["Num_matricula"].to_numpy() == matricula)
+            joint = profile["notas"].get(matricula) or profile["notas"]["1"]
+            cells = np.asarray(joint["cells"])[rng.choice(len(joint["p"]), len(rows), p=_probabilities(joint["p"]))]
+            has_asistencia = cells[:, 0] >= 0
+            a_bin = cells[has_asistencia, 0]
+            asistencia[rows[has_asistencia]] = rng.uniform(asistencia_edges[a_bin], asistencia_edges[a_bin + 1])
+            nota[rows] = rng.uniform(nota_edges[cells[:, 1]], nota_edges[cells[:, 1] + 1])
+        df["Asistencia"] = np.round(asistencia, 2)
+        df["Nota_final"] = np.round(nota, 2)
+        df["Estado_Asignatura"] = _sample_conditional(
+            rng, profile, "Estado_Asignatura", _bins(df["Nota_final"].to_numpy(), nota_edges).astype(str)
+        )
+
+        # Estudiantes y docentes con códigos (sin datos personales)
+        students = self.students or max(int(total_rows / profile["cardinality"]["rows_per_student"]), 1)
+        student = rng.integers(0, students, n).astype(str)
+        df["Identificacion_Estudiante"] = np.char.add("EST", np.char.zfill(student, 9))
+        df["Estudiante"] = np.char.add("ESTUDIANTE ", np.char.zfill(student, 9))
+        pool = max(int(round(profile["cardinality"]["teachers_per_subject"])), 1)
+        subject_code = pd.Series(df["Asignatura"]).astype("category").cat.codes.to_numpy()
+        teacher = (subject_code.astype(np.int64) * 7919 + rng.integers(0, pool, n)) % 100000
+        df["Cedula_docente"] = np.char.add("DOC", np.char.zfill(teacher.astype(str), 6))
+        df["Nombre_docente"] = np.char.add("DOCENTE ", np.char.zfill(teacher.astype(str), 6))
+        df["Num_matricula"] = df["Num_matricula"].astype(int)
+        return df[new_column_names]
+
+    def chunks(self, total_rows, chunk_size=100_000):
+        for index, start in enumerate(range(0, total_rows, chunk_size)):
+            yield self.chunk(index, min(chunk_size, total_rows - start), total_rows)
+
+
+def _typed_chunk(df):
+    """Mismos tipos que el almacén consolidado (categóricas y numéricos compactos)."""
+    for col, dtype in numeric_dtypes.items():
+        df[col] = df[col].astype(dtype)
+    for col in categorical_columns:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def _file_schema(schema):
+    """Esquema fijo para todo el archivo: índices int32 en las categóricas.
+
+    pandas elige el ancho de los códigos (int8, int16...) según las categorías de
+    cada bloque; sin fijarlo, un bloque final corto no coincide con el esquema.
+    """
+    fields = [pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+              if pa.types.is_dictionary(field.type) else field for field in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def write_parquet(chunks, path):
+    """Un solo archivo Parquet escrito bloque a bloque."""
+    writer = schema = None
+    try:
+        for df in chunks:
+            table = pa.Table.from_pandas(_typed_chunk(df), preserve_index=False)
+            if writer is None:
+                schema = _file_schema(table.schema)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_partitioned_store(chunks, path):
+    """Almacén particionado por Periodo, legible con data_store.load_master(path=...)."""
+    for index, df in enumerate(chunks):
+        write_partitions(_typed_chunk(df), path, f"part-{index:05d}.parquet")
+
+
+def write_xls(chunks, directory, rows_per_file=60_000):
+    """Archivos .xls con el diseño del reporte (encabezado en la fila 3); requiere xlwt."""
+    try:
+        import xlwt
+    except ImportError:
+        raise SystemExit("La salida .xls requiere el paquete xlwt (pip install xlwt).")
+    os.makedirs(directory, exist_ok=True)
+    part = 0
+    for df in chunks:
+        for start in range(0, len(df), rows_per_file):
+            book = xlwt.Workbook()
+            sheet = book.add_sheet("Reporte")
+            sheet.write(2, 1, "REPORTE MAESTRO DE NOTAS")
+            for col, name in zip(source_columns, new_column_names):
+                sheet.write(3, col, name)
+            block = df.iloc[start:start + rows_per_file].astype(object).where(lambda d: d.notna(), "")
+            for i, row in enumerate(block.to_numpy(), start=4):
+                for col, value in zip(source_columns, row):
+                    sheet.write(i, col, value)
+            book.save(os.path.join(directory, f"MAESTRO DE NOTAS-SINTETICO-{part:05d}.xls"))
+            part += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Datos sintéticos con la forma del MAESTRO DE NOTAS.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    learn = subparsers.add_parser("learn", help="Aprender el perfil desde el almacén consolidado.")
+    learn.add_argument("--output", default=profile_path)
+    generate = subparsers.add_parser("generate", help="Generar datos a partir del perfil.")
+    generate.add_argument("--rows", type=int, required=True)
+    generate.add_argument("--format", choices=["parquet", "store", "csv", "xls"], default="store")
+    generate.add_argument("--output", required=True, help="Archivo (parquet, csv) o directorio (store, xls).")
+    generate.add_argument("--profile", default=profile_path)
+    generate.add_argument("--chunk-size", type=int, default=100_000)
+    generate.add_argument("--extra-periods", type=int, default=0,
+                          help="Periodos adicionales posteriores a los aprendidos (historias más largas).")
+    generate.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.command == "learn":
+        profile = learn_profile(load_master(columns=profile_columns))
+        save_profile(profile, args.output)
+        print(f"Perfil aprendido de {profile['source_rows']} registros guardado en {args.output}")
+    else:
+        start = time.perf_counter()
+        generator = SyntheticGenerator(load_profile(args.profile), args.seed, args.extra_periods)
+        chunks = generator.chunks(args.rows, args.chunk_size)
+        if args.format == "parquet":
+            write_parquet(chunks, args.output)
+        elif args.format == "store":
+            write_partitioned_store(chunks, args.output)
+        elif args.format == "csv":
+            for index, df in enumerate(chunks):
+                df.to_csv(args.output, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        else:
+            write_xls(chunks, args.output)
+        seconds = time.perf_counter() - start
+        print(f"{args.rows:,} filas sintéticas ({args.format}) en {args.output}: "
+              f"{seconds:.1f} s ({args.rows / seconds:,.0f} filas/s)")
@@ -0,0 +1,408 @@
+import numpy as np
+import scipy.sparse as sp
+import argparse
+import json
+import os
+import time
+
+# Exportación compacta de modelos de árboles (Random Forest o XGBoost).
+# Todos los árboles se guardan en arreglos planos contiguos (variable, umbral,
+# hijos, valor por nodo) y se recorren con NumPy para todas las filas a la vez.
+# - Todas las comparaciones son "x < umbral" en float32; los umbrales de
+#   scikit-learn ("x <= umbral" en float64) se convierten a su equivalente exacto.
+# - Faltantes (NaN): van al hijo por defecto, como en XGBoost. En XGBoost las
+#   entradas ausentes de la CSR son faltantes; en Random Forest valen cero.
+# - En las hojas los dos hijos apuntan al propio nodo.
+
+
+def export_file(name, suffix=""):
+    from model_registry import model_slug
+    return f"flat_{model_slug(name)}{suffix}.npz"
+
+
+class FlatTrees:
+    """Conjunto de árboles aplanado.
+
+    kind="forest": promedio de la probabilidad de aprobar en las hojas.
+    kind="xgboost": suma de los valores de las hojas más el margen base, en log-odds.
+    """
+
+    arrays = ["feature", "threshold", "left", "right", "default_left", "value", "cover", "roots"]
+
+    def __init__(self, kind, n_features, feature, threshold, left, right, default_left, value, cover, roots,
+                 base_margin=0.0):
+        self.kind = kind
+        self.n_features = int(n_features)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.cover = cover
+        self.roots = roots
+        self.base_margin = float(base_margin)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.arrays)
+
+    def depths(self):
+        """Profundidad de cada nodo (la raíz de cada árbol tiene profundidad 0)."""
+        depth = np.zeros(self.n_nodes, dtype=np.int32)
+        internal = np.flatnonzero(self.left != np.arange(self.n_nodes))
+        # Los hijos siempre tienen un índice mayor que el padre: basta propagar por niveles
+        frontier = self.roots
+        level = 0
+        while len(frontier):
+            depth[frontier] = level
+            frontier = frontier[np.isin(frontier, internal)]
+            frontier = np.concatenate([self.left[frontier], self.right[frontier]])
+            level += 1
+        return depth
+
+    def _dense(self, X):
+        """Matriz densa float32 con la semántica de faltantes del modelo original."""
+        if not sp.issparse(X):
+            return np.asarray(X, dtype=np.float32)
+        if self.kind != "xgboost":
+            return X.toarray().astype(np.float32, copy=False)
+        X = X.tocsr()
+        dense = np.full(X.shape, np.nan, dtype=np.float32)
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        dense[rows, X.indices] = X.data
+        return dense
+
+    def leaves(self, X):
+        """Hoja alcanzada por cada fila en cada árbol (filas x árboles).
+
+        Solo se siguen avanzando los pares (fila, árbol) que aún no llegan a una
+        hoja, así que el trabajo total es la suma de las longitudes de los caminos.
+        """
+        X = self._dense(X)
+        n_rows = X.shape[0]
+        node = np.tile(self.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), self.n_trees)
+        active = np.flatnonzero(self.left[node] != node)
+        while len(active):
+            current = node[active]
+            x = X[row[active], self.feature[current]]
+            go_left = np.where(np.isnan(x), self.default_left[current], x < self.threshold[current])
+            following = np.where(go_left, self.left[current], self.right[current])
+            node[active] = following
+            active = active[self.left[following] != following]
+        return node.reshape(n_rows, self.n_trees)
+
+    def predict_margin(self, X, chunk_size=20000):
+        """Suma (XGBoost) o promedio (Random Forest) de los valores de las hojas.
+
+        Las filas repetidas (frecuentes: pocas variables, muchas categóricas) se
+        recorren una sola vez por bloque.
+        """
+        n_rows = X.shape[0]
+        out = np.empty(n_rows)
+        for start in range(0, n_rows, chunk_size):
+            dense = self._dense(X[start:start + chunk_size])
+            if len(dense) > 1:
+                # Se compara el contenido binario de cada fila, así los NaN iguales también coinciden
+                rows = np.ascontiguousarray(dense).view(np.dtype((np.void, dense.dtype.itemsize * dense.shape[1])))
+                _, first, inverse = np.unique(rows.ravel(), return_index=True, return_inverse=True)
+                dense = dense[first]
+            else:
+                inverse = np.zeros(len(dense), dtype=np.intp)
+            leaf_values = self.value[self.leaves(dense)].astype(np.float64)
+            if self.kind == "xgboost":
+                margin = leaf_values.sum(axis=1) + self.base_margin
+            else:
+                margin = leaf_values.mean(axis=1)
+            out[start:start + chunk_size] = margin[inverse.ravel()]
+        return out
+
+    def predict_proba(self, X, chunk_size=20000):
+        """Probabilidad de aprobar (clase 1) de cada fila."""
+        margin = self.predict_margin(X, chunk_size)
+        return 1.0 / (1.0 + np.exp(-margin)) if self.kind == "xgboost" else margin
+
+    def save(self, path):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, kind=self.kind, n_features=self.n_features, base_margin=self.base_margin,
+                 **{name: getattr(self, name) for name in self.arrays})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(str(data["kind"]), int(data["n_features"]), base_margin=float(data["base_margin"]),
+                   **{name: data[name] for name in cls.arrays})
+
+
+def _index_dtype(n):
+    return np.int32 if n < 2 ** 31 else np.int64
+
+
+def _feature_dtype(n_features):
+    return np.int16 if n_features < 2 ** 15 else np.int32
+
+
+def from_forest(model):
+    """Aplanar un RandomForestClassifier de scikit-learn."""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    sizes = np.array([tree.node_count for tree in trees])
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    n_nodes = int(sizes.sum())
+    index_dtype = _index_dtype(n_nodes)
+
+    feature, threshold, left, right, default_left, value, cover = [], [], [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left < 0
+        feature.append(np.where(leaf, 0, tree.feature))
+        # x <= t (float64) con x en float32 equivale a x < (siguiente float32 después del mayor float32 <= t)
+        t32 = tree.threshold.astype(np.float32)
+        t32 = np.where(t32.astype(np.float64) > tree.threshold, np.nextafter(t32, np.float32(-np.inf)), t32)
+        threshold.append(np.nextafter(t32, np.float32(np.inf)))
+        left.append(np.where(leaf, nodes, tree.children_left) + offset)
+        right.append(np.where(leaf, nodes, tree.children_right) + offset)
+        missing = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        default_left.append(np.asarray(missing, dtype=bool))
+        counts = tree.value[:, 0, :]
+        value.append(counts[:, 1] / counts.sum(axis=1))
+        cover.append(tree.weighted_n_node_samples)
+
+    return FlatTrees(
+        "forest", model.n_features_in_,
+        feature=np.concatenate(feature).astype(_feature_dtype(model.n_features_in_)),
+        threshold=np.concatenate(threshold).astype(np.float32),
+        left=np.concatenate(left).astype(index_dtype),
+        right=np.concatenate(right).astype(index_dtype),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value).astype(np.float32),
+        cover=np.concatenate(cover).astype(np.float32),
+        roots=offsets.astype(index_dtype),
+    )
+
+
+def from_xgboost(model):
+    """Aplanar un XGBClassifier binario (árboles gbtree, divisiones numéricas).
+
+    Con parada temprana solo se exportan los árboles hasta best_iteration, los mismos que usa predict_proba.
+    """
+    from modeling import xgb_used_rounds
+
+    raw = json.loads(model.get_booster().save_raw(raw_format="json"))
+    learner = raw["learner"]
+    booster = learner["gradient_booster"]
+    if booster["name"] != "gbtree":
+        raise ValueError(f"Solo se exportan modelos gbtree (el modelo usa {booster['name']}).")
+    trees = booster["model"]["trees"]
+    trees_per_round = len(trees) // max(model.get_booster().num_boosted_rounds(), 1)
+    trees = trees[:xgb_used_rounds(model) * trees_per_round]
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    n_features = int(learner["learner_model_param"]["num_feature"])
+
+    sizes = np.array([len(tree["left_children"]) for tree in trees])
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    index_dtype = _index_dtype(int(sizes.sum()))
+    feature, threshold, left, right, default_left, value, cover = [], [], [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        if any(tree["split_type"]):
+            raise ValueError("Los árboles con divisiones categóricas nativas no se pueden exportar.")
+        nodes = np.arange(len(tree["left_children"]))
+        children_left = np.array(tree["left_children"])
+        leaf = children_left < 0
+        feature.append(np.where(leaf, 0, tree["split_indices"]))
+        threshold.append(np.array(tree["split_conditions"], dtype=np.float32))
+        left.append(np.where(leaf, nodes, children_left) + offset)
+        right.append(np.where(leaf, nodes, tree["right_children"]) + offset)
+        default_left.append(np.array(tree["default_left"], dtype=bool))
+        # En las hojas split_conditions guarda el valor de la hoja; los internos se completan al podar
+        value.append(np.where(leaf, tree["split_conditions"], 0.0))
+        cover.append(np.array(tree["sum_hessian"]))
+
+    flat = FlatTrees(
+        "xgboost", n_features,
+        feature=np.concatenate(feature).astype(_feature_dtype(n_features)),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left).astype(index_dtype),
+        right=np.concatenate(right).astype(index_dtype),
+        default_left=np.concatenate(default_left),
+        value=np.concatenate(value).astype(np.float32),
+        cover=np.concatenate(cover).astype(np.float32),
+        roots=offsets.astype(index_dtype),
+        base_margin=np.log(base_score / (1 - base_score)),
+    )
+    _fill_internal_values(flat)
+    return flat
+
+
+def _fill_internal_values(flat):
+    """Valor de los nodos internos de XGBoost: promedio de sus hijos ponderado por cobertura."""
+    depth = flat.depths()
+    internal = flat.left != np.arange(flat.n_nodes)
+    value = flat.value.astype(np.float64)
+    cover = flat.cover.astype(np.float64)
+    for level in range(depth.max() - 1, -1, -1):
+        nodes = np.flatnonzero(internal & (depth == level))
+        left, right = flat.left[nodes], flat.right[nodes]
+        total = cover[left] + cover[right]
+        value[nodes] = np.where(total > 0, (cover[left] * value[left] + cover[right] * value[right])
+                                / np.where(total > 0, total, 1), 0.0)
+    flat.value = value.astype(np.float32)
+
+
+def is_tree_model(model):
+    return hasattr(model, "get_booster") or (hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"))
+
+
+def export_model(model):
+    """FlatTrees equivalente a un Random Forest o un XGBoost ya entrenado."""
+    if not is_tree_model(model):
+        raise TypeError(f"Solo se exportan modelos de árboles, no {type(model).__name__}.")
+    return from_xgboost(model) if hasattr(model, "get_booster") else from_forest(model)
+
+
+def prune(flat, max_depth=None, max_trees=None):
+    """Modelo reducido: solo los primeros max_trees árboles y nodos hasta max_depth.
+
+    Los nodos en la profundidad máxima pasan a ser hojas con su propio valor
+    (la probabilidad del nodo en el bosque; el promedio ponderado de sus hijos en
+    XGBoost). Los nodos que quedan fuera se eliminan y se renumeran los demás.
+    """
+    n_trees = min(max_trees or flat.n_trees, flat.n_trees)
+    end = flat.roots[n_trees] if n_trees < flat.n_trees else flat.n_nodes
+    depth = flat.depths()[:end]
+    keep = depth <= max_depth if max_depth is not None else np.ones(end, dtype=bool)
+
+    nodes = np.arange(end)
+    left, right = flat.left[:end].copy(), flat.right[:end].copy()
+    if max_depth is not None:
+        cut = depth == max_depth
+        left[cut] = nodes[cut]
+        right[cut] = nodes[cut]
+    new_index = (np.cumsum(keep) - 1).astype(flat.left.dtype)
+    return FlatTrees(
+        flat.kind, flat.n_features,
+        feature=flat.feature[:end][keep],
+        threshold=flat.threshold[:end][keep],
+        left=new_index[left[keep]],
+        right=new_index[right[keep]],
+        default_left=flat.default_left[:end][keep],
+        value=flat.value[:end][keep],
+        cover=flat.cover[:end][keep],
+        roots=new_index[flat.roots[:n_trees]],
+        base_margin=flat.base_margin,
+    )
+
+
+def load_export(registry, name=None):
+    """Exportación completa de un modelo del registro, o None si no se ha generado."""
+    name = name or registry.best_model_name
+    path = os.path.join(registry.version_dir, export_file(name))
+    return FlatTrees.load(path) if os.path.exists(path) else None
+
+
+def _latency_ms(predict, rows, repeats):
+    times = []
+    for i in range(repeats):
+        row = rows[i % rows.shape[0]]
+        start = time.perf_counter()
+        predict(row)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, [50, 99])
+
+
+def benchmark(model, flat, X, repeats=200):
+    """Tamaño, puntuación en lote y latencia de una fila del modelo original frente al exportado."""
+    import pickle
+
+    results = {}
+    for label, predict, nbytes in [
+        ("original", lambda rows: model.predict_proba(rows)[:, 1], len(pickle.dumps(model))),
+        ("exportado", flat.predict_proba, flat.nbytes),
+    ]:
+        start = time.perf_counter()
+        predict(X)
+        batch_seconds = time.perf_counter() - start
+        p50, p99 = _latency_ms(predict, X, repeats)
+        results[label] = {"mb": nbytes / 1024 ** 2, "batch_seconds": batch_seconds,
+                          "rows_per_second": X.shape[0] / batch_seconds, "single_p50_ms": p50, "single_p99_ms": p99}
+    return results
+
+
+def _held_out_split(registry):
+    """Partición de prueba de la versión: mismos datos y misma división que model_comparison.py."""
+    from sklearn.model_selection import train_test_split
+    from data_store import load_master
+    from features import add_target, build_design_matrix
+
+    df = add_target(load_master(columns=registry.encoder.numeric + registry.encoder.categorical
+                                + ["Estado_Asignatura"]))
+    X, y, _ = build_design_matrix(df, encoder=registry.encoder)
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    if not np.array_equal(y_test, registry.test_predictions()["y_test"]):
+        print("Aviso: los datos cambiaron desde la publicación; la partición de prueba no coincide exactamente.")
+    return X_test, y_test
+
+
+if __name__ == "__main__":
+    from sklearn.metrics import roc_auc_score
+    from model_registry import RegisteredVersion
+
+    parser = argparse.ArgumentParser(description="Exportar un modelo de árboles a arreglos planos y medirlo.")
+    parser.add_argument("--model", default=None, help="Modelo del registro (por defecto, el mejor).")
+    parser.add_argument("--version", default=None, help="Versión del registro (por defecto, la vigente).")
+    parser.add_argument("--max-depth", type=int, default=None, help="Podar los árboles a esta profundidad.")
+    parser.add_argument("--max-trees", type=int, default=None, help="Conservar solo los primeros árboles.")
+    parser.add_argument("--repeats", type=int, default=200, help="Predicciones individuales para la latencia.")
+    args = parser.parse_args()
+
+    registry = RegisteredVersion(args.version)
+    name = args.model or registry.best_model_name
+    model = registry.model(name)
+    if hasattr(model, "n_jobs"):
+        # Misma configuración que el predictor: un hilo por predicción
+        model.set_params(n_jobs=1)
+
+    start = time.perf_counter()
+    flat = export_model(model)
+    print(f"{name} (versión {registry.version}): {flat.n_trees} árboles, {flat.n_nodes:,} nodos, "
+          f"profundidad máxima {flat.depths().max()}; exportado en {time.perf_counter() - start:.2f} s")
+    path = os.path.join(registry.version_dir, export_file(name))
+    flat.save(path)
+
+    X_test, y_test = _held_out_split(registry)
+    original = model.predict_proba(X_test)[:, 1]
+    exported = flat.predict_proba(X_test)
+    print(f"Diferencia máxima con el modelo original: {np.abs(original - exported).max():.2e}")
+    print(f"Guardado en {path} ({os.path.getsize(path) / 1024 ** 2:.1f} MB)")
+
+    print("\nRendimiento (partición de prueba):")
+    for label, stats in benchmark(model, flat, X_test, args.repeats).items():
+        print(f"  {label:9s} {stats['mb']:7.1f} MB · lote {stats['batch_seconds']:.3f} s "
+              f"({stats['rows_per_second']:,.0f} filas/s) · una fila p50 {stats['single_p50_ms']:.2f} ms, "
+              f"p99 {stats['single_p99_ms']:.2f} ms")
+
+    if args.max_depth is not None or args.max_trees is not None:
+        pruned = prune(flat, args.max_depth, args.max_trees)
+        auc = roc_auc_score(y_test, original)
+        auc_pruned = roc_auc_score(y_test, pruned.predict_proba(X_test))
+        suffix = f"_d{args.max_depth or 'max'}_t{args.max_trees or 'all'}"
+        pruned_path = os.path.join(registry.version_dir, export_file(name, suffix))
+        pruned.save(pruned_path)
+        start = time.perf_counter()
+        pruned.predict_proba(X_test)
+        seconds = time.perf_counter() - start
+        p50, _ = _latency_ms(pruned.predict_proba, X_test, args.repeats)
+        print(f"\nPodado: {pruned.n_trees} árboles, {pruned.n_nodes:,} nodos, {pruned.nbytes / 1024 ** 2:.1f} MB "
+              f"({pruned.nbytes / flat.nbytes:.0%} del exportado)")
+        print(f"  AUC {auc:.4f} -> {auc_pruned:.4f} (delta {auc_pruned - auc:+.4f}); "
+              f"lote {seconds:.3f} s; una fila p50 {p50:.2f} ms")
+        print(f"  Guardado en {pruned_path}")
@@ -0,0 +1,198 @@
+import numpy as np
+import argparse
+import json
+import math
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sklearn.metrics import roc_auc_score
+from data_store import load_master, data_fingerprint
+from features import add_target, build_design_matrix
+from modeling import candidate_models, make_model, fit_input, supports_early_stopping, tuned_params_path
+from cv_engine import init_worker, shared_data, make_folds, fit_with_early_stopping
+
+# Búsqueda de hiperparámetros con Hyperband (sucesivas reducciones a la mitad).
+# El presupuesto de cada prueba es la fracción de filas de entrenamiento usadas.
+trials_db = "tuning_trials.db"
+eta = 3
+min_budget = 1 / 9
+
+
+def sample_params(name, rng):
+    """Muestrear una configuración del espacio de búsqueda de un modelo."""
+    if name == "Logistic Regression":
+        return {"C": float(10 ** rng.uniform(-3, 2)), "penalty": str(rng.choice(["l1", "l2"]))}
+    if name == "Random Forest":
+        max_depth = rng.choice([0, 8, 16, 32])
+        return {
+            "n_estimators": int(rng.choice([50, 100, 200, 300])),
+            "max_depth": int(max_depth) if max_depth else None,
+            "min_samples_leaf": int(rng.choice([1, 2, 5, 10])),
+            "max_features": ["sqrt", 0.3, 0.5][rng.integers(3)],
+        }
+    if name == "XGBoost":
+        # El número de árboles lo decide la parada temprana
+        return {
+            "max_depth": int(rng.integers(3, 11)),
+            "learning_rate": float(10 ** rng.uniform(-2, -0.5)),
+            "subsample": float(rng.uniform(0.6, 1.0)),
+            "colsample_bytree": float(rng.uniform(0.5, 1.0)),
+            "min_child_weight": float(10 ** rng.uniform(0, 1)),
+            "reg_lambda": float(10 ** rng.uniform(-1, 1)),
+        }
+    raise KeyError(name)
+
+
+def hyperband_brackets(method="hyperband"):
+    """Lista de (corchete, configuraciones iniciales, presupuesto inicial).
+
+    method="halving" ejecuta solo el corchete más agresivo (successive halving puro).
+    """
+    s_max = int(round(math.log(1 / min_budget, eta)))
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        brackets.append((s, n, eta ** -s))
+        if method == "halving":
+            break
+    return brackets
+
+
+# Almacén de pruebas (SQLite): cada prueba terminada se guarda al momento
+def open_store(path=trials_db):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS trials (
+            study TEXT, model TEXT, bracket INTEGER, config_id INTEGER, budget REAL,
+            params TEXT, auc REAL, fit_seconds REAL, created_at TEXT,
+            PRIMARY KEY (study, model, bracket, config_id, budget)
+        )
+    """)
+    return conn
+
+
+def stored_trials(conn, study, model):
+    rows = conn.execute(
+        "SELECT bracket, config_id, budget, auc FROM trials WHERE study = ? AND model = ?",
+        (study, model),
+    )
+    return {(bracket, config_id, round(budget, 6)): auc for bracket, config_id, budget, auc in rows}
+
+
+def save_trial(conn, study, result):
+    conn.execute(
+        "INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (study, result["model"], result["bracket"], result["config_id"], result["budget"],
+         json.dumps(result["params"]), result["auc"], result["fit_seconds"],
+         datetime.now().isoformat(timespec="seconds")),
+    )
+    conn.commit()
+
+
+def run_trial(task):
+    """Entrenar una configuración con una fracción de las filas y medir el AUC de validación."""
+    X, y = shared_data()
+    name, bracket, config_id, params, budget, train_idx, val_idx = task
+    # Subconjuntos anidados: un presupuesto mayor incluye las filas de uno menor
+    train_idx = train_idx[:max(int(len(train_idx) * budget), 100)]
+    model = make_model(name, params, n_jobs=1)
+    start = time.perf_counter()
+    if supports_early_stopping(name):
+        fit_with_early_stopping(model, X, y, train_idx, early_stopping_rounds=25, seed=config_id)
+    else:
+        model.fit(fit_input(name, X[train_idx]), y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    auc = roc_auc_score(y[val_idx], model.predict_proba(X[val_idx])[:, 1])
+    return {"model": name, "bracket": bracket, "config_id": config_id, "budget": budget,
+            "params": params, "auc": float(auc), "fit_seconds": fit_seconds}
+
+
+def tune_model(name, executor, conn, study, train_idx, val_idx, method="hyperband", seed=42):
+    """Búsqueda Hyperband de un modelo; reutiliza las pruebas ya guardadas en el almacén."""
+    done = stored_trials(conn, study, name)
+    best = None
+    for bracket, n, budget in hyperband_brackets(method):
+        # Las configuraciones se regeneran igual al reanudar (semilla por modelo y corchete)
+        rng = np.random.default_rng([seed, bracket, list(candidate_models).index(name)])
+        configs = {config_id: sample_params(name, rng) for config_id in range(n)}
+        alive = list(configs)
+        for rung in range(bracket + 1):
+            scores = {}
+            pending = []
+            for config_id in alive:
+                key = (bracket, config_id, round(budget, 6))
+                if key in done:
+                    scores[config_id] = done[key]
+                else:
+                    pending.append((name, bracket, config_id, configs[config_id], budget, train_idx, val_idx))
+            for result in executor.map(run_trial, pending):
+                save_trial(conn, study, result)
+                scores[result["config_id"]] = result["auc"]
+            print(f"  {name} corchete {bracket}, presupuesto {budget:.3f}: {len(alive)} configuraciones "
+                  f"({len(pending)} nuevas), mejor AUC {max(scores.values()):.4f}")
+
+            if budget >= 1:
+                for config_id in alive:
+                    if best is None or scores[config_id] > best["auc"]:
+                        best = {"params": configs[config_id], "auc": scores[config_id],
+                                "bracket": bracket, "config_id": config_id}
+            keep = max(len(alive) // eta, 1)
+            alive = sorted(alive, key=lambda c: scores[c], reverse=True)[:keep]
+            budget = min(budget * eta, 1.0)
+    return best
+
+
+def promote(best_by_model, study, path=tuned_params_path):
+    """Guardar los parámetros ganadores para que model_comparison.py los use."""
+    tuned = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            tuned = json.load(f)
+    for name, best in best_by_model.items():
+        tuned[name] = {"params": best["params"], "auc": best["auc"], "study": study}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tuned, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros (Hyperband) reanudable.")
+    parser.add_argument("--models", nargs="+", default=list(candidate_models), choices=list(candidate_models))
+    parser.add_argument("--method", choices=["hyperband", "halving"], default="hyperband")
+    parser.add_argument("--cores", type=int, default=None, help="Núcleos disponibles (por defecto, todos).")
+    parser.add_argument("--study", default=None,
+                        help="Nombre del estudio; por defecto depende de los datos, así una búsqueda "
+                             "interrumpida se reanuda mientras los datos no cambien.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = load_master(columns=['Asistencia', 'Num_matricula', 'Tipo_Ingreso', 'Carrera', 'Periodo',
+                              'Estado_Asignatura', 'Identificacion_Estudiante'])
+    df = add_target(df)
+    X, y, encoder = build_design_matrix(df)
+    groups = df.loc[encoder.valid_mask(df), 'Identificacion_Estudiante'].cat.codes.to_numpy()
+
+    # Validación con estudiantes no vistos: primer pliegue de la división agrupada
+    train_idx, val_idx = make_folds(y, groups, "grouped", n_splits=5, random_state=args.seed)[0]
+    train_idx = np.random.default_rng(args.seed).permutation(train_idx)
+
+    study = args.study or f"{data_fingerprint()[:12]}-{args.method}-{args.seed}"
+    conn = open_store()
+    workers = args.cores or os.cpu_count() or 1
+    print(f"Estudio {study}: {', '.join(args.models)} con {workers} procesos")
+
+    start = time.perf_counter()
+    best_by_model = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(X, y)) as executor:
+        for name in args.models:
+            best_by_model[name] = tune_model(name, executor, conn, study, train_idx, val_idx,
+                                             args.method, args.seed)
+            print(f"{name}: mejor AUC {best_by_model[name]['auc']:.4f} con {best_by_model[name]['params']}")
+    conn.close()
+
+    promote(best_by_model, study)
+    print(f"\nBúsqueda completada en {time.perf_counter() - start:.1f} s")
+    print(f"Parámetros ganadores guardados en {tuned_params_path}; model_comparison.py los usará")